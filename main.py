@@ -1,16 +1,59 @@
+import argparse
+import asyncio
+import importlib.util
+import os
 import uvicorn
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
 
-from src.api.route import ingestion, retrieval
+from src.api.route import health, ingestion, retrieval
+from src.config.settings import (
+    SERVER_MODE,
+    SERVER_HOST,
+    SERVER_PORT,
+    SERVER_WORKERS,
+    SERVER_KEEP_ALIVE,
+    SERVER_BACKLOG,
+    SERVER_ACCESS_LOG,
+    SESSION_STORE,
+    WARMUP_ENABLED
+)
+from src.utils.mcp_client import close_mcp_pool
+from src.utils.job_queue import get_job_queue
+from src.utils.session_manager import get_session_manager
+from src.utils.tokens import load_tokenizer
+from src.utils.uploads import UploadSizeLimitMiddleware
+from src.utils.warmup import get_warmup
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Own process-wide resources for the lifetime of the app."""
+    # Resume queued ingestion jobs left over from a previous run
+    await get_job_queue().start()
+    # Expire idle conversation sessions and flush shared session writes in the background
+    get_session_manager().start()
+    # Connect MCP and compile agents before /readyz lets traffic in
+    if WARMUP_ENABLED:
+        get_warmup().start()
+    else:
+        # Warmup would load the tokenizer; without it, load it here off the event loop
+        await asyncio.to_thread(load_tokenizer)
+    yield
+    await get_warmup().stop()
+    await get_session_manager().close()
+    await get_job_queue().stop()
+    # Close pooled MCP connections on shutdown
+    await close_mcp_pool()
 
 # Create FastAPI app
 app = FastAPI(
     title="Document Processing and Knowledge Graph API",
     description="API for document ingestion and knowledge retrieval using LLMs and knowledge graphs",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Configure CORS
@@ -22,7 +65,11 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Answer oversized single-file uploads with 413 before their body is read
+app.add_middleware(UploadSizeLimitMiddleware, paths=("/ingest/document", "/ingest/jobs"))
+
 # Include API routers
+app.include_router(health.router)
 app.include_router(ingestion.router)
 app.include_router(retrieval.router)
 
@@ -34,9 +81,56 @@ async def root():
     """Serve the main HTML page."""
     return FileResponse("frontend/index.html")
 
+def _available_cpus() -> int:
+    """Number of CPUs this process may run on (respects container/affinity limits)."""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+def server_options(prod: bool, workers: int = SERVER_WORKERS) -> dict:
+    """Build the uvicorn options for development or production.
+
+    Development runs a single process with the file-watching reloader.
+    Production runs one worker per available CPU (unless ``workers`` is set)
+    without the reloader, prefers uvloop and httptools when installed, and
+    raises the keep-alive timeout and listen backlog.
+
+    Args:
+        prod: Whether to use the production settings
+        workers: Production worker processes (0 for one per available CPU)
+
+    Returns:
+        Keyword arguments for uvicorn.run
+    """
+    if not prod:
+        return {"reload": True}
+    return {
+        "reload": False,
+        "workers": workers or _available_cpus(),
+        "loop": "uvloop" if importlib.util.find_spec("uvloop") else "asyncio",
+        "http": "httptools" if importlib.util.find_spec("httptools") else "h11",
+        "timeout_keep_alive": SERVER_KEEP_ALIVE,
+        "backlog": SERVER_BACKLOG,
+        "access_log": SERVER_ACCESS_LOG,
+    }
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the API server")
+    parser.add_argument("--prod", action="store_true", default=SERVER_MODE == "prod",
+                        help="Production mode: multiple workers, no reload (or set SERVER_MODE=prod)")
+    parser.add_argument("--workers", type=int, default=SERVER_WORKERS,
+                        help="Worker processes in production mode (0 for one per CPU)")
+    parser.add_argument("--host", default=SERVER_HOST, help="Address to bind")
+    parser.add_argument("--port", type=int, default=SERVER_PORT, help="Port to bind")
+    args = parser.parse_args()
+
+    options = server_options(args.prod, args.workers)
     print("Starting server...")
-    print("Server running at http://localhost:8080")
-    print("API docs available at http://localhost:8080/docs")
+    if args.prod:
+        print(f"Production mode: {options['workers']} workers, loop={options['loop']}, http={options['http']}")
+        if options["workers"] > 1 and SESSION_STORE == "memory":
+            print("Warning: conversation sessions are per worker; set SESSION_STORE=sqlite to share them")
+    print(f"Server running at http://localhost:{args.port}")
+    print(f"API docs available at http://localhost:{args.port}/docs")
     print("Press Ctrl+C to stop the server")
-    uvicorn.run("main:app", host="0.0.0.0", port=8080, reload=True)
+    uvicorn.run("main:app", host=args.host, port=args.port, **options)
@@ -0,0 +1,23 @@
+from fastapi import APIRouter, Response
+
+from src.config.settings import WARMUP_ENABLED
+from src.utils.warmup import get_warmup
+
+router = APIRouter(tags=["health"])
+
+@router.get("/healthz")
+async def healthz() -> dict:
+    """Liveness probe: the process is up and serving requests."""
+    return {"status": "ok"}
+
+@router.get("/readyz")
+async def readyz(response: Response) -> dict:
+    """Readiness probe: 200 once startup warmup finished and MCP is reachable, 503 before."""
+    warmup = get_warmup()
+    ready = warmup.ready or not WARMUP_ENABLED
+    if not ready:
+        response.status_code = 503
+    return {
+        "status": "ready" if ready else "warming_up",
+        "warmup": warmup.stats()
+    }
@@ -1,23 +1,112 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException
-from typing import List, Optional
-import tempfile
-import os
-import shutil
+from fastapi import APIRouter, UploadFile, File, HTTPException, Query
+from typing import Dict, List, Literal, Optional
+import asyncio
+import time
 from pydantic import BaseModel
 
+from src.config.settings import (
+    INGEST_BATCH_CONCURRENCY,
+    INGEST_MAX_CONCURRENCY,
+    INGEST_MODE,
+    INGEST_JOB_SPOOL_DIR
+)
 from src.data_Ingestion.agent import DataIngestionAgent
+from src.utils.job_queue import get_job_queue
+from src.utils.document_index import get_document_index
+from src.utils.uploads import spool_upload, SpooledUpload, UploadTooLargeError
 
 router = APIRouter(prefix="/ingest", tags=["ingestion"])
 
+# Process-wide limit on documents being ingested at once
+_ingest_semaphore = asyncio.Semaphore(INGEST_MAX_CONCURRENCY)
+
 class ProcessResponse(BaseModel):
     status: str
     summary: str
     file_processed: str
+    error: Optional[str] = None
+    elapsed_ms: Optional[float] = None
+    mode: Optional[str] = None
+    timings: Optional[Dict[str, float]] = None
+    content_sha256: Optional[str] = None
+    duplicate: bool = False
+    conversion: Optional[str] = None  # "local" or "markitdown"
+
+class JobSubmitResponse(BaseModel):
+    job_id: str
+    status: str
+    file_processed: str
+    content_sha256: Optional[str] = None
+
+class JobStatusResponse(BaseModel):
+    job_id: str
+    status: str  # "queued", "running", "succeeded" or "failed"
+    phase: Optional[str] = None
+    file_processed: str
+    model: str
+    mode: str
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    timings: Optional[Dict[str, float]] = None
+    summary: Optional[str] = None
+    error: Optional[str] = None
+
+class IndexEntry(BaseModel):
+    sha256: str
+    filename: Optional[str] = None
+    model: str
+    episodes: List[str]
+    summary: Optional[str] = None
+    ingested_at: float
+
+class IndexListResponse(BaseModel):
+    total: int
+    entries: List[IndexEntry]
+
+IngestMode = Literal["sequential", "pipeline", "single_pass"]
+
+async def _lookup_duplicate(
+    upload: SpooledUpload,
+    filename: str,
+    mode: str,
+    start: float
+) -> Optional[ProcessResponse]:
+    """Answer an upload whose content is already in the document index.
+    
+    Checked before taking an ingestion slot or building an agent, so
+    re-uploads return at once even while ingestion is saturated.
+    
+    Args:
+        upload: Spooled upload to look up
+        filename: Original name of the uploaded file
+        mode: Requested ingestion mode
+        start: perf_counter() value when the request started
+        
+    Returns:
+        Response for the cached ingestion, or None if the content is new
+    """
+    entry = await asyncio.to_thread(get_document_index().lookup, upload.sha256)
+    if entry is None:
+        return None
+    elapsed_ms = round((time.perf_counter() - start) * 1000, 1)
+    return ProcessResponse(
+        status="success",
+        summary=entry["summary"],
+        file_processed=filename,
+        elapsed_ms=elapsed_ms,
+        mode=mode,
+        timings={"total": elapsed_ms},
+        content_sha256=upload.sha256,
+        duplicate=True
+    )
 
 @router.post("/document", response_model=ProcessResponse)
 async def ingest_document(
     file: UploadFile = File(...),
-    model: Optional[str] = None
+    model: Optional[str] = None,
+    mode: IngestMode = INGEST_MODE,
+    force: bool = False
 ) -> ProcessResponse:
     """
     Ingest a single document into the knowledge graph.
@@ -25,78 +114,268 @@ async def ingest_document(
     Args:
         file: The document file to process
         model: Optional LLM model to use
+        mode: Ingestion mode (sequential, pipeline, or single_pass)
+        force: Ingest again even if the same content was already ingested
+    """
+    start = time.perf_counter()
+    upload = None
+    agent = None
+    try:
+        # Save uploaded file
+        upload = await spool_upload(file)
+        
+        if not force:
+            duplicate = await _lookup_duplicate(upload, file.filename, mode, start)
+            if duplicate is not None:
+                return duplicate
+        
+        # Process document
+        agent = DataIngestionAgent(model_name=model) if model else DataIngestionAgent()
+        async with _ingest_semaphore:
+            result = await agent.process_document(
+                upload.path,
+                mode=mode,
+                content_hash=upload.sha256,
+                filename=file.filename,
+                force=force
+            )
+        
+        if result["status"] == "error":
+            raise HTTPException(status_code=500, detail=result["error"])
+            
+        return ProcessResponse(
+            status=result["status"],
+            summary=result["summary"],
+            file_processed=file.filename,
+            mode=result["mode"],
+            timings=result["timings"],
+            content_sha256=upload.sha256,
+            duplicate=result["duplicate"],
+            conversion=result.get("conversion")
+        )
+        
+    except HTTPException:
+        raise
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+        
+    finally:
+        await file.close()
+        # Cleanup temp file
+        if upload:
+            upload.remove()
+        if agent:
+            await agent.close()
+
+async def _ingest_upload(
+    agent: DataIngestionAgent,
+    file: UploadFile,
+    semaphore: asyncio.Semaphore,
+    mode: str,
+    force: bool = False
+) -> ProcessResponse:
+    """Ingest one file of a batch, reporting failures instead of raising.
+    
+    Args:
+        agent: Shared ingestion agent
+        file: Uploaded file to process
+        semaphore: Per-request concurrency limit
+        mode: Ingestion mode passed to process_document
+        force: Ingest again even if the same content was already ingested
     """
-    # Create temporary file to store upload
-    with tempfile.NamedTemporaryFile(delete=False) as temp_file:
+    async with semaphore:
+        start = time.perf_counter()
+        upload = None
         try:
             # Save uploaded file
-            shutil.copyfileobj(file.file, temp_file)
-            temp_path = temp_file.name
+            upload = await spool_upload(file)
             
-            # Process document
-            agent = DataIngestionAgent(model_name=model) if model else DataIngestionAgent()
-            result = await agent.process_document(temp_path)
+            if not force:
+                duplicate = await _lookup_duplicate(upload, file.filename, mode, start)
+                if duplicate is not None:
+                    return duplicate
             
-            if result["status"] == "error":
-                raise HTTPException(status_code=500, detail=result["error"])
-                
-            return ProcessResponse(
-                status=result["status"],
-                summary=result["summary"],
-                file_processed=file.filename
-            )
+            # Process document
+            async with _ingest_semaphore:
+                result = await agent.process_document(
+                    upload.path,
+                    mode=mode,
+                    content_hash=upload.sha256,
+                    filename=file.filename,
+                    force=force
+                )
             
         except Exception as e:
-            raise HTTPException(status_code=500, detail=str(e))
+            result = {"status": "error", "error": str(e)}
             
         finally:
             await file.close()
             # Cleanup temp file
-            if os.path.exists(temp_path):
-                os.unlink(temp_path)
-            await agent.close()
+            if upload:
+                upload.remove()
+        
+        return ProcessResponse(
+            status=result["status"],
+            summary=result.get("summary", ""),
+            file_processed=file.filename,
+            error=result.get("error"),
+            elapsed_ms=round((time.perf_counter() - start) * 1000, 1),
+            mode=mode,
+            timings=result.get("timings"),
+            content_sha256=upload.sha256 if upload else None,
+            duplicate=result.get("duplicate", False),
+            conversion=result.get("conversion")
+        )
 
 @router.post("/batch", response_model=List[ProcessResponse])
 async def ingest_batch(
     files: List[UploadFile] = File(...),
-    model: Optional[str] = None
+    model: Optional[str] = None,
+    concurrency: int = Query(INGEST_BATCH_CONCURRENCY, ge=1),
+    mode: IngestMode = INGEST_MODE,
+    force: bool = False
 ) -> List[ProcessResponse]:
     """
     Batch ingest multiple documents into the knowledge graph.
     
+    Files are processed concurrently, bounded by ``concurrency`` for this request
+    and by INGEST_MAX_CONCURRENCY across the process. Results are returned in
+    input order; a failed file is reported with status "error" and does not
+    stop the others.
+    
     Args:
         files: List of document files to process
         model: Optional LLM model to use
+        concurrency: Maximum number of files processed at once for this request
+        mode: Ingestion mode (sequential, pipeline, or single_pass)
+        force: Ingest again even if the same content was already ingested
     """
     agent = DataIngestionAgent(model_name=model) if model else DataIngestionAgent()
-    responses = []
+    semaphore = asyncio.Semaphore(concurrency)
     
     try:
-        for file in files:
-            with tempfile.NamedTemporaryFile(delete=False) as temp_file:
-                try:
-                    # Save uploaded file
-                    shutil.copyfileobj(file.file, temp_file)
-                    temp_path = temp_file.name
-                    
-                    # Process document
-                    result = await agent.process_document(temp_path)
-                    
-                    responses.append(
-                        ProcessResponse(
-                            status=result["status"],
-                            summary=result["summary"],
-                            file_processed=file.filename
-                        )
-                    )
-                    
-                finally:
-                    await file.close()
-                    # Cleanup temp file
-                    if os.path.exists(temp_path):
-                        os.unlink(temp_path)
-                        
+        return await asyncio.gather(
+            *(_ingest_upload(agent, file, semaphore, mode, force) for file in files)
+        )
     finally:
         await agent.close()
-        
-    return responses 
\ No newline at end of file
+
+@router.post("/jobs", response_model=JobSubmitResponse, status_code=202)
+async def submit_ingestion_job(
+    file: UploadFile = File(...),
+    model: Optional[str] = None,
+    mode: IngestMode = INGEST_MODE,
+    force: bool = False
+) -> JobSubmitResponse:
+    """
+    Queue a document for background ingestion and return immediately.
+    
+    Args:
+        file: The document file to process
+        model: Optional LLM model to use
+        mode: Ingestion mode (sequential, pipeline, or single_pass)
+        force: Ingest again even if the same content was already ingested
+    """
+    queue = get_job_queue()
+    await queue.start()
+    
+    try:
+        upload = await spool_upload(file, directory=INGEST_JOB_SPOOL_DIR)
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    finally:
+        await file.close()
+    
+    try:
+        job_id = await asyncio.to_thread(
+            queue.enqueue,
+            upload.path,
+            file.filename,
+            model=model,
+            mode=mode,
+            content_hash=upload.sha256,
+            force=force
+        )
+    except BaseException:
+        # No job owns the spooled file, so nothing else would delete it
+        upload.remove()
+        raise
+    return JobSubmitResponse(
+        job_id=job_id,
+        status="queued",
+        file_processed=file.filename,
+        content_sha256=upload.sha256
+    )
+
+@router.get("/jobs/{job_id}", response_model=JobStatusResponse)
+async def get_ingestion_job(job_id: str) -> JobStatusResponse:
+    """
+    Get the status, current phase and timings of a background ingestion job.
+    
+    Args:
+        job_id: ID returned by POST /ingest/jobs
+    """
+    job = await asyncio.to_thread(get_job_queue().get_job, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+    
+    return JobStatusResponse(
+        job_id=job["id"],
+        status=job["status"],
+        phase=job["phase"],
+        file_processed=job["filename"],
+        model=job["model"],
+        mode=job["mode"],
+        created_at=job["created_at"],
+        started_at=job["started_at"],
+        finished_at=job["finished_at"],
+        timings=job["timings"],
+        summary=job["summary"],
+        error=job["error"]
+    )
+
+@router.get("/index", response_model=IndexListResponse)
+async def list_ingested_documents(
+    limit: int = Query(100, ge=1, le=1000),
+    offset: int = Query(0, ge=0)
+) -> IndexListResponse:
+    """
+    List documents in the content-hash deduplication index, newest first.
+    
+    Args:
+        limit: Maximum number of entries to return
+        offset: Number of entries to skip
+    """
+    index = get_document_index()
+    total = await asyncio.to_thread(index.count)
+    entries = await asyncio.to_thread(index.list_entries, limit, offset)
+    return IndexListResponse(
+        total=total,
+        entries=[IndexEntry(**entry) for entry in entries]
+    )
+
+@router.delete("/index/{sha256}")
+async def purge_ingested_document(sha256: str) -> dict:
+    """
+    Remove one document from the deduplication index so it can be ingested again.
+    
+    Episodes already stored in the knowledge graph are not deleted.
+    
+    Args:
+        sha256: Content hash of the document
+    """
+    if not await asyncio.to_thread(get_document_index().purge, sha256):
+        raise HTTPException(status_code=404, detail=f"Unknown document: {sha256}")
+    return {"status": "success", "purged": 1}
+
+@router.delete("/index")
+async def purge_document_index() -> dict:
+    """
+    Remove every document from the deduplication index.
+    
+    Episodes already stored in the knowledge graph are not deleted.
+    """
+    purged = await asyncio.to_thread(get_document_index().purge)
+    return {"status": "success", "purged": purged}
@@ -5,20 +5,41 @@ from uuid import uuid4
 from pydantic import BaseModel
 import json
 
+from src.config.settings import (
+    DEFAULT_MODEL,
+    ALLOWED_MODELS,
+    STREAM_COALESCE_BYTES,
+    STREAM_COALESCE_MS,
+    SEARCH_BATCH_CONCURRENCY
+)
 from src.data_retrive.agent import DataRetrievalAgent
+from src.utils.answer_cache import get_answer_cache
+from src.utils.single_flight import get_single_flight
+from src.utils.prompt_stats import get_prompt_stats
+from src.utils.session_manager import get_session_manager
+from src.utils.answer_parser import parse_answer
 from src.models.search import SearchResponse, Citation, StreamingSearchResponse
 
 router = APIRouter(prefix="/retrieve", tags=["retrieval"])
 
-# Keep a single instance of the agent for the entire service
-_agent: Optional[DataRetrievalAgent] = None
+# Keep a single agent instance per model for the entire service
+_agents: Dict[str, DataRetrievalAgent] = {}
 
 async def get_agent(model: Optional[str] = None) -> DataRetrievalAgent:
-    """Get or create the DataRetrievalAgent instance."""
-    global _agent
-    if _agent is None:
-        _agent = DataRetrievalAgent(model_name=model) if model else DataRetrievalAgent()
-    return _agent
+    """Get or create the DataRetrievalAgent instance for a model.
+    
+    Only models in ALLOWED_MODELS are accepted, so clients cannot grow the
+    set of agents (and shared chat clients) without bound.
+    """
+    model_name = model or DEFAULT_MODEL
+    if model_name not in ALLOWED_MODELS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported model: {model_name}. Must be one of {', '.join(ALLOWED_MODELS)}"
+        )
+    if model_name not in _agents:
+        _agents[model_name] = DataRetrievalAgent(model_name=model_name)
+    return _agents[model_name]
 
 def get_or_create_session_id(x_session_id: Optional[str] = Header(None)) -> str:
     """Get existing session ID from header or create new one."""
@@ -30,7 +51,10 @@ async def stream_search_generator(
     doc_types: Optional[List[str]] = None,
     include_relationships: bool = False,
     search_type: str = "focused",
-    session_id: str = None
+    session_id: str = None,
+    coalesce_bytes: int = STREAM_COALESCE_BYTES,
+    coalesce_ms: float = STREAM_COALESCE_MS,
+    store_session: bool = True
 ) -> AsyncGenerator[str, None]:
     """Generate streaming search results.
     
@@ -41,13 +65,19 @@ async def stream_search_generator(
         include_relationships: Whether to include relationships
         search_type: Type of search to perform
         session_id: Session ID for conversation context
+        coalesce_bytes: Maximum bytes of tokens merged into one frame (0 disables)
+        coalesce_ms: Time window in milliseconds for merging tokens (0 disables)
+        store_session: Whether to store the session's conversation memory
     """
     async for chunk in agent.stream_search_knowledge(
         query=query,
         doc_types=doc_types,
         include_relationships=include_relationships,
         search_type=search_type,
-        session_id=session_id
+        session_id=session_id,
+        coalesce_bytes=coalesce_bytes,
+        coalesce_ms=coalesce_ms,
+        store_session=store_session
     ):
         # Convert the chunk to JSON and yield
         yield json.dumps(chunk.dict()) + "\n"
@@ -57,8 +87,10 @@ async def stream_search(
     query: str,
     doc_types: Optional[List[str]] = Query(None),
     include_relationships: bool = False,
-    search_type: Literal["focused", "detailed", "timeline"] = "focused",
+    search_type: Literal["focused", "detailed", "timeline", "direct"] = "focused",
     model: Optional[str] = None,
+    coalesce_bytes: int = Query(STREAM_COALESCE_BYTES, ge=0),
+    coalesce_ms: float = Query(STREAM_COALESCE_MS, ge=0),
     x_session_id: Optional[str] = Header(None)
 ) -> StreamingResponse:
     """
@@ -68,15 +100,17 @@ async def stream_search(
         query: Search query string
         doc_types: Optional list of document types to filter by
         include_relationships: Whether to include document relationships
-        search_type: Type of search to perform (focused, detailed, or timeline)
+        search_type: Type of search to perform (focused, detailed, timeline, or direct)
         model: Optional LLM model to use
+        coalesce_bytes: Merge tokens into frames of up to this many bytes (0 sends one frame per token)
+        coalesce_ms: Merge tokens arriving within this many milliseconds into one frame (e.g. 20)
         x_session_id: Optional session ID header
         
     Returns:
         Streaming response with JSON lines format
     """
+    agent = await get_agent(model)
     try:
-        agent = await get_agent(model)
         session_id = get_or_create_session_id(x_session_id)
         
         return StreamingResponse(
@@ -86,7 +120,11 @@ async def stream_search(
                 doc_types=doc_types,
                 include_relationships=include_relationships,
                 search_type=search_type,
-                session_id=session_id
+                session_id=session_id,
+                coalesce_bytes=coalesce_bytes,
+                coalesce_ms=coalesce_ms,
+                # Requests without a session header get no stored session
+                store_session=x_session_id is not None
             ),
             media_type="application/x-ndjson"  # Newline-delimited JSON
         )
@@ -99,7 +137,7 @@ async def search_knowledge(
     query: str,
     doc_types: Optional[List[str]] = Query(None),
     include_relationships: bool = False,
-    search_type: Literal["focused", "detailed", "timeline"] = "focused",
+    search_type: Literal["focused", "detailed", "timeline", "direct"] = "focused",
     model: Optional[str] = None,
     x_session_id: Optional[str] = Header(None)
 ) -> SearchResponse:
@@ -110,12 +148,12 @@ async def search_knowledge(
         query: Search query string
         doc_types: Optional list of document types to filter by
         include_relationships: Whether to include document relationships
-        search_type: Type of search to perform (focused, detailed, or timeline)
+        search_type: Type of search to perform (focused, detailed, timeline, or direct)
         model: Optional LLM model to use
         x_session_id: Optional session ID header
     """
+    agent = await get_agent(model)
     try:
-        agent = await get_agent(model)
         session_id = get_or_create_session_id(x_session_id)
         
         result = await agent.search_knowledge(
@@ -123,15 +161,14 @@ async def search_knowledge(
             doc_types=doc_types,
             include_relationships=include_relationships,
             search_type=search_type,
-            session_id=session_id
+            session_id=session_id,
+            store_session=x_session_id is not None
         )
         
         if result["status"] == "error":
             raise HTTPException(status_code=500, detail=result["error"])
         
-        # Parse the response to extract answer and citations
-        response = result["summary"].split("\nSource:", 1)
-        answer = response[0].replace("Answer:", "").strip()
+        answer, citations = parse_answer(result["summary"])
         
         # If no answer found, provide a clear message
         if not answer or answer == "No results found":
@@ -144,25 +181,15 @@ async def search_knowledge(
                 search_type=search_type
             )
         
-        # Extract citations
-        citations = []
-        if len(response) > 1:
-            citation_text = response[1].strip()
-            # Parse citation in format [Document Name | Date | Section]
-            citation_parts = citation_text.strip("[]").split("|")
-            citations.append(Citation(
-                document=citation_parts[0].strip(),
-                date=citation_parts[1].strip() if len(citation_parts) > 1 else None,
-                section=citation_parts[2].strip() if len(citation_parts) > 2 else None
-            ))
-        
         return SearchResponse(
             status=result["status"],
             answer=answer,
-            citations=citations,
+            citations=[Citation(**citation) for citation in citations],
             query=query,
             doc_types=doc_types,
-            search_type=search_type
+            search_type=search_type,
+            cached=result.get("cached", False),
+            intent=result.get("intent")
         )
         
     except Exception as e:
@@ -202,66 +229,97 @@ async def clear_conversation_history(
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/cache/stats")
+async def get_answer_cache_stats() -> dict:
+    """Get answer cache, single-flight and prompt prefix cache statistics."""
+    return {
+        "status": "success",
+        "cache": get_answer_cache().stats(),
+        "single_flight": get_single_flight().stats(),
+        "prompts": get_prompt_stats().stats()
+    }
+
+@router.get("/sessions/stats")
+async def get_session_stats() -> dict:
+    """Get the stored session count, approximate memory use and eviction counters."""
+    return {
+        "status": "success",
+        "sessions": get_session_manager().stats()
+    }
+
 @router.get("/search/batch", response_model=List[SearchResponse])
 async def batch_search(
     queries: List[str] = Query(...),
     doc_types: Optional[List[str]] = Query(None),
     include_relationships: bool = False,
-    search_type: Literal["focused", "detailed", "timeline"] = "focused",
+    search_type: Literal["focused", "detailed", "timeline", "direct"] = "focused",
     model: Optional[str] = None,
+    concurrency: int = Query(SEARCH_BATCH_CONCURRENCY, ge=1),
+    shared_context: bool = False,
     x_session_id: Optional[str] = Header(None)
 ) -> List[SearchResponse]:
     """
     Perform multiple searches in the knowledge graph.
     
+    Queries run concurrently and each sees the conversation history as it was
+    before the batch. A failed query is reported in its own result without
+    affecting the others. Set shared_context to run them one after another,
+    each seeing the answers to the previous ones.
+    
     Args:
         queries: List of search queries
         doc_types: Optional list of document types to filter by
         include_relationships: Whether to include document relationships
-        search_type: Type of search to perform (focused, detailed, or timeline)
+        search_type: Type of search to perform (focused, detailed, timeline, or direct)
         model: Optional LLM model to use
+        concurrency: Maximum number of queries running at once
+        shared_context: Run queries sequentially with shared conversation context
         x_session_id: Optional session ID header
     """
     agent = await get_agent(model)
     session_id = get_or_create_session_id(x_session_id)
-    responses = []
+    results = await agent.batch_search_knowledge(
+        queries=queries,
+        doc_types=doc_types,
+        include_relationships=include_relationships,
+        search_type=search_type,
+        session_id=session_id,
+        concurrency=concurrency,
+        shared_context=shared_context,
+        store_session=x_session_id is not None
+    )
     
-    try:
-        for query in queries:
-            result = await agent.search_knowledge(
-                query=query,
-                doc_types=doc_types,
-                include_relationships=include_relationships,
-                search_type=search_type,
-                session_id=session_id
-            )
-            
-            # Parse the response to extract answer and citations
-            response = result["summary"].split("\nSource:", 1)
-            answer = response[0].replace("Answer:", "").strip()
-            
-            # Extract citations
-            citations = []
-            if len(response) > 1:
-                citation_text = response[1].strip()
-                # Parse citation in format [Document Name | Date | Section]
-                citation_parts = citation_text.strip("[]").split("|")
-                citations.append(Citation(
-                    document=citation_parts[0].strip(),
-                    date=citation_parts[1].strip() if len(citation_parts) > 1 else None,
-                    section=citation_parts[2].strip() if len(citation_parts) > 2 else None
-                ))
-            
+    responses = []
+    for query, result in zip(queries, results):
+        if result["status"] != "success":
             responses.append(
                 SearchResponse(
-                    status=result["status"],
-                    answer=answer,
-                    citations=citations,
-                    query=result["query"],
-                    doc_types=result.get("doc_types"),
-                    search_type=result.get("search_type", "focused")
+                    status="error",
+                    answer="",
+                    citations=[],
+                    query=query,
+                    doc_types=doc_types,
+                    search_type=search_type,
+                    error=result.get("error"),
+                    latency_ms=result.get("latency_ms")
                 )
             )
-            
-    finally:
-        return responses 
\ No newline at end of file
+            continue
+        
+        answer, citations = parse_answer(result["summary"])
+        
+        responses.append(
+            SearchResponse(
+                status=result["status"],
+                answer=answer,
+                citations=[Citation(**citation) for citation in citations],
+                query=result["query"],
+                doc_types=result.get("doc_types"),
+                search_type=result.get("search_type", "focused"),
+                cached=result.get("cached", False),
+                latency_ms=result.get("latency_ms"),
+                intent=result.get("intent")
+            )
+        )
+    
+    return responses
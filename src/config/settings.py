@@ -7,10 +7,68 @@ load_dotenv()
 # OpenAI Configuration
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 DEFAULT_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+# Models clients may request with ?model=; anything else is rejected
+ALLOWED_MODELS = [DEFAULT_MODEL] + [
+    m.strip() for m in os.getenv("ALLOWED_MODELS", "").split(",")
+    if m.strip() and m.strip() != DEFAULT_MODEL
+]
+
+# Server Configuration
+# SERVER_MODE=prod (or `python main.py --prod`) runs several worker processes
+# without the reloader, using uvloop/httptools when they are installed.
+SERVER_MODE = os.getenv("SERVER_MODE", "dev")
+SERVER_HOST = os.getenv("SERVER_HOST", "0.0.0.0")
+SERVER_PORT = int(os.getenv("SERVER_PORT", "8080"))
+SERVER_WORKERS = int(os.getenv("SERVER_WORKERS", "0"))  # prod only; 0 uses one per available CPU
+SERVER_KEEP_ALIVE = int(os.getenv("SERVER_KEEP_ALIVE", "65"))  # prod only; above typical load balancer idle timeouts
+SERVER_BACKLOG = int(os.getenv("SERVER_BACKLOG", "4096"))  # prod only
+SERVER_ACCESS_LOG = os.getenv("SERVER_ACCESS_LOG", "false").lower() == "true"  # prod only
+
+# Startup Warmup Configuration
+# At startup the app imports the LLM stack, connects the MCP pool and compiles
+# the agents for WARMUP_MODELS (comma-separated, defaults to OPENAI_MODEL) in
+# the background; /readyz reports ready only once that has finished.
+WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "true").lower() == "true"
+WARMUP_MODELS = [m.strip() for m in os.getenv("WARMUP_MODELS", "").split(",") if m.strip()]
+WARMUP_RETRY_INTERVAL = float(os.getenv("WARMUP_RETRY_INTERVAL", "5"))
 
 # Memory Configuration
 CONVERSATION_MEMORY_SIZE = int(os.getenv("CONVERSATION_MEMORY_SIZE", "10"))
 
+# Session Configuration
+SESSION_TTL = float(os.getenv("SESSION_TTL", "3600"))  # idle seconds before a session expires
+SESSION_MAX = int(os.getenv("SESSION_MAX", "10000"))  # least recently used sessions are evicted beyond this
+SESSION_SWEEP_INTERVAL = float(os.getenv("SESSION_SWEEP_INTERVAL", "60"))
+# Session store backend: "memory" keeps sessions in each worker process;
+# "sqlite" shares them between the workers on one host through a WAL database,
+# writing new interactions in batches.
+SESSION_STORE = os.getenv("SESSION_STORE", "memory")
+SESSION_DB = os.getenv("SESSION_DB", ".ingest/sessions.sqlite3")
+SESSION_STORE_BATCH_SIZE = int(os.getenv("SESSION_STORE_BATCH_SIZE", "32"))  # pending writes that force a flush
+SESSION_STORE_FLUSH_INTERVAL = float(os.getenv("SESSION_STORE_FLUSH_INTERVAL", "0.05"))
+SESSION_STORE_TIMEOUT = float(os.getenv("SESSION_STORE_TIMEOUT", "0.5"))  # seconds to wait for a locked database
+
+# History Token Budget Configuration
+# History injected into a prompt is packed newest-first into a token budget per
+# search type (0 disables the budget and keeps the whole window). Each turn is
+# truncated to HISTORY_MAX_TURN_TOKENS first so one long answer cannot crowd
+# out the rest. HISTORY_TOKENIZER is a tiktoken encoding name, or "estimate"
+# to count about four characters per token without tiktoken. The encoding is
+# loaded at startup; if that fails (e.g. offline without TIKTOKEN_CACHE_DIR),
+# counts fall back to the estimate with a warning.
+HISTORY_TOKENIZER = os.getenv("HISTORY_TOKENIZER", "cl100k_base")
+HISTORY_MAX_TURN_TOKENS = int(os.getenv("HISTORY_MAX_TURN_TOKENS", "300"))
+HISTORY_TOKEN_BUDGET = int(os.getenv("HISTORY_TOKEN_BUDGET", "1000"))
+HISTORY_TOKEN_BUDGETS = {
+    search_type: int(os.getenv(f"HISTORY_TOKEN_BUDGET_{search_type.upper()}", str(default)))
+    for search_type, default in {
+        "focused": 600,
+        "direct": 600,
+        "detailed": 1500,
+        "timeline": 1000
+    }.items()
+}
+
 # Server Configuration
 GRAPHITI_SERVER = {
     "url": os.getenv("GRAPHITI_SERVER_URL", "http://localhost:8000/sse"),
@@ -20,4 +78,81 @@ GRAPHITI_SERVER = {
 MARKITDOWN_SERVER = {
     "url": os.getenv("MARKITDOWN_SERVER_URL", "http://127.0.0.1:3001/sse"),
     "transport": "sse"
-} 
\ No newline at end of file
+} 
+
+# MCP Connection Pool Configuration
+MCP_POOL_SIZE = int(os.getenv("MCP_POOL_SIZE", "2"))
+MCP_CONNECT_TIMEOUT = float(os.getenv("MCP_CONNECT_TIMEOUT", "30"))
+MCP_HEALTH_CHECK_INTERVAL = float(os.getenv("MCP_HEALTH_CHECK_INTERVAL", "30"))
+# Read-only tools that may be retried on another connection after a failed call;
+# writes such as add_episode are never retried, since the server may already have
+# applied them before the connection broke
+MCP_RETRY_TOOLS = frozenset(
+    name.strip() for name in os.getenv(
+        "MCP_RETRY_TOOLS", "search_nodes,search_facts,get_episodes,convert_to_markdown"
+    ).split(",") if name.strip()
+)
+
+# Agent Cache Configuration
+AGENT_CACHE_SIZE = int(os.getenv("AGENT_CACHE_SIZE", "16"))
+
+# Streaming Configuration (0 disables coalescing and sends one frame per token)
+STREAM_COALESCE_BYTES = int(os.getenv("STREAM_COALESCE_BYTES", "0"))
+STREAM_COALESCE_MS = float(os.getenv("STREAM_COALESCE_MS", "0"))
+
+# Ingestion Concurrency Configuration
+INGEST_BATCH_CONCURRENCY = int(os.getenv("INGEST_BATCH_CONCURRENCY", "4"))  # per /ingest/batch request
+INGEST_MAX_CONCURRENCY = int(os.getenv("INGEST_MAX_CONCURRENCY", "8"))  # across the whole process
+
+# Ingestion Pipeline Configuration
+# "sequential" runs processing, metadata and relationships one after another
+# (the original behaviour); "pipeline" runs metadata and relationships
+# concurrently; "single_pass" does all three in one agent run
+INGEST_MODES = ("sequential", "pipeline", "single_pass")
+INGEST_MODE = os.getenv("INGEST_MODE", "sequential")
+if INGEST_MODE not in INGEST_MODES:
+    raise ValueError(f"INGEST_MODE must be one of {', '.join(INGEST_MODES)}, got {INGEST_MODE!r}")
+
+# Ingestion Job Queue Configuration
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "2"))
+INGEST_JOB_DB = os.getenv("INGEST_JOB_DB", ".ingest/jobs.sqlite3")
+INGEST_JOB_SPOOL_DIR = os.getenv("INGEST_JOB_SPOOL_DIR", ".ingest/spool")
+INGEST_JOB_POLL_INTERVAL = float(os.getenv("INGEST_JOB_POLL_INTERVAL", "5"))
+INGEST_JOB_DB_TIMEOUT = float(os.getenv("INGEST_JOB_DB_TIMEOUT", "0.5"))  # seconds to wait for a locked database
+
+# Upload Configuration
+INGEST_MAX_UPLOAD_BYTES = int(os.getenv("INGEST_MAX_UPLOAD_BYTES", str(50 * 1024 * 1024)))
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(1024 * 1024)))
+MULTIPART_OVERHEAD_BYTES = int(os.getenv("MULTIPART_OVERHEAD_BYTES", str(64 * 1024)))  # allowance over INGEST_MAX_UPLOAD_BYTES in a Content-Length
+
+# Ingestion Deduplication Configuration
+INGEST_INDEX_DB = os.getenv("INGEST_INDEX_DB", ".ingest/index.sqlite3")
+
+# Text documents up to this size are read locally instead of through MarkItDown
+LOCAL_TEXT_MAX_BYTES = int(os.getenv("LOCAL_TEXT_MAX_BYTES", str(256 * 1024)))
+
+# Answer Cache Configuration
+ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "true").lower() == "true"
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "1024"))
+ANSWER_CACHE_TTL = float(os.getenv("ANSWER_CACHE_TTL", "600"))  # seconds
+ANSWER_CACHE_GENERATION_REFRESH = float(os.getenv("ANSWER_CACHE_GENERATION_REFRESH", "1"))  # seconds between reads of the shared generation
+# By default answers are only cached for sessions without prior history, since
+# the history is part of the prompt; set to true to share answers regardless
+ANSWER_CACHE_IGNORE_HISTORY = os.getenv("ANSWER_CACHE_IGNORE_HISTORY", "false").lower() == "true"
+
+# Search Batch Configuration
+SEARCH_BATCH_CONCURRENCY = int(os.getenv("SEARCH_BATCH_CONCURRENCY", "4"))
+
+# Single-flight Configuration (share one run between identical concurrent searches)
+SINGLE_FLIGHT_ENABLED = os.getenv("SINGLE_FLIGHT_ENABLED", "true").lower() == "true"
+
+# Answer greetings, thanks and empty queries from templates without the agent
+INTENT_FAST_PATH_ENABLED = os.getenv("INTENT_FAST_PATH_ENABLED", "true").lower() == "true"
+
+# Direct Search Configuration (search_type="direct": retrieve, then one LLM call)
+DIRECT_SEARCH_MAX_NODES = int(os.getenv("DIRECT_SEARCH_MAX_NODES", "10"))
+DIRECT_SEARCH_MAX_FACTS = int(os.getenv("DIRECT_SEARCH_MAX_FACTS", "10"))
+# Detailed searches fan out their Graphiti calls concurrently and answer in one
+# LLM call; set to false to let the ReAct agent make the calls turn by turn
+DETAILED_SEARCH_FAN_OUT = os.getenv("DETAILED_SEARCH_FAN_OUT", "true").lower() == "true"
+DETAILED_SEARCH_MAX_EPISODES = int(os.getenv("DETAILED_SEARCH_MAX_EPISODES", "10"))
@@ -1,103 +1,266 @@
+import asyncio
 import mimetypes
-import pathlib
-from typing import Dict, Any, Optional
+import os
+import time
+from typing import Dict, Any, Optional, Callable, List
 
-from langchain_openai import ChatOpenAI
 from langchain_core.messages import HumanMessage, AIMessage
-from langgraph.prebuilt import create_react_agent
 
-from src.config.settings import OPENAI_API_KEY, DEFAULT_MODEL
-from src.utils.mcp_client import setup_mcp_client, cleanup_mcp_client
+from src.config.settings import DEFAULT_MODEL, INGEST_MODE, INGEST_MODES, LOCAL_TEXT_MAX_BYTES
+from src.utils.mcp_client import get_mcp_pool
+from src.utils.agent_cache import get_compiled_agent
+from src.utils.document_index import get_document_index, hash_file
+from src.utils.answer_cache import get_answer_cache
 from src.prompts.ingestion_prompts import IngestionPrompts
 
+# MIME types read and normalized locally instead of converted by MarkItDown
+TEXT_NATIVE_MIME_TYPES = {
+    "text/plain",
+    "text/markdown",
+    "text/x-markdown",
+    "text/csv",
+    "text/x-rst",
+    "text/prs.fallenstein.rst",
+    "application/json"
+}
+
+def _is_text_native(mime_type: Optional[str]) -> bool:
+    """Check whether a document can be ingested without MarkItDown."""
+    return mime_type in TEXT_NATIVE_MIME_TYPES
+
+def _read_text_document(file_path: str) -> str:
+    """Read a text document and normalize its encoding and whitespace."""
+    with open(file_path, "rb") as f:
+        raw = f.read()
+    text = raw.decode("utf-8-sig", errors="replace")
+    text = text.replace("\r\n", "\n").replace("\r", "\n")
+    lines = [line.rstrip() for line in text.split("\n")]
+    # Collapse runs of blank lines into one
+    normalized = []
+    for line in lines:
+        if line or (normalized and normalized[-1]):
+            normalized.append(line)
+    return "\n".join(normalized).strip()
+
+def _stored_episodes(state: Dict[str, Any]) -> List[str]:
+    """Get the IDs (or names, when no ID was given) of episodes stored during an agent run."""
+    episodes = []
+    for msg in state["messages"]:
+        if isinstance(msg, AIMessage):
+            for call in msg.tool_calls:
+                if call["name"] == "add_episode":
+                    episode = call["args"].get("uuid") or call["args"].get("name")
+                    if episode:
+                        episodes.append(episode)
+    return episodes
+
 class DataIngestionAgent:
     """Agent responsible for processing and ingesting documents into the knowledge graph."""
     
     def __init__(self, model_name: str = DEFAULT_MODEL):
         self.model_name = model_name
-        self.llm = None
         self.agent = None
-        self.mcp_client = None
+        self.mcp_pool = None
         self.prompts = IngestionPrompts()
     
     async def setup(self):
         """Initialize the agent with required tools and configurations."""
-        self.llm = ChatOpenAI(model=self.model_name, api_key=OPENAI_API_KEY)
-        
         try:
-            self.mcp_client = await setup_mcp_client()
-            mcp_tools = self.mcp_client.get_tools()
+            self.mcp_pool = await get_mcp_pool()
             
             # Use base document processing prompt by default
-            self.agent = create_react_agent(
-                self.llm,
-                mcp_tools,
+            self.agent = await get_compiled_agent(
+                self.model_name,
+                self.mcp_pool.get_tools(),
                 prompt=self.prompts.get_document_processing_prompt("")  # Empty path, will be set per request
             )
             
         except Exception as e:
-            if self.mcp_client:
-                await cleanup_mcp_client(self.mcp_client)
             raise RuntimeError(f"Failed to setup ingestion agent: {str(e)}")
 
-    async def process_document(self, file_path: str) -> Dict[str, Any]:
+    async def _run_phase(
+        self,
+        prompt: str,
+        phase: str,
+        timings: Dict[str, float],
+        on_phase: Optional[Callable[[str], None]] = None
+    ) -> Dict[str, Any]:
+        """Run one agent pass and record its latency.
+        
+        Args:
+            prompt: Prompt for the agent run
+            phase: Name of the phase for the timings report
+            timings: Dict to record the elapsed milliseconds into
+            on_phase: Optional callback notified with the phase name when it starts
+            
+        Returns:
+            Final agent state
+        """
+        if on_phase:
+            on_phase(phase)
+        start = time.perf_counter()
+        try:
+            return await self.agent.ainvoke({
+                "messages": [HumanMessage(content=prompt)]
+            })
+        finally:
+            timings[phase] = round((time.perf_counter() - start) * 1000, 1)
+
+    async def process_document(
+        self,
+        file_path: str,
+        mode: str = INGEST_MODE,
+        on_phase: Optional[Callable[[str], None]] = None,
+        content_hash: Optional[str] = None,
+        filename: Optional[str] = None,
+        force: bool = False
+    ) -> Dict[str, Any]:
         """Process a document and store its information in the knowledge graph.
         
+        Documents whose content was already ingested are answered from the local
+        document index without running the agent, unless ``force`` is set.
+        
         Args:
             file_path: Path to the document to process
+            mode: How to run the processing, metadata and relationship phases:
+                "sequential" runs them one after another, "pipeline" runs metadata
+                and relationships concurrently once the episode is stored, and
+                "single_pass" does all three in one agent run
+            on_phase: Optional callback notified with each phase name as it starts
+            content_hash: SHA-256 of the file if already known (computed otherwise)
+            filename: Original name of the document for the index (defaults to the file name)
+            force: Ingest again even if the content is already in the index
             
         Returns:
-            Dict containing processing results and status
+            Dict containing processing results, status and per-phase timings
         """
+        if mode not in INGEST_MODES:
+            raise ValueError(f"Unknown ingestion mode: {mode}. Must be one of {', '.join(INGEST_MODES)}")
+        
+        start = time.perf_counter()
+        index = get_document_index()
+        if content_hash is None:
+            content_hash = await asyncio.to_thread(hash_file, file_path)
+        
+        if not force:
+            entry = await asyncio.to_thread(index.lookup, content_hash)
+            if entry is not None:
+                return {
+                    "status": "success",
+                    "summary": entry["summary"],
+                    "file_processed": file_path,
+                    "mode": mode,
+                    "timings": {"total": round((time.perf_counter() - start) * 1000, 1)},
+                    "duplicate": True,
+                    "episodes": entry["episodes"]
+                }
+        
         if not self.agent:
             await self.setup()
         
+        timings: Dict[str, float] = {}
+        
         try:
             mime_type, _ = mimetypes.guess_type(file_path)
-            file_ext = pathlib.Path(file_path).suffix.lower()
             
-            # Get appropriate processing prompt based on file type
-            process_prompt = self.prompts.get_document_processing_prompt(
-                file_path=file_path,
-                mime_type=mime_type
-            )
+            # Text-native documents are read here instead of through MarkItDown,
+            # saving a tool round trip and an LLM turn
+            content = None
+            if _is_text_native(mime_type) and os.path.getsize(file_path) <= LOCAL_TEXT_MAX_BYTES:
+                content = await asyncio.to_thread(_read_text_document, file_path)
             
-            result = await self.agent.ainvoke({
-                "messages": [HumanMessage(content=process_prompt)]
-            })
+            if mode == "single_pass":
+                result = await self._run_phase(
+                    self.prompts.get_single_pass_prompt(file_path, mime_type, content),
+                    "single_pass",
+                    timings,
+                    on_phase
+                )
+            else:
+                # Get appropriate processing prompt based on file type
+                process_prompt = self.prompts.get_document_processing_prompt(
+                    file_path=file_path,
+                    mime_type=mime_type,
+                    content=content
+                )
+                result = await self._run_phase(process_prompt, "processing", timings, on_phase)
+            
+            states = [result]
             
             # Extract the last AI message as the summary
             ai_messages = [msg for msg in result["messages"] if isinstance(msg, AIMessage)]
             summary = ai_messages[-1].content if ai_messages else "No summary available"
             
             # If document was processed successfully, extract metadata and establish relationships
-            if "error" not in result:
-                # Extract metadata
+            if mode != "single_pass" and "error" not in result:
                 metadata_prompt = self.prompts.get_metadata_extraction_prompt()
-                metadata_result = await self.agent.ainvoke({
-                    "messages": [HumanMessage(content=metadata_prompt)]
-                })
-                
-                # Establish relationships with other documents
                 relationship_prompt = self.prompts.get_relationship_prompt(file_path)
-                await self.agent.ainvoke({
-                    "messages": [HumanMessage(content=relationship_prompt)]
-                })
+                
+                if mode == "pipeline":
+                    # Both phases only depend on the stored episode, not on each other
+                    if on_phase:
+                        on_phase("metadata+relationships")
+                    states += await asyncio.gather(
+                        self._run_phase(metadata_prompt, "metadata", timings),
+                        self._run_phase(relationship_prompt, "relationships", timings)
+                    )
+                else:
+                    states.append(await self._run_phase(metadata_prompt, "metadata", timings, on_phase))
+                    states.append(await self._run_phase(relationship_prompt, "relationships", timings, on_phase))
+            
+            episodes = [episode for state in states for episode in _stored_episodes(state)]
+            if episodes:
+                # The graph changed, so cached search answers may be stale
+                await get_answer_cache().bump_generation()
             
+            failed = next((state["error"] for state in states if "error" in state), None)
+            if failed is not None or not episodes:
+                # Leave the document out of the index so the next attempt ingests it again
+                timings["total"] = round((time.perf_counter() - start) * 1000, 1)
+                return {
+                    "status": "error",
+                    "error": str(failed) if failed is not None else "No episode was stored for the document",
+                    "summary": summary,
+                    "file_processed": file_path,
+                    "mode": mode,
+                    "timings": timings,
+                    "episodes": episodes
+                }
+            
+            await asyncio.to_thread(
+                index.record,
+                content_hash,
+                filename or os.path.basename(file_path),
+                self.model_name,
+                episodes,
+                summary
+            )
+            
+            timings["total"] = round((time.perf_counter() - start) * 1000, 1)
             return {
                 "status": "success",
                 "summary": summary,
-                "file_processed": file_path
+                "file_processed": file_path,
+                "mode": mode,
+                "timings": timings,
+                "duplicate": False,
+                "episodes": episodes,
+                "conversion": "local" if content is not None else "markitdown"
             }
             
         except Exception as e:
+            timings["total"] = round((time.perf_counter() - start) * 1000, 1)
             return {
                 "status": "error",
                 "error": str(e),
-                "file_processed": file_path
+                "file_processed": file_path,
+                "mode": mode,
+                "timings": timings
             }
     
     async def close(self):
-        """Clean up resources."""
-        if self.mcp_client:
-            await cleanup_mcp_client(self.mcp_client)
+        """Release references to shared resources.
+        
+        The MCP connection pool is process-wide and is closed with close_mcp_pool().
+        """
+        self.mcp_pool = None
@@ -1,75 +1,194 @@
-from typing import Dict, Any, Optional, List, AsyncGenerator
+from typing import Dict, Any, Optional, List, AsyncGenerator, Callable, Tuple
 import asyncio
+import logging
+import re
+import time
 from contextlib import asynccontextmanager
 
-from langchain_openai import ChatOpenAI
-from langchain_core.messages import HumanMessage, AIMessage
+from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
 from langchain_core.callbacks import AsyncCallbackHandler
-from langchain_core.outputs import LLMResult
-
-from langgraph.prebuilt import create_react_agent
 
 from src.config.settings import (
-    OPENAI_API_KEY,
     DEFAULT_MODEL,
-    CONVERSATION_MEMORY_SIZE
+    CONVERSATION_MEMORY_SIZE,
+    HISTORY_TOKEN_BUDGET,
+    HISTORY_TOKEN_BUDGETS,
+    STREAM_COALESCE_BYTES,
+    STREAM_COALESCE_MS,
+    ANSWER_CACHE_ENABLED,
+    ANSWER_CACHE_IGNORE_HISTORY,
+    SEARCH_BATCH_CONCURRENCY,
+    SINGLE_FLIGHT_ENABLED,
+    INTENT_FAST_PATH_ENABLED,
+    DIRECT_SEARCH_MAX_NODES,
+    DIRECT_SEARCH_MAX_FACTS,
+    DETAILED_SEARCH_FAN_OUT,
+    DETAILED_SEARCH_MAX_EPISODES
 )
-from src.utils.mcp_client import setup_mcp_client, cleanup_mcp_client
+from src.utils.mcp_client import get_mcp_pool
+from src.utils.agent_cache import get_compiled_agent, get_chat_model
+from src.utils.answer_cache import get_answer_cache
+from src.utils.single_flight import get_single_flight
+from src.utils.intents import Intent, get_intent_classifier
+from src.utils.graph_context import GraphContext
+from src.utils.prompt_stats import get_prompt_stats
+from src.utils.answer_parser import AnswerParser
 from src.prompts.retrieval_prompts import RetrievalPrompts
 from src.utils.session_manager import get_session_manager
 from src.models.search import StreamingSearchResponse
 
+logger = logging.getLogger(__name__)
+
+# Marks the end of the whole agent run in a StreamingHandler queue
+_END_OF_RUN = object()
+
+def _frames(events: List[Tuple[str, Any]]) -> List[StreamingSearchResponse]:
+    """Turn answer parser events into stream frames."""
+    return [
+        StreamingSearchResponse(chunk=value, type="token") if kind == "token"
+        else StreamingSearchResponse(chunk="", type="citation", metadata=value)
+        for kind, value in events
+    ]
+
+def _replay_chunks(text: str, coalesce_bytes: int = 0, coalesce_ms: float = 0) -> List[str]:
+    """Split a cached answer into frames shaped like a live stream's."""
+    words = re.findall(r"\s*\S+\s*", text) or [text]
+    if coalesce_bytes <= 0:
+        # A time window would have collected the whole instant replay into one frame
+        return ["".join(words)] if coalesce_ms > 0 else words
+    
+    chunks, buffer, size = [], [], 0
+    for word in words:
+        buffer.append(word)
+        size += len(word.encode("utf-8"))
+        if size >= coalesce_bytes:
+            chunks.append("".join(buffer))
+            buffer, size = [], 0
+    if buffer:
+        chunks.append("".join(buffer))
+    return chunks
+
 class StreamingHandler(AsyncCallbackHandler):
-    """Custom callback handler for streaming responses."""
+    """Custom callback handler for streaming responses.
+    
+    Tokens from every LLM call in the agent run are queued as they arrive. The
+    stream ends only when finish() enqueues the end-of-run sentinel, which the
+    owning StreamingContext does once the whole run completes, so intermediate
+    tool-planning calls no longer end the stream early.
+    """
     
     def __init__(self):
         super().__init__()
-        self.queue = asyncio.Queue()
+        self.queue: asyncio.Queue = asyncio.Queue()
         self.is_finished = False
-        self._done = asyncio.Event()
     
     async def on_llm_new_token(self, token: str, **kwargs) -> None:
         """Handle new tokens as they are generated."""
-        await self.queue.put(token)
+        if token:
+            self.queue.put_nowait(token)
     
-    async def on_llm_end(self, response: LLMResult, **kwargs) -> None:
-        """Handle the end of LLM response generation."""
-        self.is_finished = True
-        self._done.set()
-    
-    async def on_llm_error(self, error: Exception, **kwargs) -> None:
-        """Handle LLM errors."""
-        self.is_finished = True
-        self._done.set()
-        await self.queue.put(f"Error: {str(error)}")
+    def finish(self) -> None:
+        """Signal the end of the agent run. Safe to call more than once."""
+        if not self.is_finished:
+            self.is_finished = True
+            self.queue.put_nowait(_END_OF_RUN)
     
-    async def aiter(self):
-        """Async iterator for streaming tokens."""
-        try:
-            while not self.is_finished or not self.queue.empty():
-                try:
+    async def aiter(self, max_bytes: int = 0, window_ms: float = 0):
+        """Async iterator over streamed text.
+        
+        Args:
+            max_bytes: Flush a frame once this many UTF-8 bytes are buffered (0 disables)
+            window_ms: Flush a frame this many milliseconds after its first token (0 disables)
+            
+        Yields:
+            Single tokens when coalescing is disabled, otherwise coalesced chunks
+        """
+        if max_bytes <= 0 and window_ms <= 0:
+            while True:
+                token = await self.queue.get()
+                if token is _END_OF_RUN:
+                    return
+                yield token
+        
+        loop = asyncio.get_running_loop()
+        window = window_ms / 1000
+        buffer: List[str] = []
+        size = 0
+        deadline = None
+        finished = False
+        
+        while not finished:
+            # Drain whatever is already queued before waiting
+            try:
+                token = self.queue.get_nowait()
+            except asyncio.QueueEmpty:
+                # Keep the buffer until the byte threshold or the window deadline
+                if buffer and window > 0:
+                    try:
+                        token = await asyncio.wait_for(
+                            self.queue.get(), max(0.0, deadline - loop.time())
+                        )
+                    except asyncio.TimeoutError:
+                        token = None
+                else:
                     token = await self.queue.get()
-                    yield token
-                except asyncio.QueueEmpty:
-                    if self._done.is_set():
-                        break
-                    await asyncio.sleep(0.1)
+            
+            if token is _END_OF_RUN:
+                finished = True
+            elif token is not None:
+                if not buffer:
+                    deadline = loop.time() + window
+                buffer.append(token)
+                size += len(token.encode("utf-8"))
+                if (max_bytes <= 0 or size < max_bytes) and (
+                    window <= 0 or loop.time() < deadline
+                ):
                     continue
-        except asyncio.CancelledError:
-            self.is_finished = True
-            self._done.set()
-            raise
-        finally:
-            self._done.set()
+            
+            if buffer:
+                yield "".join(buffer)
+                buffer = []
+                size = 0
+
+class StreamingContext:
+    """Per-request execution context for a streamed search run."""
+    
+    def __init__(self, session_id: str):
+        """Initialize the context.
+        
+        Args:
+            session_id: Session ID of the request
+        """
+        self.handler = StreamingHandler()
+        # Callbacks go in the run config rather than on the LLM so the compiled
+        # agent never holds a reference to any single request's handler
+        self.config = {
+            "callbacks": [self.handler],
+            "run_name": "stream_search_knowledge",
+            "metadata": {"session_id": session_id}
+        }
+    
+    def run(self, coro) -> asyncio.Task:
+        """Run a coroutine that streams through this context's config in the background.
+        
+        Args:
+            coro: Coroutine passing ``self.config`` to its LLM calls
+            
+        Returns:
+            Task resolving to the coroutine's result
+        """
+        task = asyncio.create_task(coro)
+        # End the token stream when the whole run is over, however it ends
+        task.add_done_callback(lambda _: self.handler.finish())
+        return task
 
 class DataRetrievalAgent:
     """Agent responsible for searching and retrieving information from the knowledge graph."""
     
     def __init__(self, model_name: str = DEFAULT_MODEL, session_id: Optional[str] = None):
         self.model_name = model_name
-        self.llm = None
         self.agent = None
-        self.mcp_client = None
+        self.mcp_pool = None
         self.prompts = RetrievalPrompts()
         self.session_id = session_id
         self._session_manager = get_session_manager()
@@ -78,22 +197,32 @@ class DataRetrievalAgent:
         """Initialize the agent and its dependencies."""
         if self.agent is not None:
             return
-            
-        self.llm = ChatOpenAI(
-            model=self.model_name,
-            api_key=OPENAI_API_KEY,
-            streaming=False
-        )
         
-        self.mcp_client = await setup_mcp_client()
-        mcp_tools = self.mcp_client.get_tools()
-        
-        self.agent = create_react_agent(
-            self.llm,
-            mcp_tools,
-            prompt=self.prompts.get_focused_search_prompt("")
+        self.mcp_pool = await get_mcp_pool()
+        self.agent = await get_compiled_agent(
+            self.model_name,
+            self.mcp_pool.get_tools(),
+            prompt=self.prompts.get_system_prefix("focused"),
+            streaming=False
         )
 
+    @staticmethod
+    def _use_answer_cache(chat_history: str) -> bool:
+        """Whether a request may be served from or stored in the answer cache."""
+        return ANSWER_CACHE_ENABLED and (not chat_history or ANSWER_CACHE_IGNORE_HISTORY)
+
+    @staticmethod
+    def _history_budget(search_type: str) -> int:
+        """Token budget for the conversation history injected into a search prompt."""
+        return HISTORY_TOKEN_BUDGETS.get(search_type, HISTORY_TOKEN_BUDGET)
+
+    @staticmethod
+    def _match_intent(query: str) -> Optional[Intent]:
+        """Find a small-talk intent that can be answered without the agent."""
+        if not INTENT_FAST_PATH_ENABLED:
+            return None
+        return get_intent_classifier().classify(query)
+
     @property
     def memory(self):
         """Get the memory manager for the current session."""
@@ -102,112 +231,373 @@ class DataRetrievalAgent:
         return self._session_manager.get_memory(self.session_id)
     
     @asynccontextmanager
-    async def _setup_streaming(self):
-        """Setup streaming with proper resource cleanup."""
-        callback_handler = StreamingHandler()
-        self.llm = ChatOpenAI(
-            model=self.model_name,
-            api_key=OPENAI_API_KEY,
-            streaming=True,
-            callbacks=[callback_handler]
-        )
+    async def _setup_streaming(self, session_id: str):
+        """Setup a per-request streaming context with proper resource cleanup.
+        
+        Nothing on the shared agent instance is modified, so concurrent streams
+        only share the immutable compiled agents and the pooled MCP connections.
+        
+        Args:
+            session_id: Session ID of the request being streamed
+            
+        Yields:
+            StreamingContext owning the request's callback handler and run config
+        """
+        context = StreamingContext(session_id)
         
         try:
-            self.mcp_client = await setup_mcp_client()
-            mcp_tools = self.mcp_client.get_tools()
+            yield context
+        finally:
+            context.handler.finish()
+
+    def _flight_key(
+        self,
+        query: str,
+        doc_types: Optional[List[str]],
+        search_type: str,
+        include_relationships: bool,
+        chat_history: str,
+        session_id: str
+    ) -> tuple:
+        """Build the single-flight key for a search.
+        
+        Requests without conversation history share a key across sessions;
+        with history the answer depends on the session, so it is part of the key.
+        """
+        return (
+            get_answer_cache().make_key(
+                query, doc_types, search_type, include_relationships, self.model_name
+            ),
+            (session_id, chat_history) if chat_history else None
+        )
+    
+    @staticmethod
+    def _uses_retrieval_engine(search_type: str) -> bool:
+        """Whether a search type retrieves up front instead of running the ReAct loop."""
+        return search_type == "direct" or (search_type == "detailed" and DETAILED_SEARCH_FAN_OUT)
+    
+    async def _fan_out(self, calls: List[Tuple[str, Dict[str, Any]]]) -> GraphContext:
+        """Issue independent Graphiti tool calls concurrently and merge their results.
+        
+        Args:
+            calls: (tool name, arguments) pairs; arguments the tool's schema does
+                not declare are dropped, and tools the server lacks are skipped
             
-            self.agent = create_react_agent(
-                self.llm,
-                mcp_tools,
-                prompt=self.prompts.get_focused_search_prompt("")
-            )
+        Returns:
+            GraphContext with the results deduplicated by UUID
+        """
+        mcp_pool = await get_mcp_pool()
+        tools = {tool.name: tool for tool in mcp_pool.get_tools()}
+        
+        calls = [(name, arguments) for name, arguments in calls if name in tools]
+        if not calls:
+            raise RuntimeError("Graphiti search tools are not available")
+        
+        async def call(name: str, arguments: Dict[str, Any]) -> Any:
+            tool = tools[name]
+            return await tool.ainvoke({k: v for k, v in arguments.items() if k in tool.args})
+        
+        results = await asyncio.gather(
+            *(call(name, arguments) for name, arguments in calls),
+            return_exceptions=True
+        )
+        errors = [r for r in results if isinstance(r, BaseException)]
+        if len(errors) == len(results):
+            raise errors[0]
+        for error in errors:
+            logger.warning("Graphiti tool call failed: %s", error)
+        
+        context = GraphContext()
+        for result in results:
+            if not isinstance(result, BaseException):
+                context.add(result)
+        return context
+    
+    def _retrieval_calls(
+        self,
+        query: str,
+        doc_types: Optional[List[str]],
+        search_type: str,
+        include_relationships: bool
+    ) -> List[Tuple[str, Dict[str, Any]]]:
+        """Plan the Graphiti calls a search type needs.
+        
+        Direct searches make one node and one fact search. Detailed searches
+        also search once per document type, and with relationships fetch the
+        most recent episodes, all of which are independent of each other.
+        """
+        if search_type != "detailed":
+            search_query = f"{query} ({', '.join(doc_types)})" if doc_types else query
+            return [
+                ("search_nodes", {"query": search_query, "max_nodes": DIRECT_SEARCH_MAX_NODES}),
+                ("search_facts", {"query": search_query, "max_facts": DIRECT_SEARCH_MAX_FACTS})
+            ]
+        
+        queries = [query] + [f"{query} ({doc_type})" for doc_type in doc_types or []]
+        calls = []
+        for search_query in queries:
+            calls.append(("search_nodes", {"query": search_query, "max_nodes": DIRECT_SEARCH_MAX_NODES}))
+            calls.append(("search_facts", {"query": search_query, "max_facts": DIRECT_SEARCH_MAX_FACTS}))
+        if include_relationships:
+            calls.append(("get_episodes", {"last_n": DETAILED_SEARCH_MAX_EPISODES}))
+        return calls
+    
+    async def _agent_answer(
+        self,
+        query: str,
+        doc_types: Optional[List[str]],
+        chat_history: str,
+        search_type: str = "focused",
+        streaming: bool = False,
+        config: Optional[Dict[str, Any]] = None
+    ) -> str:
+        """Answer through the ReAct agent compiled for the search type's static prefix.
+        
+        The instructions are the agent's system prompt and only the history and
+        query go into the human message, so consecutive requests share the
+        longest possible prompt prefix.
+        
+        Args:
+            query: Search query
+            doc_types: Optional list of document types to filter by
+            chat_history: Formatted previous conversation, if any
+            search_type: Type of search (focused, detailed or timeline)
+            streaming: Whether the LLM streams tokens to the config's callbacks
+            config: Optional run config (carries the streaming callback handler)
             
-            yield callback_handler
+        Returns:
+            The agent's final answer
+        """
+        kind = self.prompts.prefix_kind(search_type, query)
+        prefix = self.prompts.get_system_prefix(kind)
+        suffix = self.prompts.get_query_suffix(query, chat_history, doc_types=doc_types)
+        mcp_pool = await get_mcp_pool()
+        agent = await get_compiled_agent(
+            self.model_name,
+            mcp_pool.get_tools(),
+            prompt=prefix,
+            streaming=streaming
+        )
+        result = await agent.ainvoke(
+            {"messages": [HumanMessage(content=suffix)]},
+            config=config
+        )
+        
+        # Extract the last AI message as the response
+        ai_messages = [msg for msg in result["messages"] if isinstance(msg, AIMessage)]
+        get_prompt_stats().record(
+            search_type, self.prompts.get_prefix_tokens(kind), suffix, ai_messages, chat_history
+        )
+        return ai_messages[-1].content if ai_messages else "No results found"
+    
+    async def _direct_answer(
+        self,
+        query: str,
+        doc_types: Optional[List[str]],
+        chat_history: str,
+        search_type: str = "direct",
+        include_relationships: bool = False,
+        streaming: bool = False,
+        config: Optional[Dict[str, Any]] = None
+    ) -> str:
+        """Retrieve search results up front and answer with a single LLM call.
+        
+        Args:
+            query: Search query
+            doc_types: Optional list of document types to filter by
+            chat_history: Formatted previous conversation, if any
+            search_type: "direct" or "detailed"
+            include_relationships: Whether to fetch episodes for relationship context
+            streaming: Whether the LLM streams tokens to the config's callbacks
+            config: Optional run config (carries the streaming callback handler)
             
-        finally:
-            if self.mcp_client:
-                await cleanup_mcp_client(self.mcp_client)
-            callback_handler.is_finished = True
-
+        Returns:
+            The synthesized answer in the search type's Answer/Source format
+        """
+        context = await self._fan_out(
+            self._retrieval_calls(query, doc_types, search_type, include_relationships)
+        )
+        nodes = "\n".join(filter(None, [context.format("nodes"), context.format_raw()]))
+        kind = "detailed_synthesis" if search_type == "detailed" else "direct_synthesis"
+        prefix = self.prompts.get_system_prefix(kind)
+        suffix = self.prompts.get_query_suffix(
+            query,
+            chat_history,
+            results=self.prompts.format_results(
+                nodes, context.format("facts"), context.format("episodes")
+            ),
+            doc_types=doc_types
+        )
+        llm = get_chat_model(self.model_name, streaming=streaming)
+        message = await llm.ainvoke(
+            [SystemMessage(content=prefix), HumanMessage(content=suffix)],
+            config=config
+        )
+        get_prompt_stats().record(
+            search_type, self.prompts.get_prefix_tokens(kind), suffix, [message], chat_history
+        )
+        return message.content or "No results found"
+    
+    async def _stream_run(
+        self,
+        session_id: str,
+        start: Callable[[StreamingContext], asyncio.Task],
+        coalesce_bytes: int,
+        coalesce_ms: float,
+        cache_key: Optional[tuple],
+        generation: int
+    ) -> AsyncGenerator[str, None]:
+        """Run a streaming search and yield its (coalesced) tokens.
+        
+        Args:
+            session_id: Session ID of the request starting the run
+            start: Starts the run on the streaming context and returns its task
+            coalesce_bytes: Merge tokens into frames of up to this many bytes (0 disables)
+            coalesce_ms: Merge tokens arriving within this many milliseconds (0 disables)
+            cache_key: Answer cache key to store the result under, if cacheable
+            generation: Answer cache generation read before the run started
+        """
+        async with self._setup_streaming(session_id) as context:
+            task = start(context)
+            collected_tokens = []
+            try:
+                async for token in context.handler.aiter(coalesce_bytes, coalesce_ms):
+                    collected_tokens.append(token)
+                    yield token
+                
+                await task
+            finally:
+                if not task.done():
+                    task.cancel()
+                    try:
+                        await task
+                    except asyncio.CancelledError:
+                        pass
+        
+        if cache_key is not None:
+            get_answer_cache().set(cache_key, "".join(collected_tokens), generation)
+    
     async def stream_search_knowledge(
         self, 
         query: str, 
         doc_types: Optional[List[str]] = None,
         include_relationships: bool = False,
         search_type: str = "focused",
-        session_id: Optional[str] = None
+        session_id: Optional[str] = None,
+        coalesce_bytes: int = STREAM_COALESCE_BYTES,
+        coalesce_ms: float = STREAM_COALESCE_MS,
+        store_session: bool = True
     ) -> AsyncGenerator[StreamingSearchResponse, None]:
-        """Stream search results from the knowledge graph."""
+        """Stream search results from the knowledge graph.
+        
+        Token frames carry the answer text without its Answer: prefix; each
+        citation is sent as a citation frame as soon as it is complete.
+        
+        Args:
+            query: Search query
+            doc_types: Optional list of document types to filter by
+            include_relationships: Whether to search for relationships between documents
+            search_type: Type of search to perform (focused, detailed, timeline, or direct)
+            session_id: Optional session ID to use for this search (overrides instance session_id)
+            coalesce_bytes: Merge tokens into frames of up to this many bytes (0 disables)
+            coalesce_ms: Merge tokens arriving within this many milliseconds (0 disables)
+            store_session: Whether to store a new session; anonymous requests use a
+                transient memory that is discarded afterwards
+        """
         effective_session_id = session_id or self.session_id
         if not effective_session_id:
             raise ValueError("Session ID is required for search operations")
         
         try:
-            session_memory = self._session_manager.get_memory(effective_session_id)
-            chat_history = session_memory.get_formatted_history()
-            history_context = f"\nPrevious conversation context:\n{chat_history}\n" if chat_history else ""
+            session_memory = self._session_manager.get_memory(
+                effective_session_id, create=store_session
+            )
+            # Strips the Answer: prefix and turns Source lines into citation frames
+            parser = AnswerParser()
             
-            if search_type == "detailed":
-                prompt = self.prompts.get_detailed_search_prompt(
-                    query, doc_types, include_relationships
-                )
-            elif search_type == "timeline":
-                prompt = self.prompts.get_timeline_search_prompt(
-                    query, doc_types
-                )
-            else:
-                prompt = self.prompts.get_focused_search_prompt(
-                    query, doc_types, include_relationships
+            intent = self._match_intent(query)
+            if intent is not None:
+                # Small talk is answered from a template without touching the agent
+                for chunk in _replay_chunks(intent.answer, coalesce_bytes, coalesce_ms):
+                    for frame in _frames(parser.feed(chunk)):
+                        yield frame
+                for frame in _frames(parser.finish()):
+                    yield frame
+                session_memory.add_interaction(query, intent.answer)
+                yield StreamingSearchResponse(
+                    chunk="",
+                    type="end",
+                    metadata={
+                        "status": "success",
+                        "query": query,
+                        "doc_types": doc_types,
+                        "search_type": search_type,
+                        "session_id": effective_session_id,
+                        "cached": False,
+                        "intent": intent.name
+                    }
                 )
+                return
+            
+            chat_history = session_memory.get_formatted_history(
+                max_tokens=self._history_budget(search_type)
+            )
             
-            prompt_with_history = f"{history_context}\n{prompt}"
+            cache = get_answer_cache()
+            cache_key, generation = None, await cache.refresh()
+            cached = None
+            if self._use_answer_cache(chat_history):
+                cache_key = cache.make_key(
+                    query, doc_types, search_type, include_relationships, self.model_name
+                )
+                cached = cache.get(cache_key)
             
-            async with self._setup_streaming() as callback_handler:
-                task = asyncio.create_task(
-                    self.agent.ainvoke({
-                        "messages": [HumanMessage(content=prompt_with_history)]
-                    })
+            if cached is not None:
+                # Replay the cached answer with the same framing as a live stream
+                response = cached
+                for chunk in _replay_chunks(cached, coalesce_bytes, coalesce_ms):
+                    for frame in _frames(parser.feed(chunk)):
+                        yield frame
+            else:
+                if self._uses_retrieval_engine(search_type):
+                    start = lambda context: context.run(
+                        self._direct_answer(
+                            query, doc_types, chat_history, search_type,
+                            include_relationships, streaming=True, config=context.config
+                        )
+                    )
+                else:
+                    start = lambda context: context.run(
+                        self._agent_answer(
+                            query, doc_types, chat_history, search_type,
+                            streaming=True, config=context.config
+                        )
+                    )
+                run = lambda: self._stream_run(
+                    effective_session_id, start, coalesce_bytes, coalesce_ms,
+                    cache_key, generation
                 )
+                if SINGLE_FLIGHT_ENABLED:
+                    # Identical concurrent streams share one run and get the same frames
+                    flight_key = (
+                        "stream",
+                        self._flight_key(
+                            query, doc_types, search_type, include_relationships,
+                            chat_history, effective_session_id
+                        ),
+                        coalesce_bytes,
+                        coalesce_ms
+                    )
+                    tokens = get_single_flight().subscribe(flight_key, run)
+                else:
+                    tokens = run()
                 
                 collected_tokens = []
                 try:
-                    async for token in callback_handler.aiter():
+                    async for token in tokens:
                         collected_tokens.append(token)
-                        yield StreamingSearchResponse(
-                            chunk=token,
-                            type="token"
-                        )
-                    
-                    result = await task
-                    response = "".join(collected_tokens)
-                    
-                    if "\nSource:" in response:
-                        answer, citations = response.split("\nSource:", 1)
-                        citation_parts = citations.strip("[]").split("|")
-                        yield StreamingSearchResponse(
-                            chunk="",
-                            type="citation",
-                            metadata={
-                                "document": citation_parts[0].strip(),
-                                "date": citation_parts[1].strip() if len(citation_parts) > 1 else None,
-                                "section": citation_parts[2].strip() if len(citation_parts) > 2 else None
-                            }
-                        )
-                    
-                    session_memory.add_interaction(query, response)
-                    
-                    yield StreamingSearchResponse(
-                        chunk="",
-                        type="end",
-                        metadata={
-                            "status": "success",
-                            "query": query,
-                            "doc_types": doc_types,
-                            "search_type": search_type,
-                            "session_id": effective_session_id
-                        }
-                    )
-                    
+                        for frame in _frames(parser.feed(token)):
+                            yield frame
                 except Exception as e:
                     yield StreamingSearchResponse(
                         chunk=str(e),
@@ -218,13 +608,27 @@ class DataRetrievalAgent:
                             "session_id": effective_session_id
                         }
                     )
-                finally:
-                    if not task.done():
-                        task.cancel()
-                        try:
-                            await task
-                        except asyncio.CancelledError:
-                            pass
+                    return
+                
+                response = "".join(collected_tokens)
+            
+            for frame in _frames(parser.finish()):
+                yield frame
+            
+            session_memory.add_interaction(query, response)
+            
+            yield StreamingSearchResponse(
+                chunk="",
+                type="end",
+                metadata={
+                    "status": "success",
+                    "query": query,
+                    "doc_types": doc_types,
+                    "search_type": search_type,
+                    "session_id": effective_session_id,
+                    "cached": cached is not None
+                }
+            )
                 
         except Exception as e:
             yield StreamingSearchResponse(
@@ -242,8 +646,11 @@ class DataRetrievalAgent:
         query: str, 
         doc_types: Optional[List[str]] = None,
         include_relationships: bool = False,
-        search_type: str = "focused",  # Can be "focused", "detailed", or "timeline"
-        session_id: Optional[str] = None
+        search_type: str = "focused",  # Can be "focused", "detailed", "timeline", or "direct"
+        session_id: Optional[str] = None,
+        chat_history: Optional[str] = None,
+        remember: bool = True,
+        store_session: bool = True
     ) -> Dict[str, Any]:
         """Search for information in the knowledge graph.
         
@@ -251,16 +658,16 @@ class DataRetrievalAgent:
             query: Search query
             doc_types: Optional list of document types to filter by
             include_relationships: Whether to search for relationships between documents
-            search_type: Type of search to perform (focused, detailed, or timeline)
+            search_type: Type of search to perform (focused, detailed, timeline, or direct)
             session_id: Optional session ID to use for this search (overrides instance session_id)
+            chat_history: Formatted history to use instead of the session's current history
+            remember: Whether to store the interaction in session memory
+            store_session: Whether to store a new session; anonymous requests use a
+                transient memory that is discarded afterwards
             
         Returns:
             Dict containing search results and status
         """
-        # Initialize agent if not already done
-        if not self.agent:
-            await self.setup()
-        
         # Use provided session_id or instance session_id
         effective_session_id = session_id or self.session_id
         if not effective_session_id:
@@ -268,39 +675,72 @@ class DataRetrievalAgent:
         
         try:
             # Get memory for the session
-            session_memory = self._session_manager.get_memory(effective_session_id)
+            session_memory = self._session_manager.get_memory(
+                effective_session_id, create=store_session
+            )
             
-            # Include chat history in the prompt if available
-            chat_history = session_memory.get_formatted_history()
-            history_context = f"\nPrevious conversation context:\n{chat_history}\n" if chat_history else ""
+            intent = self._match_intent(query)
+            if intent is not None:
+                # Small talk is answered from a template without touching the agent
+                if remember:
+                    session_memory.add_interaction(query, intent.answer)
+                return {
+                    "status": "success",
+                    "summary": intent.answer,
+                    "query": query,
+                    "doc_types": doc_types,
+                    "search_type": search_type,
+                    "session_id": effective_session_id,
+                    "cached": False,
+                    "intent": intent.name
+                }
             
-            # Select appropriate prompt based on search type
-            if search_type == "detailed":
-                prompt = self.prompts.get_detailed_search_prompt(
-                    query, doc_types, include_relationships
-                )
-            elif search_type == "timeline":
-                prompt = self.prompts.get_timeline_search_prompt(
-                    query, doc_types
-                )
-            else:  # Default to focused search
-                prompt = self.prompts.get_focused_search_prompt(
-                    query, doc_types, include_relationships
+            # Include chat history in the prompt if available
+            if chat_history is None:
+                chat_history = session_memory.get_formatted_history(
+                    max_tokens=self._history_budget(search_type)
                 )
             
-            # Add chat history to the prompt
-            prompt_with_history = f"{history_context}\n{prompt}"
-            
-            result = await self.agent.ainvoke({
-                "messages": [HumanMessage(content=prompt_with_history)]
-            })
+            cache = get_answer_cache()
+            cache_key, generation = None, await cache.refresh()
+            response = None
+            if self._use_answer_cache(chat_history):
+                cache_key = cache.make_key(
+                    query, doc_types, search_type, include_relationships, self.model_name
+                )
+                response = cache.get(cache_key)
+            cached = response is not None
             
-            # Extract the last AI message as the response
-            ai_messages = [msg for msg in result["messages"] if isinstance(msg, AIMessage)]
-            response = ai_messages[-1].content if ai_messages else "No results found"
+            if not cached:
+                async def run() -> str:
+                    if self._uses_retrieval_engine(search_type):
+                        response = await self._direct_answer(
+                            query, doc_types, chat_history, search_type, include_relationships
+                        )
+                    else:
+                        response = await self._agent_answer(
+                            query, doc_types, chat_history, search_type
+                        )
+                    
+                    if cache_key is not None:
+                        cache.set(cache_key, response, generation)
+                    return response
+                
+                if SINGLE_FLIGHT_ENABLED:
+                    # Identical concurrent searches share one agent run
+                    response = await get_single_flight().do(
+                        self._flight_key(
+                            query, doc_types, search_type, include_relationships,
+                            chat_history, effective_session_id
+                        ),
+                        run
+                    )
+                else:
+                    response = await run()
             
             # Store the interaction in session memory
-            session_memory.add_interaction(query, response)
+            if remember:
+                session_memory.add_interaction(query, response)
             
             return {
                 "status": "success",
@@ -308,7 +748,8 @@ class DataRetrievalAgent:
                 "query": query,
                 "doc_types": doc_types,
                 "search_type": search_type,
-                "session_id": effective_session_id
+                "session_id": effective_session_id,
+                "cached": cached
             }
             
         except Exception as e:
@@ -319,6 +760,91 @@ class DataRetrievalAgent:
                 "session_id": effective_session_id
             }
     
+    async def batch_search_knowledge(
+        self,
+        queries: List[str],
+        doc_types: Optional[List[str]] = None,
+        include_relationships: bool = False,
+        search_type: str = "focused",
+        session_id: Optional[str] = None,
+        concurrency: int = SEARCH_BATCH_CONCURRENCY,
+        shared_context: bool = False,
+        store_session: bool = True
+    ) -> List[Dict[str, Any]]:
+        """Run several searches, concurrently unless they share context.
+        
+        By default every query sees the session history as it was before the
+        batch, runs concurrently with at most ``concurrency`` others, and the
+        interactions are added to session memory in input order afterwards.
+        With ``shared_context`` the queries run one after another and each one
+        sees the answers to the previous ones.
+        
+        Args:
+            queries: Search queries
+            doc_types: Optional list of document types to filter by
+            include_relationships: Whether to search for relationships between documents
+            search_type: Type of search to perform (focused, detailed, timeline, or direct)
+            session_id: Optional session ID to use for this search (overrides instance session_id)
+            concurrency: Maximum number of queries running at once
+            shared_context: Run sequentially, letting each query see earlier answers
+            store_session: Whether to store a new session; anonymous requests use a
+                transient memory that is discarded afterwards
+            
+        Returns:
+            List of search results in input order, each with its latency_ms
+        """
+        effective_session_id = session_id or self.session_id
+        if not effective_session_id:
+            raise ValueError("Session ID is required for search operations")
+        
+        async def timed_search(query: str, **kwargs) -> Dict[str, Any]:
+            start = time.perf_counter()
+            result = await self.search_knowledge(
+                query=query,
+                doc_types=doc_types,
+                include_relationships=include_relationships,
+                search_type=search_type,
+                session_id=effective_session_id,
+                # History and memory are handled here, once for the whole batch
+                remember=False,
+                store_session=False,
+                **kwargs
+            )
+            result["latency_ms"] = round((time.perf_counter() - start) * 1000, 1)
+            return result
+        
+        session_memory = self._session_manager.get_memory(
+            effective_session_id, create=store_session
+        )
+        if shared_context:
+            results = []
+            for query in queries:
+                result = await timed_search(
+                    query,
+                    chat_history=session_memory.get_formatted_history(
+                        max_tokens=self._history_budget(search_type)
+                    )
+                )
+                if result["status"] == "success":
+                    session_memory.add_interaction(query, result["summary"])
+                results.append(result)
+            return results
+        
+        history_snapshot = session_memory.get_formatted_history(
+            max_tokens=self._history_budget(search_type)
+        )
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+        
+        async def isolated_search(query: str) -> Dict[str, Any]:
+            async with semaphore:
+                return await timed_search(query, chat_history=history_snapshot)
+        
+        results = await asyncio.gather(*(isolated_search(query) for query in queries))
+        for query, result in zip(queries, results):
+            if result["status"] == "success":
+                session_memory.add_interaction(query, result["summary"])
+        return results
+    
     def get_conversation_history(self, session_id: Optional[str] = None) -> str:
         """Get the formatted conversation history for a session.
         
@@ -331,7 +857,9 @@ class DataRetrievalAgent:
         effective_session_id = session_id or self.session_id
         if not effective_session_id:
             raise ValueError("Session ID is required to get conversation history")
-        return self._session_manager.get_memory(effective_session_id).get_formatted_history()
+        return self._session_manager.get_memory(
+            effective_session_id, create=False
+        ).get_formatted_history()
     
     def clear_conversation_history(self, session_id: Optional[str] = None) -> None:
         """Clear the conversation history for a session.
@@ -345,6 +873,8 @@ class DataRetrievalAgent:
         self._session_manager.clear_session(effective_session_id)
     
     async def close(self):
-        """Clean up resources."""
-        if self.mcp_client:
-            await cleanup_mcp_client(self.mcp_client)
+        """Release references to shared resources.
+        
+        The MCP connection pool is process-wide and is closed with close_mcp_pool().
+        """
+        self.mcp_pool = None
@@ -0,0 +1,62 @@
+import argparse
+import importlib.util
+import time
+import tracemalloc
+from src.utils import memory
+
+def load_baseline(path: str):
+    """Load another memory.py (e.g. an older revision) to compare against."""
+    spec = importlib.util.spec_from_file_location("baseline_memory", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def per_call_us(function, calls: int) -> float:
+    """Average microseconds per call of ``function``."""
+    start = time.perf_counter()
+    for _ in range(calls):
+        function()
+    return (time.perf_counter() - start) / calls * 1e6
+
+def bench(module, label: str, args) -> None:
+    """Measure per-session memory and history formatting cost of one implementation."""
+    tracemalloc.start()
+    sessions = []
+    for _ in range(args.sessions):
+        session = module.ConversationMemoryManager(args.window)
+        # Fill the window and evict a little so the ring is in steady state
+        for i in range(args.window + 2):
+            session.add_interaction(
+                f"What is the status of item {i}?",
+                f"Answer: Item {i} is in progress.\nSource: [Doc {i} | 2024-01-01 | Status]"
+            )
+        sessions.append(session)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    session = sessions[0]
+    formatted = per_call_us(session.get_formatted_history, 20000)
+    budgeted = per_call_us(lambda: session.get_formatted_history(args.budget, args.turn_tokens), 2000)
+    added = per_call_us(lambda: session.add_interaction("q", "a"), 20000)
+    print(f"{label:<10} {size / args.sessions / 1024:>8.1f} KiB/session  "
+          f"format {formatted:>7.2f} us  budgeted format {budgeted:>6.1f} us  "
+          f"add_interaction {added:>6.2f} us")
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measure per-session conversation memory size and history formatting cost"
+    )
+    parser.add_argument("--sessions", type=int, default=10000, help="Sessions to create")
+    parser.add_argument("--window", type=int, default=10, help="Interactions kept per session")
+    parser.add_argument("--budget", type=int, default=600, help="History token budget for budgeted format")
+    parser.add_argument("--turn-tokens", type=int, default=300, help="Token limit per turn for budgeted format")
+    parser.add_argument("--baseline", help="Path of another memory.py to compare against, "
+                      "e.g. from `git show <rev>:src/utils/memory.py`")
+    args = parser.parse_args()
+
+    if args.baseline:
+        bench(load_baseline(args.baseline), "baseline", args)
+    bench(memory, "current", args)
+
+if __name__ == "__main__":
+    main()
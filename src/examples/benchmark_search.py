@@ -0,0 +1,75 @@
+import os
+
+# Every run must reach the LLM, so answers are not served from the cache
+os.environ.setdefault("ANSWER_CACHE_ENABLED", "false")
+
+import asyncio
+import argparse
+import statistics
+import time
+from langchain_core.callbacks import get_usage_metadata_callback
+from src.data_retrive.agent import DataRetrievalAgent
+from src.utils.mcp_client import close_mcp_pool
+
+async def main():
+    parser = argparse.ArgumentParser(
+        description="Compare latency and LLM token usage of search types against the live graph"
+    )
+    parser.add_argument("--query", nargs="+", required=True, help="Queries to run")
+    parser.add_argument("--search-types", nargs="+", default=["focused", "direct"],
+                      choices=["focused", "detailed", "timeline", "direct"],
+                      help="Search types to compare")
+    parser.add_argument("--runs", type=int, default=3, help="Runs per query and search type")
+    parser.add_argument("--model", default="gpt-4", help="LLM model to use")
+    args = parser.parse_args()
+
+    agent = DataRetrievalAgent(model_name=args.model)
+    rows = []
+
+    try:
+        for search_type in args.search_types:
+            latencies = []
+            usage = {"input_tokens": 0, "output_tokens": 0, "total_tokens": 0}
+            errors = 0
+            for run in range(args.runs):
+                for number, query in enumerate(args.query):
+                    start = time.perf_counter()
+                    # Collects the usage_metadata reported by every LLM call of the search
+                    with get_usage_metadata_callback() as callback:
+                        result = await agent.search_knowledge(
+                            query=query,
+                            search_type=search_type,
+                            session_id=f"benchmark-{search_type}-{run}-{number}"
+                        )
+                    latencies.append(time.perf_counter() - start)
+                    if result["status"] != "success":
+                        errors += 1
+                        print(f"{search_type}: error for {query!r}: {result['error']}")
+                    for model_usage in callback.usage_metadata.values():
+                        for field in usage:
+                            usage[field] += model_usage.get(field, 0)
+            searches = len(latencies)
+            rows.append((
+                search_type,
+                searches,
+                errors,
+                statistics.median(latencies) * 1000,
+                max(latencies) * 1000,
+                usage["input_tokens"] / searches,
+                usage["output_tokens"] / searches,
+                usage["total_tokens"] / searches
+            ))
+    finally:
+        await agent.close()
+        await close_mcp_pool()
+
+    print(f"\nModel: {args.model}  queries: {len(args.query)}  runs: {args.runs}")
+    print(f"{'search type':<12} {'searches':>8} {'errors':>6} {'p50 ms':>8} {'max ms':>8} "
+          f"{'input tok':>10} {'output tok':>10} {'total tok':>10}")
+    for search_type, searches, errors, p50, worst, tokens_in, tokens_out, total in rows:
+        print(f"{search_type:<12} {searches:>8} {errors:>6} {p50:>8.0f} {worst:>8.0f} "
+              f"{tokens_in:>10.0f} {tokens_out:>10.0f} {total:>10.0f}")
+    print("(token columns are averages per search)")
+
+if __name__ == "__main__":
+    asyncio.run(main())
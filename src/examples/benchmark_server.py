@@ -0,0 +1,47 @@
+import asyncio
+import argparse
+import time
+import httpx
+
+async def main():
+    parser = argparse.ArgumentParser(description="Measure requests/sec against a running API server")
+    parser.add_argument("--url", default="http://localhost:8080/retrieve/sessions/stats",
+                      help="Endpoint to request (the default touches no LLM or graph)")
+    parser.add_argument("--requests", type=int, default=5000, help="Total requests to send")
+    parser.add_argument("--concurrency", type=int, default=64, help="Requests in flight at once")
+    args = parser.parse_args()
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    latencies = []
+    errors = 0
+    remaining = args.requests
+
+    async with httpx.AsyncClient(limits=limits, timeout=30) as client:
+        # Warm up connections before measuring
+        await asyncio.gather(*(client.get(args.url) for _ in range(args.concurrency)))
+
+        async def worker():
+            nonlocal remaining, errors
+            while remaining > 0:
+                remaining -= 1
+                start = time.perf_counter()
+                try:
+                    response = await client.get(args.url)
+                    if response.status_code != 200:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    print(f"Requests: {len(latencies)}  errors: {errors}  concurrency: {args.concurrency}")
+    print(f"Requests/sec: {len(latencies) / elapsed:.0f}")
+    print(f"Latency p50: {latencies[len(latencies) // 2] * 1000:.1f} ms  "
+          f"p99: {latencies[int(len(latencies) * 0.99)] * 1000:.1f} ms")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,28 +1,40 @@
 import asyncio
 import argparse
+from src.config.settings import INGEST_MODE, INGEST_MODES
 from src.data_Ingestion.agent import DataIngestionAgent
+from src.utils.mcp_client import close_mcp_pool
 
 async def main():
     parser = argparse.ArgumentParser(description="Ingest documents into the knowledge graph")
     parser.add_argument("--file", required=True, help="Path to file to process")
     parser.add_argument("--model", default="gpt-4", help="LLM model to use")
+    parser.add_argument("--mode", default=INGEST_MODE, choices=INGEST_MODES,
+                      help="How to run the processing, metadata and relationship phases")
+    parser.add_argument("--force", action="store_true",
+                      help="Ingest again even if the same content was already ingested")
     args = parser.parse_args()
     
     agent = DataIngestionAgent(model_name=args.model)
     
     try:
-        result = await agent.process_document(args.file)
+        result = await agent.process_document(args.file, mode=args.mode, force=args.force)
         
         if result["status"] == "success":
             print("\n=== Document Processing Summary ===")
             print(f"File: {result['file_processed']}")
+            if result["duplicate"]:
+                print("Already ingested; returning the indexed summary (use --force to re-ingest)")
             print("\nSummary:")
             print(result["summary"])
+            print("\nTimings (ms):")
+            for phase, elapsed in result["timings"].items():
+                print(f"  {phase}: {elapsed}")
         else:
             print(f"\nError processing document: {result['error']}")
     
     finally:
         await agent.close()
+        await close_mcp_pool()
 
 if __name__ == "__main__":
     asyncio.run(main()) 
\ No newline at end of file
@@ -2,6 +2,7 @@ import asyncio
 import argparse
 from typing import List
 from src.data_retrive.agent import DataRetrievalAgent
+from src.utils.mcp_client import close_mcp_pool
 
 async def main():
     parser = argparse.ArgumentParser(description="Search information in the knowledge graph")
@@ -33,6 +34,7 @@ async def main():
     
     finally:
         await agent.close()
+        await close_mcp_pool()
 
 if __name__ == "__main__":
     asyncio.run(main()) 
\ No newline at end of file
@@ -15,6 +15,10 @@ class SearchResponse(BaseModel):
     query: str
     doc_types: Optional[List[str]] = None
     search_type: str = "focused"
+    cached: bool = False
+    error: Optional[str] = None
+    latency_ms: Optional[float] = None
+    intent: Optional[str] = None
 
 class StreamingSearchResponse(BaseModel):
     """Model for streaming search response chunks."""
@@ -6,14 +6,24 @@ class IngestionPrompts:
     def get_document_processing_prompt(
         file_path: str,
         mime_type: Optional[str] = None,
-        extract_metadata: bool = True
+        extract_metadata: bool = True,
+        content: Optional[str] = None
     ) -> str:
-        """Generate a document processing prompt based on file type."""
+        """Generate a document processing prompt based on file type.
+        
+        When ``content`` is given the document was already read locally, so the
+        prompt embeds it and tells the agent not to call MarkItDown.
+        """
         file_type = mime_type or mimetypes.guess_type(file_path)[0] or "unknown"
         metadata_instruction = (
             "\n4. Extract and store document metadata (author, date, version, etc.)"
             if extract_metadata else ""
         )
+        read_instruction = (
+            "The document content is included below - do NOT call MarkItDown tools"
+            if content is not None else
+            "Use appropriate MarkItDown tools for the file type"
+        )
         
         base_prompt = f"""
         Process this document efficiently and store key information:
@@ -22,7 +32,7 @@ class IngestionPrompts:
         Type: {file_type}
         
         Instructions:
-        1. Use appropriate MarkItDown tools for the file type
+        1. {read_instruction}
         2. Extract ONLY relevant information and insights
         3. Store processed content using add_episode{metadata_instruction}
         
@@ -65,6 +75,14 @@ class IngestionPrompts:
             - Preserve data relationships
             - Handle formulas and calculated values
             """
+        
+        if content is not None:
+            base_prompt += f"""
+        Document content:
+        <<<
+{content}
+        >>>
+        """
             
         return base_prompt
 
@@ -122,4 +140,25 @@ class IngestionPrompts:
         
         Format metadata consistently and include only available information.
         DO NOT make assumptions about missing metadata.
-        """ 
\ No newline at end of file
+        """
+
+    @staticmethod
+    def get_single_pass_prompt(
+        file_path: str,
+        mime_type: Optional[str] = None,
+        content: Optional[str] = None
+    ) -> str:
+        """Generate one prompt covering processing, metadata extraction and relationship linking."""
+        return f"""
+        {IngestionPrompts.get_document_processing_prompt(file_path, mime_type, extract_metadata=False, content=content)}
+        
+        After storing the document, complete the remaining steps in this same run.
+        
+        Step 2 - Metadata:
+        {IngestionPrompts.get_metadata_extraction_prompt()}
+        Store the extracted metadata with add_episode.
+        
+        Step 3 - Relationships:
+        {IngestionPrompts.get_relationship_prompt(file_path)}
+        Finish with a brief summary of the information that was stored.
+        """
@@ -1,164 +1,346 @@
+from functools import lru_cache
 from typing import Optional, List
 
+from src.utils.intents import get_intent_classifier
+from src.utils.tokens import count_tokens, tokenizer_name
+
+# Static instruction blocks. They never contain the query, the conversation
+# history or the requested document types, so every request of a kind starts
+# with byte-identical text and the provider's prompt-prefix cache (and the
+# compiled-agent cache) can reuse it. The per-request parts come last, in the
+# dynamic suffix.
+_GREETING_PREFIX = """
+This appears to be a basic greeting or introduction (given at the end).
+
+Instructions:
+1. Do NOT use search_nodes or any knowledge retrieval tools
+2. Respond directly to the greeting with a friendly introduction
+3. Introduce yourself as a "Noob Agent" in your response
+4. Offer to help without using external data
+
+Response Format:
+Answer: [A friendly greeting followed by a brief introduction as a Noob Agent]
+
+Examples of GOOD responses:
+Query: "Hi there"
+Answer: Hello! I'm your Noob Agent. How can I help you today?
+
+Query: "Hey, how are you?"
+Answer: I'm doing well, thanks for asking! I'm the Noob Agent here to assist you with any questions or tasks you have.
+
+CRITICAL RULES:
+1. NEVER use knowledge retrieval tools for basic greetings
+2. Keep the response friendly and concise
+3. ALWAYS introduce yourself as a "Noob Agent"
+4. Offer to help without making assumptions about what the user needs
+"""
+
+_FOCUSED_PREFIX = """
+Find specific information about the query given at the end.
+
+Instructions:
+1. Use search_nodes to find ONLY the specific information that answers the query
+2. If the query is about conversation history, ONLY use the most recent relevant interaction
+3. For all other queries, use ONLY the most recent relevant information from the knowledge graph
+4. Return ONLY the exact information requested - nothing more
+5. Format as a single, clear sentence
+6. Include the exact source from search_nodes
+
+Response Rules:
+- For location queries: Return ONLY current location
+- For date queries: Return ONLY the specific date
+- For status queries: Return ONLY current status
+- For numerical queries: Return ONLY the number/value
+- For name queries: Return ONLY the name
+- For conversation history: Return ONLY the exact last query/response
+- For personal info: Return ONLY the specific requested detail
+
+Format your response EXACTLY as:
+Answer: [Single sentence with ONLY the requested information]
+Source: [Exact source from search_nodes]
+
+Examples of GOOD responses:
+Query: "What is Alex's role?"
+Answer: Alex Johnson is a Software Engineer at TechCorp.
+Source: [Employee_Profile | 2024-02-15 | Current Role]
+
+Query: "What was my last question?"
+Answer: Your last question was about API integration.
+Source: [Conversation_History | 2024-02-15 | Recent Query]
+
+Examples of BAD responses (DO NOT DO THESE):
+❌ "Alex Johnson is a Software Engineer with 5 years of experience..."
+❌ "Your last question was about API integration, and we discussed..."
+❌ "Based on the conversation history, you asked about..."
+
+CRITICAL RULES:
+1. NEVER include additional context or information
+2. NEVER mention historical data unless specifically asked
+3. NEVER add explanations or qualifiers
+4. NEVER combine information from multiple sources
+5. NEVER make assumptions about the data
+6. NEVER include personal opinions or interpretations
+7. For conversation history, ONLY return the exact last query
+8. Use ONLY the most recent relevant source
+9. If information is not found, respond with "No information found for this query"
+"""
+
+_DETAILED_PREFIX = """
+Search for comprehensive information about the query given at the end.
+
+Instructions:
+1. Use search_nodes to find all relevant information
+2. Use search_facts to find relationships between pieces of information
+3. Extract key insights and details
+4. For each piece of information and relationship:
+   - Include the exact source from the tool results
+   - Specify which tool provided the information
+
+Format your response as:
+Answer: A detailed, well-structured response
+
+Sources:
+From search_nodes:
+- [Include exact source details from the tool]
+
+From search_facts:
+- [Include exact relationship and source details from the tool]
+
+Important:
+- Only use information and sources provided by the tools
+- Do not infer or assume source details
+- Clearly indicate which tool provided each piece of information
+"""
+
+_TIMELINE_PREFIX = """
+Search for chronological information about the query given at the end.
+
+Instructions:
+1. Use search_nodes to find time-based information
+2. Extract and sort events chronologically
+3. For each event:
+   - Include the exact source from search_nodes
+   - Include any temporal relationships from search_facts
+
+Format your response as:
+Timeline:
+[Date/Time] Event/Change/Update
+Source: [Exact source details from the tool result]
+
+Important:
+- Sort from earliest to latest
+- Only include dated information
+- Use exact source details from the tools
+- Do not infer or assume source information
+"""
+
+_DIRECT_SYNTHESIS_PREFIX = """
+Answer the query given at the end using ONLY the knowledge graph results listed before it.
+
+Instructions:
+1. Do NOT call any tools; everything you may use is listed in the results
+2. Return ONLY the exact information requested - nothing more
+3. Format as a single, clear sentence
+4. Include the exact source of the result you used
+
+Format your response EXACTLY as:
+Answer: [Single sentence with ONLY the requested information]
+Source: [Exact source from the results]
+
+Example:
+Query: "What is Alex's role?"
+Answer: Alex Johnson is a Software Engineer at TechCorp.
+Source: [Employee_Profile | 2024-02-15 | Current Role]
+
+CRITICAL RULES:
+1. NEVER use information that is not in the results
+2. NEVER add explanations or qualifiers
+3. Use ONLY the most recent relevant source
+4. If the results do not answer the question, respond with "No information found for this query"
+"""
+
+_DETAILED_SYNTHESIS_PREFIX = """
+Give comprehensive information about the query given at the end, using ONLY the knowledge graph results listed before it.
+
+Instructions:
+1. Do NOT call any tools; everything you may use is listed in the results
+2. Extract key insights and details
+3. For each piece of information and relationship:
+   - Include the exact source from the results
+   - Specify which tool provided the information
+
+Format your response as:
+Answer: A detailed, well-structured response
+
+Sources:
+From search_nodes:
+- [Include exact source details from the results]
+
+From search_facts:
+- [Include exact relationship and source details from the results]
+
+Important:
+- Only use information and sources provided in the results
+- Do not infer or assume source details
+- Clearly indicate which tool provided each piece of information
+"""
+
+_PREFIXES = {
+    "greeting": _GREETING_PREFIX,
+    "focused": _FOCUSED_PREFIX,
+    "detailed": _DETAILED_PREFIX,
+    "timeline": _TIMELINE_PREFIX,
+    "direct_synthesis": _DIRECT_SYNTHESIS_PREFIX,
+    "detailed_synthesis": _DETAILED_SYNTHESIS_PREFIX
+}
+
+@lru_cache(maxsize=None)
+def _compile_prefix(kind: str) -> str:
+    """Render a static prefix once per kind."""
+    return _PREFIXES[kind].strip()
+
+@lru_cache(maxsize=None)
+def _prefix_tokens(kind: str, tokenizer: str) -> int:
+    """Count a static prefix's tokens once per kind and tokenizer."""
+    return count_tokens(_compile_prefix(kind))
+
 class RetrievalPrompts:
     @staticmethod
+    def prefix_kind(search_type: str, query: str = "") -> str:
+        """Get the static prefix kind for a search type and query.
+
+        Focused searches for a bare greeting use the greeting instructions.
+        """
+        if search_type == "focused" and query:
+            # Whole-query match, so "this" is not "hi"
+            intent = get_intent_classifier().classify(query)
+            if intent is not None and intent.name == "greeting":
+                return "greeting"
+        return search_type if search_type in _PREFIXES else "focused"
+
+    @staticmethod
+    def get_system_prefix(kind: str) -> str:
+        """Get the precompiled static instructions for a prompt kind.
+
+        Args:
+            kind: "greeting", "focused", "detailed", "timeline",
+                "direct_synthesis" or "detailed_synthesis"
+
+        Returns:
+            Instruction text that is identical for every request of this kind
+        """
+        return _compile_prefix(kind)
+
+    @staticmethod
+    def get_prefix_tokens(kind: str) -> int:
+        """Get the token count of a prompt kind's static prefix, computed once.
+
+        Args:
+            kind: Prompt kind, as for get_system_prefix()
+
+        Returns:
+            Number of tokens in the prefix
+        """
+        # Keyed by tokenizer too, so counts taken before the tokenizer loaded are not reused
+        return _prefix_tokens(kind, tokenizer_name())
+
+    @staticmethod
+    def get_query_suffix(
+        query: str,
+        chat_history: str = "",
+        results: str = "",
+        doc_types: Optional[List[str]] = None
+    ) -> str:
+        """Build the per-request part of a prompt, placed after the static prefix.
+
+        Args:
+            query: Search query
+            chat_history: Formatted previous conversation, if any
+            results: Knowledge graph results retrieved up front, if any
+            doc_types: Optional list of document types to restrict the answer to
+
+        Returns:
+            Dynamic prompt text ending with the query
+        """
+        parts = []
+        if results:
+            parts.append(results)
+        if chat_history:
+            parts.append(f"Previous conversation context:\n{chat_history}")
+        if doc_types:
+            parts.append(f"Only use information from these document types: {', '.join(doc_types)}")
+        parts.append(f"Query:\n{query}")
+        return "\n\n".join(parts)
+
+    @staticmethod
+    def format_results(nodes: str, facts: str, episodes: str = "") -> str:
+        """Format retrieved knowledge graph results for a synthesis prompt."""
+        sections = [
+            f"Results from search_nodes:\n{nodes or 'No nodes found'}",
+            f"Results from search_facts:\n{facts or 'No facts found'}"
+        ]
+        if episodes:
+            sections.append(f"Recent episodes:\n{episodes}")
+        return "\n\n".join(sections)
+
+    @classmethod
     def get_focused_search_prompt(
+        cls,
         query: str,
         doc_types: Optional[List[str]] = None,
         include_relationships: bool = False
     ) -> str:
         """Generate a focused search prompt that encourages concise, specific answers."""
-        type_filter = f" within {', '.join(doc_types)}" if doc_types else ""
-        
-        # Check for basic greetings and questions
-        basic_greeting_patterns = ["hi", "hello", "hey", "greetings", "how are you", "what's up", "howdy"]
-        if any(greeting in query.lower() for greeting in basic_greeting_patterns):
-            return f"""
-            This appears to be a basic greeting or introduction:
-
-            {query}
-
-            Instructions:
-            1. Do NOT use search_nodes or any knowledge retrieval tools
-            2. Respond directly to the greeting with a friendly introduction
-            3. Introduce yourself as a "Noob Agent" in your response
-            4. Offer to help without using external data
-
-            Response Format:
-            Answer: [A friendly greeting followed by a brief introduction as a Noob Agent]
-
-            Examples of GOOD responses:
-            Query: "Hi there"
-            Answer: Hello! I'm your Noob Agent. How can I help you today?
-
-            Query: "Hey, how are you?"
-            Answer: I'm doing well, thanks for asking! I'm the Noob Agent here to assist you with any questions or tasks you have.
-
-            CRITICAL RULES:
-            1. NEVER use knowledge retrieval tools for basic greetings
-            2. Keep the response friendly and concise
-            3. ALWAYS introduce yourself as a "Noob Agent"
-            4. Offer to help without making assumptions about what the user needs
-            """
-        
-        return f"""
-        Find specific information{type_filter} about:
-
-        {query}
-
-        Instructions:
-        1. Use search_nodes to find ONLY the specific information that answers the query
-        2. If the query is about conversation history, ONLY use the most recent relevant interaction
-        3. For all other queries, use ONLY the most recent relevant information from the knowledge graph
-        4. Return ONLY the exact information requested - nothing more
-        5. Format as a single, clear sentence
-        6. Include the exact source from search_nodes
-
-        Response Rules:
-        - For location queries: Return ONLY current location
-        - For date queries: Return ONLY the specific date
-        - For status queries: Return ONLY current status
-        - For numerical queries: Return ONLY the number/value
-        - For name queries: Return ONLY the name
-        - For conversation history: Return ONLY the exact last query/response
-        - For personal info: Return ONLY the specific requested detail
-
-        Format your response EXACTLY as:
-        Answer: [Single sentence with ONLY the requested information]
-        Source: [Exact source from search_nodes]
-
-        Examples of GOOD responses:
-        Query: "What is Alex's role?"
-        Answer: Alex Johnson is a Software Engineer at TechCorp.
-        Source: [Employee_Profile | 2024-02-15 | Current Role]
-
-        Query: "What was my last question?"
-        Answer: Your last question was about API integration.
-        Source: [Conversation_History | 2024-02-15 | Recent Query]
-
-        Examples of BAD responses (DO NOT DO THESE):
-        ❌ "Alex Johnson is a Software Engineer with 5 years of experience..."
-        ❌ "Your last question was about API integration, and we discussed..."
-        ❌ "Based on the conversation history, you asked about..."
-
-        CRITICAL RULES:
-        1. NEVER include additional context or information
-        2. NEVER mention historical data unless specifically asked
-        3. NEVER add explanations or qualifiers
-        4. NEVER combine information from multiple sources
-        5. NEVER make assumptions about the data
-        6. NEVER include personal opinions or interpretations
-        7. For conversation history, ONLY return the exact last query
-        8. Use ONLY the most recent relevant source
-        9. If information is not found, respond with "No information found for this query"
-        """
+        kind = cls.prefix_kind("focused", query)
+        suffix = cls.get_query_suffix(query, doc_types=doc_types)
+        return f"{cls.get_system_prefix(kind)}\n\n{suffix}"
 
-    @staticmethod
+    @classmethod
     def get_detailed_search_prompt(
+        cls,
         query: str,
         doc_types: Optional[List[str]] = None,
         include_relationships: bool = True
     ) -> str:
         """Generate a detailed search prompt for comprehensive information requests."""
-        type_filter = f" within {', '.join(doc_types)}" if doc_types else ""
-        
-        return f"""
-        Search for comprehensive information{type_filter} about:
-        
-        {query}
-        
-        Instructions:
-        1. Use search_nodes to find all relevant information
-        2. Use search_facts to find relationships between pieces of information
-        3. Extract key insights and details
-        4. For each piece of information and relationship:
-           - Include the exact source from the tool results
-           - Specify which tool provided the information
-        
-        Format your response as:
-        Answer: A detailed, well-structured response
-        
-        Sources:
-        From search_nodes:
-        - [Include exact source details from the tool]
-        
-        From search_facts:
-        - [Include exact relationship and source details from the tool]
-        
-        Important:
-        - Only use information and sources provided by the tools
-        - Do not infer or assume source details
-        - Clearly indicate which tool provided each piece of information
-        """
+        suffix = cls.get_query_suffix(query, doc_types=doc_types)
+        return f"{cls.get_system_prefix('detailed')}\n\n{suffix}"
 
-    @staticmethod
+    @classmethod
     def get_timeline_search_prompt(
+        cls,
         query: str,
         doc_types: Optional[List[str]] = None
     ) -> str:
         """Generate a timeline-focused search prompt for chronological information."""
-        type_filter = f" within {', '.join(doc_types)}" if doc_types else ""
-        
-        return f"""
-        Search for chronological information{type_filter} about:
-        
-        {query}
-        
-        Instructions:
-        1. Use search_nodes to find time-based information
-        2. Extract and sort events chronologically
-        3. For each event:
-           - Include the exact source from search_nodes
-           - Include any temporal relationships from search_facts
-        
-        Format your response as:
-        Timeline:
-        [Date/Time] Event/Change/Update
-        Source: [Exact source details from the tool result]
-        
-        Important:
-        - Sort from earliest to latest
-        - Only include dated information
-        - Use exact source details from the tools
-        - Do not infer or assume source information
-        """ 
\ No newline at end of file
+        suffix = cls.get_query_suffix(query, doc_types=doc_types)
+        return f"{cls.get_system_prefix('timeline')}\n\n{suffix}"
+
+    @classmethod
+    def get_direct_synthesis_prompt(
+        cls,
+        query: str,
+        nodes: str,
+        facts: str,
+        doc_types: Optional[List[str]] = None
+    ) -> str:
+        """Generate a prompt answering from search results retrieved up front (no tool calls)."""
+        suffix = cls.get_query_suffix(
+            query, results=cls.format_results(nodes, facts), doc_types=doc_types
+        )
+        return f"{cls.get_system_prefix('direct_synthesis')}\n\n{suffix}"
+
+    @classmethod
+    def get_detailed_synthesis_prompt(
+        cls,
+        query: str,
+        nodes: str,
+        facts: str,
+        episodes: str = "",
+        doc_types: Optional[List[str]] = None
+    ) -> str:
+        """Generate a detailed prompt answering from search results retrieved up front (no tool calls)."""
+        suffix = cls.get_query_suffix(
+            query, results=cls.format_results(nodes, facts, episodes), doc_types=doc_types
+        )
+        return f"{cls.get_system_prefix('detailed_synthesis')}\n\n{suffix}"
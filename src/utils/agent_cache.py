@@ -0,0 +1,168 @@
+import asyncio
+import hashlib
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Callable, Dict, Hashable, List, Tuple
+
+from src.config.settings import OPENAI_API_KEY, AGENT_CACHE_SIZE
+
+if TYPE_CHECKING:
+    # langchain_openai and langgraph take about two seconds to import; they are
+    # only loaded once a model or agent is actually created
+    from langchain_core.tools import BaseTool
+    from langchain_openai import ChatOpenAI
+
+class CompiledAgentCache:
+    """Bounded LRU cache of compiled LangGraph agents."""
+    
+    def __init__(self, max_size: int = AGENT_CACHE_SIZE):
+        """Initialize the cache.
+        
+        Args:
+            max_size: Maximum number of compiled agents to keep
+        """
+        self.max_size = max(1, max_size)
+        self.hits = 0
+        self.misses = 0
+        self._agents: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._locks: Dict[Hashable, asyncio.Lock] = {}
+    
+    @staticmethod
+    def make_key(
+        model_name: str,
+        streaming: bool,
+        prompt: str,
+        tools: List["BaseTool"]
+    ) -> Tuple:
+        """Build a cache key for an agent configuration.
+        
+        Args:
+            model_name: LLM model name
+            streaming: Whether the LLM streams tokens
+            prompt: System prompt the agent is compiled with
+            tools: Tools bound to the agent
+            
+        Returns:
+            Hashable cache key
+        """
+        prompt_hash = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+        # Tool identity matters: tools from a recreated MCP pool must not reuse old graphs
+        tool_set = tuple(sorted((tool.name, id(tool)) for tool in tools))
+        return (model_name, streaming, prompt_hash, tool_set)
+    
+    async def get_or_create(self, key: Hashable, factory: Callable[[], Any]) -> Any:
+        """Return the cached agent for a key, compiling it once if missing.
+        
+        Args:
+            key: Cache key from make_key()
+            factory: Callable that builds the compiled agent
+            
+        Returns:
+            Compiled agent
+        """
+        agent = self._agents.get(key)
+        if agent is not None:
+            self._agents.move_to_end(key)
+            self.hits += 1
+            return agent
+        
+        # Concurrent misses for the same key wait for a single compilation
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            agent = self._agents.get(key)
+            if agent is None:
+                self.misses += 1
+                agent = factory()
+                self._agents[key] = agent
+                while len(self._agents) > self.max_size:
+                    evicted, _ = self._agents.popitem(last=False)
+                    self._locks.pop(evicted, None)
+            else:
+                self.hits += 1
+            self._agents.move_to_end(key)
+        return agent
+    
+    def stats(self) -> Dict[str, int]:
+        """Get cache size and hit/miss counters.
+        
+        Returns:
+            Dict of cache statistics
+        """
+        return {
+            "size": len(self._agents),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses
+        }
+    
+    def clear(self) -> None:
+        """Drop all cached agents."""
+        self._agents.clear()
+        self._locks.clear()
+
+# Global agent cache instance
+_agent_cache = CompiledAgentCache()
+
+def get_agent_cache() -> CompiledAgentCache:
+    """Get the global compiled agent cache.
+    
+    Returns:
+        Global CompiledAgentCache instance
+    """
+    return _agent_cache
+
+# Chat models shared by direct (tool-less) LLM calls, keyed by (model, streaming)
+_chat_models: Dict[Tuple[str, bool], "ChatOpenAI"] = {}
+
+def get_chat_model(model_name: str, streaming: bool = False) -> "ChatOpenAI":
+    """Get a shared chat model for calls made outside a compiled agent.
+    
+    Args:
+        model_name: LLM model name
+        streaming: Whether the LLM should stream tokens to run-config callbacks
+        
+    Returns:
+        ChatOpenAI instance shared by all callers with the same configuration
+    """
+    key = (model_name, streaming)
+    llm = _chat_models.get(key)
+    if llm is None:
+        from langchain_openai import ChatOpenAI
+        llm = _chat_models[key] = ChatOpenAI(
+            model=model_name,
+            api_key=OPENAI_API_KEY,
+            streaming=streaming,
+            stream_usage=streaming
+        )
+    return llm
+
+async def get_compiled_agent(
+    model_name: str,
+    tools: List["BaseTool"],
+    prompt: str,
+    streaming: bool = False
+) -> Any:
+    """Get a compiled ReAct agent for a model, streaming mode, prompt and tool set.
+    
+    Args:
+        model_name: LLM model name
+        tools: Tools to bind to the agent
+        prompt: System prompt for the agent
+        streaming: Whether the LLM should stream tokens to run-config callbacks
+        
+    Returns:
+        Compiled LangGraph agent shared by all callers with the same configuration
+    """
+    def build():
+        from langchain_openai import ChatOpenAI
+        from langgraph.prebuilt import create_react_agent
+        llm = ChatOpenAI(
+            model=model_name,
+            api_key=OPENAI_API_KEY,
+            streaming=streaming,
+            # Streamed responses only report token usage when asked to
+            stream_usage=streaming
+        )
+        return create_react_agent(llm, tools, prompt=prompt)
+    
+    key = CompiledAgentCache.make_key(model_name, streaming, prompt, tools)
+    return await _agent_cache.get_or_create(key, build)
@@ -0,0 +1,199 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from src.config.settings import (
+    ANSWER_CACHE_SIZE,
+    ANSWER_CACHE_TTL,
+    ANSWER_CACHE_GENERATION_REFRESH
+)
+from src.utils.document_index import DocumentIndex, get_document_index
+
+logger = logging.getLogger(__name__)
+
+def normalize_query(query: str) -> str:
+    """Normalize a query for cache lookups (case, whitespace and trailing punctuation)."""
+    return " ".join(query.lower().split()).rstrip("?!. ")
+
+class AnswerCache:
+    """Bounded LRU cache of search answers with TTL expiry.
+    
+    Every entry remembers the graph generation it was computed against. Bumping
+    the generation (done after each ingestion that stored episodes) makes all
+    older entries stale without having to scan the cache. With a document
+    index, the generation is shared through its database: refresh() re-reads
+    it in a thread at most every ``refresh_interval`` seconds, so an ingestion
+    in any worker process or in the ingest CLI invalidates the answers cached
+    by all of them within that interval. get(), set() and stats() only use
+    the in-memory copy and never touch the database.
+    """
+    
+    def __init__(
+        self,
+        max_size: int = ANSWER_CACHE_SIZE,
+        ttl: float = ANSWER_CACHE_TTL,
+        index: Optional[DocumentIndex] = None,
+        refresh_interval: float = ANSWER_CACHE_GENERATION_REFRESH
+    ):
+        """Initialize the cache.
+        
+        Args:
+            max_size: Maximum number of cached answers
+            ttl: Seconds an answer stays valid (0 disables expiry)
+            index: Document index holding the shared graph generation (None
+                keeps the generation in this process only)
+            refresh_interval: Minimum seconds between reads of the shared generation
+        """
+        self.max_size = max(1, max_size)
+        self.ttl = ttl
+        self.index = index
+        self.refresh_interval = refresh_interval
+        self._generation = 0
+        self._refreshed_at: Optional[float] = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[Tuple, Tuple[str, int, float]]" = OrderedDict()
+    
+    @property
+    def generation(self) -> int:
+        """Graph generation as of the last refresh; entries from older generations are dropped."""
+        return self._generation
+    
+    def _adopt(self, generation: int) -> None:
+        """Switch to a generation read from the index, dropping older entries."""
+        self._refreshed_at = time.monotonic()
+        if generation != self._generation:
+            self._generation = generation
+            self._entries.clear()
+    
+    async def refresh(self) -> int:
+        """Re-read the shared generation if the last read is older than the refresh interval.
+        
+        The read runs in a thread. If it fails, the cache keeps the generation
+        it has and tries again on the next call.
+        
+        Returns:
+            The current generation
+        """
+        if self.index is None:
+            return self._generation
+        if self._refreshed_at is not None and time.monotonic() - self._refreshed_at < self.refresh_interval:
+            return self._generation
+        try:
+            self._adopt(await asyncio.to_thread(self.index.generation))
+        except Exception as e:
+            logger.warning("Could not read the graph generation: %s", e)
+        return self._generation
+    
+    @staticmethod
+    def make_key(
+        query: str,
+        doc_types: Optional[List[str]],
+        search_type: str,
+        include_relationships: bool,
+        model_name: str
+    ) -> Tuple:
+        """Build a cache key for a search request.
+        
+        Args:
+            query: Search query
+            doc_types: Optional list of document types to filter by
+            search_type: Type of search
+            include_relationships: Whether relationships are included
+            model_name: LLM model name
+            
+        Returns:
+            Hashable cache key
+        """
+        return (
+            normalize_query(query),
+            tuple(sorted(doc_types)) if doc_types else (),
+            search_type,
+            include_relationships,
+            model_name
+        )
+    
+    def get(self, key: Tuple) -> Optional[str]:
+        """Get a fresh cached answer.
+        
+        Args:
+            key: Cache key from make_key()
+            
+        Returns:
+            Cached answer, or None on a miss
+        """
+        current = self.generation
+        entry = self._entries.get(key)
+        if entry is not None:
+            answer, generation, expires_at = entry
+            if generation == current and (not self.ttl or time.monotonic() < expires_at):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return answer
+            del self._entries[key]
+        self.misses += 1
+        return None
+    
+    def set(self, key: Tuple, answer: str, generation: Optional[int] = None) -> None:
+        """Store an answer.
+        
+        Args:
+            key: Cache key from make_key()
+            answer: Answer text to cache
+            generation: Graph generation the answer was computed against; pass the
+                value read before the search started so an ingestion finishing
+                mid-search is not masked (defaults to the current generation)
+        """
+        current = self.generation
+        generation = current if generation is None else generation
+        if generation != current:
+            return
+        self._entries[key] = (answer, generation, time.monotonic() + self.ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+    
+    async def bump_generation(self) -> int:
+        """Invalidate every cached answer after the knowledge graph changed.
+        
+        The shared generation is updated in a thread.
+        
+        Returns:
+            The new generation
+        """
+        if self.index is not None:
+            self._adopt(await asyncio.to_thread(self.index.bump_generation))
+        else:
+            self._generation += 1
+        self._entries.clear()
+        return self._generation
+    
+    def stats(self) -> Dict[str, int]:
+        """Get cache size, generation and hit/miss counters.
+        
+        Returns:
+            Dict of cache statistics
+        """
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "generation": self.generation,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions
+        }
+
+# Global answer cache instance
+_answer_cache = AnswerCache(index=get_document_index())
+
+def get_answer_cache() -> AnswerCache:
+    """Get the global answer cache.
+    
+    Returns:
+        Global AnswerCache instance
+    """
+    return _answer_cache
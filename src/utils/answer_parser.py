@@ -0,0 +1,209 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+# Line prefixes the search prompts use around the answer text
+_ANSWER = "Answer:"
+_SOURCE = "Source:"
+_SOURCES = "Sources:"
+_MARKERS = (_ANSWER, _SOURCE, _SOURCES)
+
+# What the parser is doing with the current line
+_UNDECIDED = 0  # could still turn out to start with a marker; held back
+_TEXT = 1       # answer text, emitted as it arrives
+_CITATION = 2   # a "Source:" line or an item of a "Sources:" section
+
+def parse_citation(text: str) -> Optional[Dict[str, Optional[str]]]:
+    """Parse one ``Document | Date | Section`` citation (brackets optional).
+
+    Args:
+        text: Citation text
+
+    Returns:
+        Dict with document, date and section (missing parts are None), or
+        None if the text is empty
+    """
+    parts = [part.strip() for part in text.strip().strip("[]").split("|")]
+    if not parts[0]:
+        return None
+    return {
+        "document": parts[0],
+        "date": (parts[1] or None) if len(parts) > 1 else None,
+        "section": (parts[2] or None) if len(parts) > 2 else None
+    }
+
+class AnswerParser:
+    """Incremental parser for the Answer/Source format of the search prompts.
+
+    Tokens are fed as they arrive and turned into events: ``("token", text)``
+    for answer text with the ``Answer:`` prefix stripped, and
+    ``("citation", citation)`` as soon as each ``[Doc | Date | Section]``
+    closes. Citations come from ``Source:`` lines (focused, direct and
+    timeline answers, one per line and possibly several) and from the items
+    of a ``Sources:`` section (detailed answers). Only the current line is
+    buffered, so nothing already parsed is scanned again.
+    """
+
+    def __init__(self):
+        self._state = _UNDECIDED
+        self._line = ""          # held text of an undecided line, or the citation line so far
+        self._in_sources = False
+        self._line_cited = False
+        self._skip_space = False
+        self._started = False
+        self._newlines = 0       # line breaks owed before the next answer text
+        self._answer: List[str] = []
+        self.citations: List[Dict[str, Optional[str]]] = []
+
+    @property
+    def answer(self) -> str:
+        """Answer text parsed so far."""
+        return "".join(self._answer).strip()
+
+    def _text(self, events: List[Tuple[str, Any]], text: str) -> None:
+        """Emit answer text, preceded by any line breaks it is owed."""
+        if self._skip_space:
+            text = text.lstrip(" \t")
+            self._skip_space = not text
+        if not self._started:
+            text = text.lstrip()
+            if not text:
+                return
+            self._started = True
+            self._newlines = 0
+        elif text and self._newlines:
+            text = "\n" * self._newlines + text
+            self._newlines = 0
+        if not text:
+            return
+        self._answer.append(text)
+        if events and events[-1][0] == "token":
+            events[-1] = ("token", events[-1][1] + text)
+        else:
+            events.append(("token", text))
+
+    def _cite(self, events: List[Tuple[str, Any]], text: str) -> None:
+        """Emit a citation parsed from ``text``."""
+        citation = parse_citation(text)
+        if citation is not None:
+            self._line_cited = True
+            self.citations.append(citation)
+            events.append(("citation", citation))
+
+    def _decide(self, events: List[Tuple[str, Any]], at_end: bool) -> None:
+        """Classify the held start of a line once it can no longer become another marker."""
+        head = self._line.lstrip()
+        if self._in_sources:
+            # Lines of a Sources section are only classified once complete
+            self._state = _CITATION
+            return
+        if not at_end and any(marker.startswith(head) for marker in _MARKERS):
+            return
+        if head.startswith(_SOURCES):
+            self._in_sources = True
+            self._state = _CITATION
+            self._line = head[len(_SOURCES):]
+        elif head.startswith(_SOURCE):
+            self._state = _CITATION
+            self._line = head[len(_SOURCE):]
+        elif head.startswith(_ANSWER):
+            self._state = _TEXT
+            self._line = ""
+            self._skip_space = True
+            self._text(events, head[len(_ANSWER):])
+        else:
+            self._state = _TEXT
+            line, self._line = self._line, ""
+            self._text(events, line)
+
+    def _start_line(self, events: List[Tuple[str, Any]], at_end: bool) -> None:
+        """Try to classify the held start of a line and route it accordingly."""
+        self._decide(events, at_end)
+        if self._state == _CITATION and self._line:
+            line, self._line = self._line, ""
+            self._citation_chars(events, line)
+
+    def _citation_chars(self, events: List[Tuple[str, Any]], chunk: str) -> None:
+        """Add text to a citation line, emitting every bracket group as it closes."""
+        start = len(self._line)
+        self._line += chunk
+        while True:
+            close = self._line.find("]", start)
+            if close < 0:
+                return
+            open_ = self._line.rfind("[", 0, close)
+            if open_ >= 0:
+                self._cite(events, self._line[open_ + 1:close])
+            self._line = self._line[close + 1:]
+            start = 0
+
+    def _end_line(self, events: List[Tuple[str, Any]]) -> None:
+        """Finish the current line at a line break or at the end of the answer."""
+        if self._state == _UNDECIDED:
+            if self._line.strip():
+                self._start_line(events, at_end=True)
+            elif self._started:
+                self._newlines += 1
+        if self._state == _CITATION:
+            rest = self._line.strip()
+            if not self._line_cited and rest and not rest.endswith(":"):
+                if self._in_sources and not rest.startswith(("-", "*")):
+                    # Plain text after a Sources section is answer text again
+                    self._in_sources = False
+                    self._text(events, rest)
+                    self._newlines += 1
+                else:
+                    self._cite(events, rest.lstrip("-* "))
+        elif self._state == _TEXT:
+            self._newlines += 1
+        self._state = _UNDECIDED
+        self._line = ""
+        self._line_cited = False
+        self._skip_space = False
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        """Consume the next piece of the answer.
+
+        Args:
+            chunk: Next token or frame of the LLM output
+
+        Returns:
+            Events completed by this chunk, with adjacent text merged into one
+            ``("token", text)`` event
+        """
+        events: List[Tuple[str, Any]] = []
+        lines = chunk.split("\n")
+        for index, piece in enumerate(lines):
+            if piece:
+                if self._state == _UNDECIDED:
+                    self._line += piece
+                    self._start_line(events, at_end=False)
+                elif self._state == _TEXT:
+                    self._text(events, piece)
+                else:
+                    self._citation_chars(events, piece)
+            if index < len(lines) - 1:
+                self._end_line(events)
+        return events
+
+    def finish(self) -> List[Tuple[str, Any]]:
+        """Flush the last line once the answer is complete.
+
+        Returns:
+            Events completed by the end of the answer
+        """
+        events: List[Tuple[str, Any]] = []
+        self._end_line(events)
+        return events
+
+def parse_answer(text: str) -> Tuple[str, List[Dict[str, Optional[str]]]]:
+    """Split a complete response into its answer text and citations.
+
+    Args:
+        text: Full LLM response in the Answer/Source format
+
+    Returns:
+        Tuple of the answer without the ``Answer:`` prefix and the citations
+    """
+    parser = AnswerParser()
+    parser.feed(text)
+    parser.finish()
+    return parser.answer, parser.citations
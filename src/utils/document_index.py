@@ -0,0 +1,208 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from src.config.settings import INGEST_INDEX_DB
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS ingested_documents (
+    sha256 TEXT PRIMARY KEY,
+    filename TEXT,
+    model TEXT NOT NULL,
+    episodes TEXT NOT NULL,
+    summary TEXT,
+    ingested_at REAL NOT NULL
+)
+"""
+
+# Single-row counter bumped whenever ingestion changes the graph, shared by
+# every process using the index
+_GENERATION_SCHEMA = """
+CREATE TABLE IF NOT EXISTS graph_generation (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    generation INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO graph_generation (id, generation) VALUES (0, 0);
+"""
+
+_COLUMNS = ("sha256", "filename", "model", "episodes", "summary", "ingested_at")
+
+def hash_file(file_path: str, chunk_size: int = 1024 * 1024) -> str:
+    """Compute the SHA-256 of a file's contents.
+    
+    Args:
+        file_path: Path of the file to hash
+        chunk_size: Bytes read per chunk
+        
+    Returns:
+        Hex digest
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class DocumentIndex:
+    """Content-addressed index of documents already ingested into the graph.
+    
+    Maps the SHA-256 of a document's bytes to the episodes it produced, the
+    model used and the summary, so re-uploads can be answered without running
+    the ingestion agent again. Purging an entry only forgets it locally; the
+    episodes stay in Graphiti. Methods are thread-safe so callers can run
+    them off the event loop.
+    """
+    
+    def __init__(self, db_path: str = INGEST_INDEX_DB):
+        """Initialize the index.
+        
+        Args:
+            db_path: Path of the SQLite database file
+        """
+        self.db_path = db_path
+        # Serializes use of the connection, which callers may reach from threads
+        self._lock = threading.RLock()
+        self._conn: Optional[sqlite3.Connection] = None
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database on first use."""
+        if self._conn is None:
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.db_path, isolation_level=None, check_same_thread=False)
+            self._conn.row_factory = sqlite3.Row
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(_SCHEMA)
+            self._conn.executescript(_GENERATION_SCHEMA)
+        return self._conn
+    
+    @staticmethod
+    def _to_entry(row: sqlite3.Row) -> Dict[str, Any]:
+        """Convert a database row to an entry dict."""
+        entry = dict(row)
+        entry["episodes"] = json.loads(entry["episodes"])
+        return entry
+    
+    def lookup(self, sha256: str) -> Optional[Dict[str, Any]]:
+        """Find a previously ingested document by content hash.
+        
+        Args:
+            sha256: Hex SHA-256 of the document bytes
+            
+        Returns:
+            Entry dict, or None if the content has not been ingested
+        """
+        with self._lock:
+            row = self._connect().execute(
+                f"SELECT {', '.join(_COLUMNS)} FROM ingested_documents WHERE sha256 = ?", (sha256,)
+            ).fetchone()
+        return self._to_entry(row) if row is not None else None
+    
+    def record(
+        self,
+        sha256: str,
+        filename: Optional[str],
+        model: str,
+        episodes: List[str],
+        summary: str
+    ) -> None:
+        """Record a successful ingestion, replacing any previous entry.
+        
+        Args:
+            sha256: Hex SHA-256 of the document bytes
+            filename: Name of the ingested file
+            model: LLM model used for ingestion
+            episodes: Names or IDs of the episodes stored for the document
+            summary: Summary returned by the ingestion agent
+        """
+        with self._lock:
+            self._connect().execute(
+                f"INSERT OR REPLACE INTO ingested_documents ({', '.join(_COLUMNS)}) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (sha256, filename, model, json.dumps(episodes), summary, time.time())
+            )
+    
+    def list_entries(self, limit: int = 100, offset: int = 0) -> List[Dict[str, Any]]:
+        """List indexed documents, most recently ingested first.
+        
+        Args:
+            limit: Maximum number of entries to return
+            offset: Number of entries to skip
+            
+        Returns:
+            List of entry dicts
+        """
+        with self._lock:
+            rows = self._connect().execute(
+                f"SELECT {', '.join(_COLUMNS)} FROM ingested_documents "
+                "ORDER BY ingested_at DESC LIMIT ? OFFSET ?",
+                (limit, offset)
+            ).fetchall()
+        return [self._to_entry(row) for row in rows]
+    
+    def count(self) -> int:
+        """Get the number of indexed documents."""
+        with self._lock:
+            return self._connect().execute("SELECT COUNT(*) FROM ingested_documents").fetchone()[0]
+    
+    def purge(self, sha256: Optional[str] = None) -> int:
+        """Remove one entry, or every entry when no hash is given.
+        
+        Args:
+            sha256: Hex SHA-256 of the entry to remove
+            
+        Returns:
+            Number of entries removed
+        """
+        with self._lock:
+            if sha256 is None:
+                cursor = self._connect().execute("DELETE FROM ingested_documents")
+            else:
+                cursor = self._connect().execute(
+                    "DELETE FROM ingested_documents WHERE sha256 = ?", (sha256,)
+                )
+            return cursor.rowcount
+
+    def generation(self) -> int:
+        """Get the graph generation, as last bumped by any process."""
+        with self._lock:
+            return self._connect().execute(
+                "SELECT generation FROM graph_generation WHERE id = 0"
+            ).fetchone()[0]
+    
+    def bump_generation(self) -> int:
+        """Record that ingestion changed the graph.
+        
+        Returns:
+            The new generation
+        """
+        with self._lock:
+            conn = self._connect()
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                conn.execute("UPDATE graph_generation SET generation = generation + 1 WHERE id = 0")
+                generation = conn.execute(
+                    "SELECT generation FROM graph_generation WHERE id = 0"
+                ).fetchone()[0]
+                conn.execute("COMMIT")
+            except BaseException:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                raise
+        return generation
+
+# Global document index instance
+_document_index = DocumentIndex()
+
+def get_document_index() -> DocumentIndex:
+    """Get the global document index.
+    
+    Returns:
+        Global DocumentIndex instance
+    """
+    return _document_index
@@ -0,0 +1,100 @@
+import json
+from collections import OrderedDict
+from typing import Any, Dict, List
+
+# Result lists Graphiti's MCP tools return, keyed by the JSON field they use
+GRAPH_SECTIONS = ("nodes", "facts", "episodes")
+
+def _strip_embeddings(item: Dict[str, Any]) -> Dict[str, Any]:
+    """Drop embedding vectors, which only cost prompt tokens."""
+    return {k: v for k, v in item.items() if not k.endswith("embedding")}
+
+def _parse(content: Any) -> Any:
+    """Parse JSON text, leaving anything else unchanged."""
+    if isinstance(content, str):
+        try:
+            return json.loads(content)
+        except ValueError:
+            pass
+    return content
+
+class GraphContext:
+    """Knowledge graph results merged from several tool calls.
+
+    Nodes, facts and episodes are deduplicated by UUID, keeping the first
+    occurrence, so overlapping searches contribute each item once. Output that
+    is not Graphiti's JSON shape is kept verbatim.
+    """
+
+    def __init__(self):
+        self.sections: Dict[str, "OrderedDict[str, Dict[str, Any]]"] = {
+            section: OrderedDict() for section in GRAPH_SECTIONS
+        }
+        self.raw: List[str] = []
+        self.duplicates = 0
+
+    def add(self, content: Any) -> None:
+        """Merge one tool call's output.
+
+        Args:
+            content: Tool output (JSON text, a list of text parts, or parsed JSON)
+        """
+        content = _parse(content)
+        if isinstance(content, list):
+            items = [_parse(part) for part in content]
+            if items and all(
+                isinstance(item, dict) and not any(s in item for s in GRAPH_SECTIONS)
+                for item in items
+            ):
+                # get_episodes returns a bare list of episodes
+                content = {"episodes": items}
+            else:
+                for item in items:
+                    self.add(item)
+                return
+        if isinstance(content, str):
+            if content.strip():
+                self.raw.append(content.strip())
+            return
+        if not isinstance(content, dict) or not any(s in content for s in GRAPH_SECTIONS):
+            self.raw.append(json.dumps(content, default=str))
+            return
+
+        for section in GRAPH_SECTIONS:
+            for item in content.get(section) or []:
+                if not isinstance(item, dict):
+                    self.raw.append(str(item))
+                    continue
+                key = item.get("uuid") or json.dumps(item, sort_keys=True, default=str)
+                if key in self.sections[section]:
+                    self.duplicates += 1
+                else:
+                    self.sections[section][key] = _strip_embeddings(item)
+
+    def format(self, section: str) -> str:
+        """Render one section as one JSON object per line for a prompt.
+
+        Args:
+            section: One of "nodes", "facts" or "episodes"
+
+        Returns:
+            Formatted items, or an empty string if there are none
+        """
+        return "\n".join(
+            json.dumps(item, default=str) for item in self.sections[section].values()
+        )
+
+    def format_raw(self) -> str:
+        """Render output that could not be merged."""
+        return "\n".join(self.raw)
+
+    def counts(self) -> Dict[str, int]:
+        """Get the number of unique items per section and of dropped duplicates.
+
+        Returns:
+            Dict of item counts
+        """
+        counts = {section: len(items) for section, items in self.sections.items()}
+        counts["raw"] = len(self.raw)
+        counts["duplicates"] = self.duplicates
+        return counts
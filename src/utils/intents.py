@@ -0,0 +1,108 @@
+import re
+from typing import Dict, List, Optional, Pattern
+
+# Words that may accompany small talk without turning it into a question
+_FILLER = r"(?:there|all|everyone|again|so much|very much|a lot|agent|noob agent|bot)"
+
+class Intent:
+    """A small-talk intent answered from a template instead of the agent."""
+
+    def __init__(self, name: str, pattern: str, answer: str):
+        """Initialize the intent.
+
+        Args:
+            name: Intent name reported with the answer
+            pattern: Regular expression that must match the whole normalized query
+            answer: Templated answer, in the agent's "Answer: ..." format
+        """
+        self.name = name
+        self.pattern: Pattern = re.compile(pattern)
+        self.answer = answer
+
+    def matches(self, normalized_query: str) -> bool:
+        """Whether the normalized query consists only of this intent."""
+        return self.pattern.fullmatch(normalized_query) is not None
+
+class IntentClassifier:
+    """Local classifier routing small talk away from the agent.
+
+    A query only matches an intent when the whole query is small talk, so
+    "hi" in "this" or a greeting followed by a real question still goes to
+    the agent. Intents are tried in registration order.
+    """
+
+    def __init__(self):
+        self._intents: List[Intent] = []
+
+    @staticmethod
+    def normalize(query: str) -> str:
+        """Lower-case a query, drop punctuation and collapse whitespace."""
+        return " ".join(re.sub(r"[^\w\s']", " ", query.lower()).split())
+
+    def register(self, intent: Intent) -> None:
+        """Add an intent, replacing any existing one with the same name.
+
+        Args:
+            intent: Intent to register
+        """
+        self._intents = [i for i in self._intents if i.name != intent.name]
+        self._intents.append(intent)
+
+    def classify(self, query: str) -> Optional[Intent]:
+        """Find the intent a query expresses.
+
+        Args:
+            query: Raw user query
+
+        Returns:
+            Matching Intent, or None if the query needs the agent
+        """
+        normalized = self.normalize(query)
+        for intent in self._intents:
+            if intent.matches(normalized):
+                return intent
+        return None
+
+    @property
+    def intents(self) -> Dict[str, Intent]:
+        """Registered intents keyed by name."""
+        return {intent.name: intent for intent in self._intents}
+
+def _phrases(*phrases: str) -> str:
+    """Build a pattern matching one or more of the phrases, optionally with filler."""
+    alternatives = "|".join(phrases)
+    return rf"(?:(?:{alternatives})(?: {_FILLER})?)(?: (?:{alternatives})(?: {_FILLER})?)*"
+
+# Global intent classifier instance
+_intent_classifier = IntentClassifier()
+_intent_classifier.register(Intent(
+    "empty",
+    r"",
+    "Answer: Please enter a question and I'll search the knowledge graph for you."
+))
+_intent_classifier.register(Intent(
+    "greeting",
+    _phrases(
+        "hi", "hello", "hey", "hiya", "howdy", "greetings", "yo",
+        "good (?:morning|afternoon|evening)",
+        "what's up", "whats up", "sup",
+        "how are you(?: doing)?(?: today)?", "how's it going", "hows it going"
+    ),
+    "Answer: Hello! I'm your Noob Agent. How can I help you today?"
+))
+_intent_classifier.register(Intent(
+    "thanks",
+    # Acknowledgements like "ok" or "great" alone may be a reply to a question
+    # the agent asked, so they only count when followed by actual thanks
+    rf"(?:(?:ok|okay|great|awesome|perfect|cool) )*"
+    + _phrases("thanks", "thank you", "thx", "ty", "cheers", "much appreciated"),
+    "Answer: You're welcome! Let me know if there's anything else I can help with."
+))
+
+def get_intent_classifier() -> IntentClassifier:
+    """Get the global intent classifier.
+
+    Returns:
+        Global IntentClassifier instance
+    """
+    return _intent_classifier
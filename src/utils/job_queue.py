@@ -0,0 +1,376 @@
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from uuid import uuid4
+
+from src.data_Ingestion.agent import DataIngestionAgent
+from src.config.settings import (
+    DEFAULT_MODEL,
+    INGEST_MODE,
+    INGEST_WORKERS,
+    INGEST_JOB_DB,
+    INGEST_JOB_DB_TIMEOUT,
+    INGEST_JOB_POLL_INTERVAL
+)
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS ingestion_jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    phase TEXT,
+    file_path TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    model TEXT NOT NULL,
+    mode TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    timings TEXT,
+    summary TEXT,
+    error TEXT,
+    owner_pid INTEGER,
+    content_hash TEXT,
+    force INTEGER NOT NULL DEFAULT 0
+)
+"""
+
+# Columns added since the table was first created, added to older databases on open
+_MIGRATIONS = (
+    ("content_hash", "TEXT"),
+    ("force", "INTEGER NOT NULL DEFAULT 0"),
+)
+
+# Attempts at storing a job's outcome before leaving it to restart recovery
+_FINISH_ATTEMPTS = 5
+# First delay after a database error; doubles per consecutive error up to the poll interval
+_RETRY_DELAY = 0.25
+
+_COLUMNS = (
+    "id", "status", "phase", "file_path", "filename", "model", "mode",
+    "created_at", "started_at", "finished_at", "timings", "summary", "error"
+)
+
+def _process_alive(pid: Optional[int]) -> bool:
+    """Check whether a process with the given PID exists on this host."""
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+class IngestionJobQueue:
+    """Persistent ingestion job queue served by a pool of asyncio workers.
+
+    Jobs are stored in a local SQLite database, so queued work survives a
+    restart: jobs left running by a previous process are re-queued on start.
+    Each worker keeps its own DataIngestionAgent per model and reuses it
+    across jobs. Workers run database statements in a thread and survive
+    database errors: they log them, back off and carry on.
+    """
+
+    def __init__(
+        self,
+        db_path: str = INGEST_JOB_DB,
+        workers: int = INGEST_WORKERS,
+        poll_interval: float = INGEST_JOB_POLL_INTERVAL,
+        timeout: float = INGEST_JOB_DB_TIMEOUT
+    ):
+        """Initialize the queue.
+
+        Args:
+            db_path: Path of the SQLite database file
+            workers: Number of worker tasks
+            poll_interval: Seconds an idle worker waits before re-checking the database
+            timeout: Seconds a statement waits for another process's lock before failing
+        """
+        self.db_path = db_path
+        self.workers = max(1, workers)
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        # Serializes use of the connection by worker threads and request handlers
+        self._lock = threading.RLock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+
+    @property
+    def running(self) -> bool:
+        """Whether the worker tasks are running."""
+        return bool(self._tasks)
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database on first use."""
+        if self._conn is None:
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(
+                self.db_path, timeout=self.timeout, isolation_level=None, check_same_thread=False
+            )
+            self._conn.row_factory = sqlite3.Row
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(_SCHEMA)
+            existing = {row["name"] for row in self._conn.execute("PRAGMA table_info(ingestion_jobs)")}
+            for column, definition in _MIGRATIONS:
+                if column not in existing:
+                    self._conn.execute(f"ALTER TABLE ingestion_jobs ADD COLUMN {column} {definition}")
+        return self._conn
+
+    async def start(self) -> None:
+        """Recover interrupted jobs and start the worker tasks."""
+        if self._tasks:
+            return
+        await asyncio.to_thread(self._recover)
+        self._wakeup = asyncio.Event()
+        self._tasks = [
+            asyncio.create_task(self._worker(), name=f"ingestion-worker-{i}")
+            for i in range(self.workers)
+        ]
+
+    def _recover(self) -> None:
+        """Re-queue jobs left running by a process that is gone."""
+        with self._lock:
+            conn = self._connect()
+            # Only recover jobs whose owning process is gone; other workers on this
+            # host may share the database
+            running = conn.execute(
+                "SELECT id, owner_pid FROM ingestion_jobs WHERE status = 'running'"
+            ).fetchall()
+            for row in running:
+                if row["owner_pid"] == os.getpid() or not _process_alive(row["owner_pid"]):
+                    conn.execute(
+                        "UPDATE ingestion_jobs SET status = 'queued', phase = NULL WHERE id = ?",
+                        (row["id"],)
+                    )
+
+    async def stop(self) -> None:
+        """Stop the workers. Jobs they were running are re-queued on next start."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def enqueue(
+        self,
+        file_path: str,
+        filename: str,
+        model: Optional[str] = None,
+        mode: str = INGEST_MODE,
+        content_hash: Optional[str] = None,
+        force: bool = False
+    ) -> str:
+        """Add a spooled document to the queue.
+
+        Args:
+            file_path: Path of the spooled file; the queue deletes it when the job ends
+            filename: Original name of the uploaded file
+            model: Optional LLM model to use
+            mode: Ingestion mode passed to process_document
+            content_hash: SHA-256 of the file, if already computed
+            force: Ingest again even if the same content was already ingested
+
+        Returns:
+            ID of the new job
+        """
+        job_id = str(uuid4())
+        with self._lock:
+            self._connect().execute(
+                "INSERT INTO ingestion_jobs "
+                "(id, status, file_path, filename, model, mode, created_at, content_hash, force) "
+                "VALUES (?, 'queued', ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    job_id, file_path, filename, model or DEFAULT_MODEL, mode,
+                    time.time(), content_hash, int(force)
+                )
+            )
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return job_id
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get a job's current state.
+
+        Args:
+            job_id: ID returned by enqueue()
+
+        Returns:
+            Dict of job fields, or None if the job is unknown
+        """
+        with self._lock:
+            row = self._connect().execute(
+                f"SELECT {', '.join(_COLUMNS)} FROM ingestion_jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["timings"] = json.loads(job["timings"]) if job["timings"] else None
+        return job
+
+    def _claim_next(self) -> Optional[Dict[str, Any]]:
+        """Atomically move the oldest queued job to running."""
+        with self._lock:
+            conn = self._connect()
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                row = conn.execute(
+                    "SELECT id, file_path, filename, model, mode, content_hash, force FROM ingestion_jobs "
+                    "WHERE status = 'queued' ORDER BY created_at LIMIT 1"
+                ).fetchone()
+                if row is not None:
+                    conn.execute(
+                        "UPDATE ingestion_jobs SET status = 'running', started_at = ?, owner_pid = ? "
+                        "WHERE id = ?",
+                        (time.time(), os.getpid(), row["id"])
+                    )
+                conn.execute("COMMIT")
+            except BaseException:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                raise
+        return dict(row) if row is not None else None
+
+    def _set_phase(self, job_id: str, phase: str) -> None:
+        """Record the phase a running job has reached."""
+        with self._lock:
+            self._connect().execute(
+                "UPDATE ingestion_jobs SET phase = ? WHERE id = ?", (phase, job_id)
+            )
+
+    def _finish(self, job_id: str, result: Dict[str, Any]) -> None:
+        """Store the outcome of a job."""
+        with self._lock:
+            self._connect().execute(
+                "UPDATE ingestion_jobs SET status = ?, phase = NULL, finished_at = ?, "
+                "timings = ?, summary = ?, error = ? WHERE id = ?",
+                (
+                    "succeeded" if result["status"] == "success" else "failed",
+                    time.time(),
+                    json.dumps(result.get("timings")) if result.get("timings") else None,
+                    result.get("summary"),
+                    result.get("error"),
+                    job_id
+                )
+            )
+
+    def _retry_delay(self, failures: int) -> float:
+        """Seconds to back off after the given number of consecutive errors."""
+        return min(_RETRY_DELAY * 2 ** (failures - 1), max(self.poll_interval, _RETRY_DELAY))
+
+    def _phase_recorder(self, job_id: str) -> Tuple[Callable[[str], None], Callable[[], Awaitable[None]]]:
+        """Build an on_phase callback that records phases off the event loop.
+
+        Each write waits for the previous one, so phases land in order.
+
+        Returns:
+            The callback, and a coroutine function that waits for pending writes
+        """
+        last: List[Optional[asyncio.Task]] = [None]
+
+        async def write(phase: str, previous: Optional[asyncio.Task]) -> None:
+            if previous is not None:
+                await previous
+            try:
+                await asyncio.to_thread(self._set_phase, job_id, phase)
+            except Exception as e:
+                logger.warning("Could not record phase %r of job %s: %s", phase, job_id, e)
+
+        def on_phase(phase: str) -> None:
+            last[0] = asyncio.create_task(write(phase, last[0]))
+
+        async def drain() -> None:
+            if last[0] is not None:
+                await last[0]
+
+        return on_phase, drain
+
+    async def _run_job(self, job: Dict[str, Any], agents: Dict[str, DataIngestionAgent]) -> None:
+        """Process one claimed job, store its outcome and delete its spooled file."""
+        on_phase, drain = self._phase_recorder(job["id"])
+        try:
+            agent = agents.get(job["model"])
+            if agent is None:
+                agent = agents[job["model"]] = DataIngestionAgent(model_name=job["model"])
+            result = await agent.process_document(
+                job["file_path"],
+                mode=job["mode"],
+                on_phase=on_phase,
+                content_hash=job["content_hash"],
+                filename=job["filename"],
+                force=bool(job["force"])
+            )
+        except Exception as e:
+            result = {"status": "error", "error": str(e)}
+        finally:
+            await drain()
+
+        for attempt in range(1, _FINISH_ATTEMPTS + 1):
+            try:
+                await asyncio.to_thread(self._finish, job["id"], result)
+                break
+            except Exception as e:
+                logger.error(
+                    "Could not store the outcome of job %s (attempt %d/%d): %s",
+                    job["id"], attempt, _FINISH_ATTEMPTS, e
+                )
+                if attempt < _FINISH_ATTEMPTS:
+                    await asyncio.sleep(self._retry_delay(attempt))
+        else:
+            # The job stays running and is re-queued once this process is gone,
+            # so keep its file
+            return
+
+        try:
+            os.unlink(job["file_path"])
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning("Could not delete spooled file %s: %s", job["file_path"], e)
+
+    async def _worker(self) -> None:
+        """Pull jobs until cancelled, reusing one ingestion agent per model."""
+        agents: Dict[str, DataIngestionAgent] = {}
+        failures = 0
+        while True:
+            try:
+                # Clear before claiming so an enqueue racing with an empty claim is not lost
+                self._wakeup.clear()
+                job = await asyncio.to_thread(self._claim_next)
+                if job is None:
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                    except asyncio.TimeoutError:
+                        pass
+                else:
+                    await self._run_job(job, agents)
+                failures = 0
+            except Exception as e:
+                failures += 1
+                delay = self._retry_delay(failures)
+                logger.error("Ingestion worker error, retrying in %.2fs: %s", delay, e)
+                await asyncio.sleep(delay)
+
+# Global job queue instance
+_job_queue = IngestionJobQueue()
+
+def get_job_queue() -> IngestionJobQueue:
+    """Get the global ingestion job queue.
+
+    Returns:
+        Global IngestionJobQueue instance
+    """
+    return _job_queue
@@ -1,19 +1,361 @@
-from typing import Dict, Any
-from langchain_mcp_adapters.client import MultiServerMCPClient
-from src.config.settings import GRAPHITI_SERVER, MARKITDOWN_SERVER
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING, Dict, Any, List, Optional, AsyncIterator
 
-async def setup_mcp_client() -> MultiServerMCPClient:
+from src.config.settings import (
+    GRAPHITI_SERVER,
+    MARKITDOWN_SERVER,
+    MCP_POOL_SIZE,
+    MCP_CONNECT_TIMEOUT,
+    MCP_HEALTH_CHECK_INTERVAL,
+    MCP_RETRY_TOOLS
+)
+
+if TYPE_CHECKING:
+    # The MCP SDK, its LangChain adapters and langchain_core.tools (through
+    # langsmith) take about a second to import; they are only loaded once a
+    # connection is opened
+    from langchain_core.tools import BaseTool
+    from langchain_mcp_adapters.client import MultiServerMCPClient
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONNECTIONS: Dict[str, Dict[str, Any]] = {
+    "graphiti": GRAPHITI_SERVER,
+    "markitdown": MARKITDOWN_SERVER
+}
+
+async def setup_mcp_client() -> "MultiServerMCPClient":
     """Set up and return a configured MCP client."""
-    mcp_client = MultiServerMCPClient(
-        {
-            "graphiti": GRAPHITI_SERVER,
-            "markitdown": MARKITDOWN_SERVER
-        }
-    )
+    from langchain_mcp_adapters.client import MultiServerMCPClient
+    mcp_client = MultiServerMCPClient(DEFAULT_CONNECTIONS)
     await mcp_client.__aenter__()
     return mcp_client
 
-async def cleanup_mcp_client(client: MultiServerMCPClient) -> None:
+async def cleanup_mcp_client(client: "MultiServerMCPClient") -> None:
     """Clean up MCP client resources."""
     if client:
-        await client.__aexit__(None, None, None) 
\ No newline at end of file
+        await client.__aexit__(None, None, None)
+
+def _is_transport_error(error: Exception) -> bool:
+    """Whether a tool call failed because of its connection rather than the tool.
+
+    Args:
+        error: Exception raised by the call
+
+    Returns:
+        True for connection, closed-stream and timeout errors
+    """
+    import anyio
+    import httpx
+    from mcp.shared.exceptions import McpError
+    if isinstance(error, McpError):
+        # The SDK reports a request that got no answer in time as an McpError;
+        # any other McpError is the server's answer and would fail again
+        return error.error.code == httpx.codes.REQUEST_TIMEOUT
+    return isinstance(error, (
+        OSError,
+        TimeoutError,
+        httpx.TransportError,
+        anyio.ClosedResourceError,
+        anyio.BrokenResourceError,
+        anyio.EndOfStream
+    ))
+
+class MCPConnection:
+    """A single long-lived MCP client owned by a dedicated background task.
+
+    The MCP transports are anyio task groups that must be entered and exited
+    from the same task, so the client lives inside ``_run`` for its whole
+    lifetime and is only closed by signalling that task.
+    """
+
+    def __init__(self, connections: Dict[str, Dict[str, Any]]):
+        """Initialize the connection.
+
+        Args:
+            connections: MCP server configurations keyed by server name
+        """
+        self.connections = connections
+        self.client: Optional["MultiServerMCPClient"] = None
+        self.healthy = False
+        self.in_use = 0
+        self._task: Optional[asyncio.Task] = None
+        self._ready: Optional[asyncio.Future] = None
+        self._closing: Optional[asyncio.Event] = None
+
+    async def open(self, timeout: float = MCP_CONNECT_TIMEOUT) -> None:
+        """Connect to all configured servers and load their tools.
+
+        Args:
+            timeout: Maximum seconds to wait for the handshake
+        """
+        self._ready = asyncio.get_running_loop().create_future()
+        self._closing = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+        try:
+            await asyncio.wait_for(asyncio.shield(self._ready), timeout)
+        except BaseException:
+            await self.close()
+            raise
+
+    async def _run(self) -> None:
+        """Own the client context until the connection is closed or fails."""
+        try:
+            from langchain_mcp_adapters.client import MultiServerMCPClient
+            async with MultiServerMCPClient(self.connections) as client:
+                self.client = client
+                self.healthy = True
+                self._ready.set_result(None)
+                await self._closing.wait()
+        except Exception as e:
+            if not self._ready.done():
+                self._ready.set_exception(e)
+            else:
+                logger.warning("MCP connection lost: %s", e)
+        finally:
+            self.healthy = False
+            self.client = None
+            if not self._ready.done():
+                self._ready.cancel()
+
+    async def ping(self, timeout: float = MCP_CONNECT_TIMEOUT) -> bool:
+        """Check that every server session still answers.
+
+        Args:
+            timeout: Maximum seconds to wait for each ping
+
+        Returns:
+            True if all sessions responded, False otherwise
+        """
+        client = self.client
+        if not self.healthy or client is None:
+            return False
+        try:
+            for session in client.sessions.values():
+                await asyncio.wait_for(session.send_ping(), timeout)
+        except Exception as e:
+            logger.warning("MCP health check failed: %s", e)
+            self.healthy = False
+        return self.healthy
+
+    async def close(self) -> None:
+        """Close the client and wait for its owner task to finish."""
+        self.healthy = False
+        if self._closing is not None:
+            self._closing.set()
+        if self._task is not None:
+            if not self._ready.done():
+                # Still handshaking: abandon the attempt instead of waiting it out
+                self._task.cancel()
+            try:
+                await self._task
+            except BaseException:
+                pass
+            self._task = None
+
+class MCPConnectionPool:
+    """Process-wide pool of long-lived MCP connections.
+
+    Agents take their tools from ``get_tools()``. Those tools are bound to the
+    pool rather than to a single session: each call borrows the least busy
+    healthy connection, so the tool objects (and agents compiled from them)
+    stay valid across reconnects.
+    """
+
+    def __init__(
+        self,
+        connections: Optional[Dict[str, Dict[str, Any]]] = None,
+        size: int = MCP_POOL_SIZE,
+        health_check_interval: float = MCP_HEALTH_CHECK_INTERVAL
+    ):
+        """Initialize the pool.
+
+        Args:
+            connections: MCP server configurations (defaults to Graphiti and MarkItDown)
+            size: Number of connections to keep open
+            health_check_interval: Seconds between background health checks (0 disables them)
+        """
+        self.connections = connections or DEFAULT_CONNECTIONS
+        self.size = max(1, size)
+        self.health_check_interval = health_check_interval
+        self._pool: List[MCPConnection] = []
+        self._tools: List["BaseTool"] = []
+        self._lock = asyncio.Lock()
+        self._health_task: Optional[asyncio.Task] = None
+        self._started = False
+
+    @property
+    def started(self) -> bool:
+        """Whether the pool has been started and not yet closed."""
+        return self._started
+
+    async def start(self) -> None:
+        """Open all connections and fetch the tool schemas once."""
+        async with self._lock:
+            if self._started:
+                return
+            self._pool = [MCPConnection(self.connections) for _ in range(self.size)]
+            results = await asyncio.gather(
+                *(conn.open() for conn in self._pool),
+                return_exceptions=True
+            )
+            if not any(conn.healthy for conn in self._pool):
+                await asyncio.gather(*(conn.close() for conn in self._pool))
+                error = next(r for r in results if isinstance(r, BaseException))
+                raise RuntimeError(f"Failed to connect to MCP servers: {error}") from error
+
+            self._tools = self._build_tools(next(c for c in self._pool if c.healthy))
+            if self.health_check_interval > 0:
+                self._health_task = asyncio.create_task(self._health_loop())
+            self._started = True
+
+    def _build_tools(self, conn: MCPConnection) -> List["BaseTool"]:
+        """Create pool-routed copies of the tools advertised by a connection."""
+        tools = []
+        for server_name, server_tools in conn.client.server_name_to_tools.items():
+            for tool in server_tools:
+                tools.append(self._make_tool(server_name, tool))
+        return tools
+
+    def _make_tool(self, server_name: str, tool: "BaseTool") -> "BaseTool":
+        """Wrap a session-bound MCP tool so that each call borrows a pooled connection."""
+        from langchain_core.tools import StructuredTool
+        from langchain_mcp_adapters.tools import _convert_call_tool_result
+        tool_name = tool.name
+        # Only read-only tools are safe to run twice
+        attempts = 2 if tool_name in MCP_RETRY_TOOLS else 1
+
+        async def call_tool(**arguments: Dict[str, Any]):
+            # Retry once on a different connection if the borrowed one breaks mid-call;
+            # errors reported by the server itself are raised as they are
+            for attempt in range(attempts):
+                async with self.connection() as client:
+                    try:
+                        result = await client.sessions[server_name].call_tool(tool_name, arguments)
+                        break
+                    except Exception as e:
+                        if not _is_transport_error(e):
+                            raise
+                        self._mark_unhealthy(client)
+                        if attempt == attempts - 1:
+                            raise
+            return _convert_call_tool_result(result)
+
+        return StructuredTool(
+            name=tool_name,
+            description=tool.description,
+            args_schema=tool.args_schema,
+            coroutine=call_tool,
+            response_format="content_and_artifact"
+        )
+
+    def _mark_unhealthy(self, client: "MultiServerMCPClient") -> None:
+        """Flag the connection owning ``client`` so it gets replaced."""
+        for conn in self._pool:
+            if conn.client is client:
+                conn.healthy = False
+
+    def get_tools(self) -> List["BaseTool"]:
+        """Get the pool-routed tools for all configured servers.
+
+        Returns:
+            List of LangChain tools
+        """
+        if not self._started:
+            raise RuntimeError("MCP connection pool has not been started")
+        return list(self._tools)
+
+    @asynccontextmanager
+    async def connection(self) -> AsyncIterator["MultiServerMCPClient"]:
+        """Borrow the least busy healthy connection, reconnecting if none is healthy.
+
+        Yields:
+            A connected MultiServerMCPClient
+        """
+        if not self._started:
+            await self.start()
+
+        healthy = [conn for conn in self._pool if conn.healthy]
+        if healthy:
+            conn = min(healthy, key=lambda c: c.in_use)
+        else:
+            conn = await self._reconnect(self._pool[0])
+
+        conn.in_use += 1
+        try:
+            yield conn.client
+        finally:
+            conn.in_use -= 1
+
+    async def _reconnect(self, conn: MCPConnection) -> MCPConnection:
+        """Replace a failed connection with a fresh one."""
+        async with self._lock:
+            if conn.healthy:
+                return conn
+            await conn.close()
+            await conn.open()
+            return conn
+
+    async def _health_loop(self) -> None:
+        """Periodically ping every connection and reconnect the failed ones."""
+        while True:
+            await asyncio.sleep(self.health_check_interval)
+            for conn in self._pool:
+                if conn.in_use == 0 and conn.healthy:
+                    await conn.ping()
+                if not conn.healthy:
+                    try:
+                        await self._reconnect(conn)
+                    except Exception as e:
+                        logger.warning("MCP reconnect failed: %s", e)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get a snapshot of the pool state.
+
+        Returns:
+            Dict with pool size, healthy connection count and in-flight calls
+        """
+        return {
+            "size": self.size,
+            "healthy": sum(1 for conn in self._pool if conn.healthy),
+            "in_use": sum(conn.in_use for conn in self._pool)
+        }
+
+    async def close(self) -> None:
+        """Stop health checks and close every connection."""
+        async with self._lock:
+            if self._health_task is not None:
+                self._health_task.cancel()
+                try:
+                    await self._health_task
+                except asyncio.CancelledError:
+                    pass
+                self._health_task = None
+            await asyncio.gather(*(conn.close() for conn in self._pool))
+            self._pool = []
+            self._tools = []
+            self._started = False
+
+# Global connection pool instance
+_mcp_pool: Optional[MCPConnectionPool] = None
+
+async def get_mcp_pool() -> MCPConnectionPool:
+    """Get the global MCP connection pool, starting it on first use.
+
+    Returns:
+        Started global MCPConnectionPool instance
+    """
+    global _mcp_pool
+    if _mcp_pool is None:
+        _mcp_pool = MCPConnectionPool()
+    await _mcp_pool.start()
+    return _mcp_pool
+
+async def close_mcp_pool() -> None:
+    """Close the global MCP connection pool if it was started."""
+    global _mcp_pool
+    if _mcp_pool is not None:
+        await _mcp_pool.close()
+        _mcp_pool = None
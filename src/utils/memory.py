@@ -1,60 +1,162 @@
-from typing import List, Dict, Any
+import sys
+from collections import deque
+from typing import TYPE_CHECKING, Callable, Deque, List, Optional
 from langchain_core.messages import BaseMessage, HumanMessage, AIMessage
-from langchain_core.chat_history import BaseChatMessageHistory
-from langchain_community.chat_message_histories import ChatMessageHistory
-from src.config.settings import CONVERSATION_MEMORY_SIZE
+from src.config.settings import CONVERSATION_MEMORY_SIZE, HISTORY_MAX_TURN_TOKENS
+from src.utils.tokens import count_tokens, truncate_to_tokens
+
+if TYPE_CHECKING:
+    from langchain_core.chat_history import BaseChatMessageHistory
+
+_HUMAN = "Human"
+_ASSISTANT = "Assistant"
+
+class _Turn:
+    """One message in the window: its role, text and formatted history line."""
+
+    __slots__ = ("role", "text", "line", "_tokens")
+
+    def __init__(self, role: str, text: str):
+        self.role = role
+        self.text = text
+        self.line = f"{role}: {text}"
+        self._tokens: Optional[int] = None
+
+    @property
+    def tokens(self) -> int:
+        """Token count of the formatted line, computed on first use."""
+        if self._tokens is None:
+            self._tokens = count_tokens(self.line)
+        return self._tokens
 
 class ConversationMemoryManager:
-    """Manages conversation memory with a fixed window of recent interactions."""
-    
-    def __init__(self, k: int = CONVERSATION_MEMORY_SIZE):
+    """Manages conversation memory with a fixed window of recent interactions.
+
+    Messages are kept as compact (role, text) turns in a ring buffer, and the
+    formatted history string is maintained incrementally as turns are appended
+    and evicted rather than rebuilt on every search.
+    """
+
+    __slots__ = ("k", "on_add", "_turns", "_formatted")
+
+    def __init__(
+        self,
+        k: int = CONVERSATION_MEMORY_SIZE,
+        on_add: Optional[Callable[[str, str], None]] = None
+    ):
         """Initialize the memory manager.
-        
+
         Args:
             k: Number of conversations to keep in memory (defaults to CONVERSATION_MEMORY_SIZE from settings)
+            on_add: Called with each interaction added through add_interaction,
+                e.g. to persist it to a session store
         """
         self.k = k
-        self.chat_history: BaseChatMessageHistory = ChatMessageHistory()
-    
+        self.on_add = on_add
+        self._turns: Deque[_Turn] = deque(maxlen=k * 2 if k > 0 else None)
+        self._formatted = ""
+
+    def _append(self, turn: _Turn) -> None:
+        """Add a turn, evicting the oldest one when the window is full."""
+        if self._turns.maxlen is not None and len(self._turns) == self._turns.maxlen:
+            evicted = self._turns[0]
+            # Drop the evicted line and its newline from the front of the cache
+            self._formatted = self._formatted[len(evicted.line) + 1:]
+        self._turns.append(turn)
+        self._formatted = f"{self._formatted}\n{turn.line}" if self._formatted else turn.line
+
     def add_interaction(self, human_message: str, ai_message: str) -> None:
         """Add a human-AI interaction to memory.
-        
+
         Args:
             human_message: The user's message
             ai_message: The AI's response
         """
-        self.chat_history.add_message(HumanMessage(content=human_message))
-        self.chat_history.add_message(AIMessage(content=ai_message))
-        
-        # Keep only the last k interactions (2 messages per interaction)
-        if len(self.chat_history.messages) > self.k * 2:
-            self.chat_history.messages = self.chat_history.messages[-self.k * 2:]
-    
+        self._append(_Turn(_HUMAN, human_message))
+        self._append(_Turn(_ASSISTANT, ai_message))
+        if self.on_add is not None:
+            self.on_add(human_message, ai_message)
+
+    @property
+    def chat_history(self) -> "BaseChatMessageHistory":
+        """The window as a LangChain chat message history (a snapshot copy)."""
+        from langchain_community.chat_message_histories import ChatMessageHistory
+        return ChatMessageHistory(messages=self.get_chat_history())
+
     def get_chat_history(self) -> List[BaseMessage]:
         """Retrieve the chat history as a list of messages.
-        
+
         Returns:
             List of chat messages
         """
-        return self.chat_history.messages
-    
-    def get_formatted_history(self) -> str:
+        return [
+            HumanMessage(content=turn.text) if turn.role == _HUMAN else AIMessage(content=turn.text)
+            for turn in self._turns
+        ]
+
+    def get_formatted_history(
+        self,
+        max_tokens: Optional[int] = None,
+        max_turn_tokens: int = HISTORY_MAX_TURN_TOKENS
+    ) -> str:
         """Get the chat history formatted as a string.
-        
+
+        Args:
+            max_tokens: Token budget for the whole history (None or 0 for no budget).
+                Interactions are packed newest first and the oldest ones that do
+                not fit are dropped.
+            max_turn_tokens: With a budget, longer individual messages are truncated
+                to this many tokens before packing
+
         Returns:
             Formatted chat history string
         """
-        messages = self.get_chat_history()
-        formatted_history = []
-        
-        for msg in messages:
-            if isinstance(msg, HumanMessage):
-                formatted_history.append(f"Human: {msg.content}")
-            elif isinstance(msg, AIMessage):
-                formatted_history.append(f"Assistant: {msg.content}")
-                
-        return "\n".join(formatted_history)
-    
+        if not max_tokens:
+            return self._formatted
+
+        # Group into interactions so an answer is never kept without its question
+        interactions: List[List[_Turn]] = []
+        for turn in self._turns:
+            if turn.role == _HUMAN or not interactions:
+                interactions.append([])
+            interactions[-1].append(turn)
+
+        packed: List[str] = []
+        used = 0
+        for interaction in reversed(interactions):
+            lines = []
+            tokens = len(interaction) - 1 + (1 if packed else 0)  # joining newlines
+            for turn in interaction:
+                if turn.tokens > max_turn_tokens:
+                    line = truncate_to_tokens(turn.line, max_turn_tokens)
+                    tokens += count_tokens(line)
+                else:
+                    line = turn.line
+                    tokens += turn.tokens
+                lines.append(line)
+            text = "\n".join(lines)
+            if used + tokens > max_tokens:
+                if not packed:
+                    # Even the newest interaction alone is too long: keep its start
+                    packed.append(truncate_to_tokens(text, max_tokens))
+                break
+            packed.append(text)
+            used += tokens
+
+        return "\n".join(reversed(packed))
+
+    def approx_size(self) -> int:
+        """Approximate bytes held by this memory (turns, their strings and the cache).
+
+        Returns:
+            Approximate size in bytes
+        """
+        size = sys.getsizeof(self) + sys.getsizeof(self._turns) + sys.getsizeof(self._formatted)
+        for turn in self._turns:
+            size += sys.getsizeof(turn) + sys.getsizeof(turn.text) + sys.getsizeof(turn.line)
+        return size
+
     def clear(self) -> None:
         """Clear the conversation memory."""
-        self.chat_history.clear() 
\ No newline at end of file
+        self._turns.clear()
+        self._formatted = ""
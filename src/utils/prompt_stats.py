@@ -0,0 +1,89 @@
+from typing import Any, Dict, List
+
+from langchain_core.messages import AIMessage
+
+from src.utils.tokens import count_tokens
+
+class PromptStats:
+    """Per-search-type counters of prompt sizes and provider prefix-cache use.
+
+    Prefix, suffix and history sizes are counted locally. Input and cached
+    token counts come from the usage metadata the provider returns with each
+    LLM response, so the cache hit rate reflects what the provider reused.
+    """
+
+    def __init__(self):
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    def record(
+        self,
+        search_type: str,
+        prefix_tokens: int,
+        suffix: str,
+        messages: List[Any],
+        history: str = ""
+    ) -> None:
+        """Record one request's prompt.
+
+        Args:
+            search_type: Type of search the prompt was built for
+            prefix_tokens: Token count of the static prompt prefix (counted once per prefix)
+            suffix: Dynamic prompt suffix (history, results and query)
+            messages: Messages returned by the run; AI messages' usage metadata is summed
+            history: Conversation history included in the suffix
+        """
+        stats = self._stats.setdefault(search_type, {
+            "requests": 0,
+            "llm_calls": 0,
+            "prefix_tokens": 0,
+            "suffix_tokens": 0,
+            "history_tokens": 0,
+            "max_history_tokens": 0,
+            "input_tokens": 0,
+            "cached_input_tokens": 0
+        })
+        stats["requests"] += 1
+        stats["prefix_tokens"] += prefix_tokens
+        stats["suffix_tokens"] += count_tokens(suffix)
+        history_tokens = count_tokens(history)
+        stats["history_tokens"] += history_tokens
+        stats["max_history_tokens"] = max(stats["max_history_tokens"], history_tokens)
+        for message in messages:
+            if not isinstance(message, AIMessage):
+                continue
+            stats["llm_calls"] += 1
+            usage = message.usage_metadata or {}
+            stats["input_tokens"] += usage.get("input_tokens", 0)
+            stats["cached_input_tokens"] += (usage.get("input_token_details") or {}).get("cache_read", 0)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Get the counters per search type with averages and the prefix cache hit rate.
+
+        Returns:
+            Dict of prompt statistics keyed by search type
+        """
+        report = {}
+        for search_type, stats in self._stats.items():
+            requests = stats["requests"] or 1
+            report[search_type] = {
+                **stats,
+                "avg_prefix_tokens": round(stats["prefix_tokens"] / requests, 1),
+                "avg_suffix_tokens": round(stats["suffix_tokens"] / requests, 1),
+                "avg_history_tokens": round(stats["history_tokens"] / requests, 1),
+                "prefix_cache_hit_rate": (
+                    round(stats["cached_input_tokens"] / stats["input_tokens"], 3)
+                    if stats["input_tokens"] else None
+                )
+            }
+        return report
+
+# Global prompt statistics instance
+_prompt_stats = PromptStats()
+
+def get_prompt_stats() -> PromptStats:
+    """Get the global prompt statistics.
+
+    Returns:
+        Global PromptStats instance
+    """
+    return _prompt_stats
@@ -1,51 +1,256 @@
-from typing import Dict, Optional
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
 from src.utils.memory import ConversationMemoryManager
+from src.utils.session_store import SessionStore, create_session_store
+from src.config.settings import (
+    SESSION_TTL,
+    SESSION_MAX,
+    SESSION_SWEEP_INTERVAL,
+    SESSION_STORE_FLUSH_INTERVAL
+)
+
+logger = logging.getLogger(__name__)
 
 class SessionManager:
-    """Manages conversation memories for different users/sessions."""
-    
-    def __init__(self):
-        """Initialize the session manager."""
-        self.sessions: Dict[str, ConversationMemoryManager] = {}
-    
-    def get_memory(self, session_id: str) -> ConversationMemoryManager:
+    """Manages conversation memories for different users/sessions.
+
+    Sessions are kept in least-recently-used order. A session idle for longer
+    than ``ttl`` seconds expires, and once ``max_sessions`` is reached the
+    least recently used session is evicted to make room for a new one. Expired
+    sessions are dropped on access and by a periodic background sweep.
+
+    With a shared session store the in-process sessions act as a cache in
+    front of it: a session is (re)loaded from the store when another worker
+    changed it, new interactions are written to the store, and a background
+    task flushes the store's batched writes in a thread, so no request waits
+    on the store's database.
+    """
+
+    def __init__(
+        self,
+        ttl: float = SESSION_TTL,
+        max_sessions: int = SESSION_MAX,
+        sweep_interval: float = SESSION_SWEEP_INTERVAL,
+        store: Optional[SessionStore] = None,
+        flush_interval: float = SESSION_STORE_FLUSH_INTERVAL
+    ):
+        """Initialize the session manager.
+
+        Args:
+            ttl: Seconds of inactivity after which a session expires (0 disables expiry)
+            max_sessions: Maximum number of stored sessions (0 for no limit)
+            sweep_interval: Seconds between background sweeps of expired sessions
+            store: Session store backend (defaults to the one configured by SESSION_STORE)
+            flush_interval: Seconds between flushes of the store's batched writes
+        """
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self.sweep_interval = sweep_interval
+        self.store = store if store is not None else create_session_store()
+        self.flush_interval = flush_interval
+        self.evictions = 0
+        self.expirations = 0
+        self.reloads = 0
+        self._sessions: "OrderedDict[str, Tuple[ConversationMemoryManager, float]]" = OrderedDict()
+        self._sweeper: Optional[asyncio.Task] = None
+        self._flusher: Optional[asyncio.Task] = None
+        self._flush_wakeup: Optional[asyncio.Event] = None
+
+    @property
+    def sessions(self) -> Dict[str, ConversationMemoryManager]:
+        """Stored sessions keyed by session ID (a snapshot)."""
+        return {session_id: memory for session_id, (memory, _) in self._sessions.items()}
+
+    def _expired(self, last_used: float, now: float) -> bool:
+        """Whether a session last used at ``last_used`` has expired."""
+        return bool(self.ttl) and now - last_used > self.ttl
+
+    def _drop(self, session_id: str) -> None:
+        """Remove a session from the in-process cache (the store keeps it)."""
+        del self._sessions[session_id]
+        self.store.forget(session_id)
+
+    def _load(self, session_id: str) -> ConversationMemoryManager:
+        """Build a session's memory from the store and persist its new interactions."""
+        memory = ConversationMemoryManager()
+        for human_message, ai_message in self.store.load(session_id, memory.k):
+            memory.add_interaction(human_message, ai_message)
+        memory.on_add = lambda human_message, ai_message: self._append(
+            session_id, human_message, ai_message
+        )
+        return memory
+
+    def _append(self, session_id: str, human_message: str, ai_message: str) -> None:
+        """Buffer a new interaction in the store, waking the flusher once a flush is due."""
+        self.store.append(session_id, human_message, ai_message)
+        self._wake_flusher()
+
+    def _wake_flusher(self) -> None:
+        """Flush the store now rather than at the next interval if enough is buffered."""
+        if self._flush_wakeup is not None and self.store.flush_due:
+            self._flush_wakeup.set()
+
+    def get_memory(self, session_id: str, create: bool = True) -> ConversationMemoryManager:
         """Get or create a memory manager for a session.
-        
+
         Args:
             session_id: Unique identifier for the user/session
-            
+            create: Whether to store a new session if none exists. With False a
+                missing session gets a transient, unstored memory manager.
+
         Returns:
             ConversationMemoryManager for the session
         """
-        if session_id not in self.sessions:
-            self.sessions[session_id] = ConversationMemoryManager()
-        return self.sessions[session_id]
-    
+        now = time.monotonic()
+        entry = self._sessions.get(session_id)
+        if entry is not None and self._expired(entry[1], now):
+            self._drop(session_id)
+            self.expirations += 1
+            entry = None
+
+        changed = self.store.changed(session_id) if self.store.shared else None
+        if entry is not None and self.store.shared:
+            if changed or (changed is None and entry[0].get_formatted_history()):
+                # Another worker added to the session, or it was cleared or expired there
+                self._drop(session_id)
+                self.reloads += 1
+                entry = None
+
+        if entry is not None:
+            memory = entry[0]
+            self._sessions[session_id] = (memory, now)
+            self._sessions.move_to_end(session_id)
+            self.store.touch(session_id)
+            return memory
+
+        if not create and changed is None:
+            return ConversationMemoryManager()
+
+        memory = self._load(session_id)
+        self._sessions[session_id] = (memory, now)
+        self.store.touch(session_id)
+        while self.max_sessions and len(self._sessions) > self.max_sessions:
+            evicted_id, _ = self._sessions.popitem(last=False)
+            self.store.forget(evicted_id)
+            self.evictions += 1
+        return memory
+
     def clear_session(self, session_id: str) -> None:
         """Clear a session's conversation memory.
-        
+
         Args:
             session_id: Unique identifier for the user/session
         """
-        if session_id in self.sessions:
-            self.sessions[session_id].clear()
-            del self.sessions[session_id]
-    
+        entry = self._sessions.pop(session_id, None)
+        if entry is not None:
+            entry[0].clear()
+        self.store.delete(session_id)
+        self._wake_flusher()
+
     def get_all_sessions(self) -> Dict[str, ConversationMemoryManager]:
         """Get all active sessions.
-        
+
         Returns:
             Dictionary of session IDs to memory managers
         """
-        return self.sessions.copy()
+        return self.sessions
+
+    def sweep(self) -> int:
+        """Drop every expired session.
+
+        Returns:
+            Number of sessions removed
+        """
+        if not self.ttl:
+            return 0
+        now = time.monotonic()
+        removed = 0
+        # Sessions are in last-use order, so stop at the first live one
+        while self._sessions:
+            session_id, (_, last_used) = next(iter(self._sessions.items()))
+            if not self._expired(last_used, now):
+                break
+            self._drop(session_id)
+            removed += 1
+        self.expirations += removed
+        return removed
+
+    async def _sweep_loop(self) -> None:
+        """Periodically drop expired sessions."""
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            removed = self.sweep()
+            if removed:
+                logger.info("Expired %d idle sessions", removed)
+            try:
+                removed = await asyncio.to_thread(self.store.expire, self.ttl)
+                if removed:
+                    logger.info("Expired %d idle sessions from the session store", removed)
+            except Exception as e:
+                logger.error("Error expiring stored sessions: %s", e)
+
+    async def _flush_loop(self) -> None:
+        """Write the store's batched changes every interval, or sooner when a flush is due."""
+        while True:
+            try:
+                await asyncio.wait_for(self._flush_wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_wakeup.clear()
+            try:
+                await asyncio.to_thread(self.store.flush)
+            except Exception as e:
+                logger.error("Error flushing session store: %s", e)
+
+    def start(self) -> None:
+        """Start the background sweep and store flush tasks if they are not running."""
+        if self._sweeper is None and self.ttl and self.sweep_interval > 0:
+            self._sweeper = asyncio.create_task(self._sweep_loop())
+        if self._flusher is None and self.store.shared and self.flush_interval > 0:
+            self._flush_wakeup = asyncio.Event()
+            self._flusher = asyncio.create_task(self._flush_loop())
+
+    async def close(self) -> None:
+        """Stop the background tasks and flush and close the session store."""
+        for task in (self._sweeper, self._flusher):
+            if task is not None:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._sweeper = None
+        self._flusher = None
+        self._flush_wakeup = None
+        await asyncio.to_thread(self.store.close)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get session gauges and eviction counters.
+
+        Returns:
+            Dict with the session count, approximate memory use and counters
+        """
+        return {
+            "sessions": len(self._sessions),
+            "max_sessions": self.max_sessions,
+            "ttl": self.ttl,
+            "approx_bytes": sum(memory.approx_size() for memory, _ in self._sessions.values()),
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "reloads": self.reloads,
+            "store": self.store.stats()
+        }
 
 # Global session manager instance
 _session_manager = SessionManager()
 
 def get_session_manager() -> SessionManager:
     """Get the global session manager instance.
-    
+
     Returns:
         Global SessionManager instance
     """
-    return _session_manager 
\ No newline at end of file
+    return _session_manager
@@ -0,0 +1,437 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from src.config.settings import (
+    CONVERSATION_MEMORY_SIZE,
+    SESSION_STORE,
+    SESSION_DB,
+    SESSION_STORE_BATCH_SIZE,
+    SESSION_STORE_TIMEOUT
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0,
+    last_used REAL NOT NULL,
+    changed_seq INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS session_turns (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT NOT NULL,
+    human TEXT NOT NULL,
+    ai TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS session_turns_by_session ON session_turns (session_id, seq);
+"""
+
+# Columns added since the tables were first created, added to older databases on open
+_MIGRATIONS = (
+    ("changed_seq", "INTEGER NOT NULL DEFAULT 0"),
+)
+
+_INDEXES = """
+CREATE INDEX IF NOT EXISTS sessions_by_change ON sessions (changed_seq);
+"""
+
+class SessionStore:
+    """Backend holding conversation memory shared beyond one SessionManager.
+
+    SessionManager keeps recently used sessions in process and consults the
+    store to load sessions, to find out whether another process changed them,
+    and to persist new interactions.
+    """
+
+    #: Whether sessions are shared with other processes (False: only the
+    #: SessionManager's in-process cache holds them)
+    shared = False
+
+    @property
+    def flush_due(self) -> bool:
+        """Whether enough writes are buffered that the next flush should not wait."""
+        return False
+
+    def changed(self, session_id: str) -> Optional[bool]:
+        """Check a session against what this process last loaded or wrote.
+
+        Args:
+            session_id: Session to check
+
+        Returns:
+            None if the store has no such session, True if another process
+            changed it since, False if this process is up to date
+        """
+        return None
+
+    def load(self, session_id: str, k: int = CONVERSATION_MEMORY_SIZE) -> List[Tuple[str, str]]:
+        """Load a session's most recent interactions, oldest first.
+
+        Args:
+            session_id: Session to load
+            k: Maximum number of interactions
+
+        Returns:
+            List of (human, ai) message pairs
+        """
+        return []
+
+    def append(self, session_id: str, human: str, ai: str) -> None:
+        """Record a new interaction (possibly buffered until the next flush)."""
+
+    def touch(self, session_id: str) -> None:
+        """Record that a session was used (possibly buffered until the next flush)."""
+
+    def forget(self, session_id: str) -> None:
+        """Drop this process's bookkeeping for a session it no longer caches."""
+
+    def delete(self, session_id: str) -> None:
+        """Remove a session and its interactions (possibly queued until the next flush)."""
+
+    def expire(self, ttl: float) -> int:
+        """Remove sessions idle for longer than ``ttl`` seconds (blocking I/O).
+
+        Returns:
+            Number of sessions removed
+        """
+        return 0
+
+    def flush(self) -> None:
+        """Write buffered changes and pick up other processes' changes (blocking I/O)."""
+
+    def close(self) -> None:
+        """Flush and release resources (blocking I/O)."""
+
+    def stats(self) -> Dict[str, Any]:
+        """Get backend statistics.
+
+        Returns:
+            Dict of store statistics
+        """
+        return {"backend": "memory"}
+
+class InMemorySessionStore(SessionStore):
+    """Process-local backend: sessions live only in the SessionManager's cache.
+
+    Suitable for a single worker; with several workers each one has its own
+    independent sessions.
+    """
+
+class SQLiteSessionStore(SessionStore):
+    """SQLite (WAL) backend shared by every worker process on a host.
+
+    Nothing on the request path waits for a database lock. Interactions and
+    last-use times are buffered in memory and written in one transaction per
+    flush, which the SessionManager runs in a thread: every flush interval,
+    or sooner once ``batch_size`` appends are pending. Clearing a session is
+    queued the same way. Each session carries a version bumped on every
+    write, and each flush also reads the versions other workers changed since
+    the previous one, so ``changed`` only compares in-memory versions.
+    Loading a session this process does not cache is the one read left on
+    the request path; under WAL it does not wait for writers.
+    """
+
+    shared = True
+
+    def __init__(
+        self,
+        db_path: str = SESSION_DB,
+        k: int = CONVERSATION_MEMORY_SIZE,
+        batch_size: int = SESSION_STORE_BATCH_SIZE,
+        timeout: float = SESSION_STORE_TIMEOUT
+    ):
+        """Initialize the store.
+
+        Args:
+            db_path: Path of the SQLite database file
+            k: Number of interactions kept per session
+            batch_size: Pending appends that make a flush due
+            timeout: Seconds a statement waits for another process's lock
+                before failing (a failed flush is retried by the next one)
+        """
+        self.db_path = db_path
+        self.k = k
+        self.batch_size = max(1, batch_size)
+        self.timeout = timeout
+        self.flushes = 0
+        # Guards the in-memory state below; never held during database I/O
+        self._lock = threading.Lock()
+        # Serializes use of the write connection by flush, expire and close
+        self._write_lock = threading.Lock()
+        self._read_lock = threading.Lock()
+        self._writer: Optional[sqlite3.Connection] = None
+        self._reader: Optional[sqlite3.Connection] = None
+        self._pending: List[Tuple[str, str, str]] = []
+        self._touched: Dict[str, float] = {}
+        self._deleted: Set[str] = set()
+        # Appends per session not yet committed, including a flush in progress
+        self._unsaved: Dict[str, int] = {}
+        # Session version this process last loaded or wrote, per cached session
+        self._known: Dict[str, int] = {}
+        # Latest stored version of every session, as of the last flush
+        self._versions: Dict[str, int] = {}
+        self._seen_seq = 0
+
+    def _open(self) -> sqlite3.Connection:
+        """Open a connection to the database, creating the schema."""
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(
+            self.db_path, timeout=self.timeout, isolation_level=None, check_same_thread=False
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(_SCHEMA)
+        existing = {row[1] for row in conn.execute("PRAGMA table_info(sessions)")}
+        for column, definition in _MIGRATIONS:
+            if column not in existing:
+                conn.execute(f"ALTER TABLE sessions ADD COLUMN {column} {definition}")
+        conn.executescript(_INDEXES)
+        return conn
+
+    def _write_conn(self) -> sqlite3.Connection:
+        """Open the write connection on first use (caller holds the write lock)."""
+        if self._writer is None:
+            self._writer = self._open()
+        return self._writer
+
+    def _see_version(self, session_id: str, version: int) -> None:
+        """Record a stored version, ignoring one older than already seen."""
+        if version > self._versions.get(session_id, -1):
+            self._versions[session_id] = version
+
+    @property
+    def flush_due(self) -> bool:
+        return len(self._pending) >= self.batch_size or bool(self._deleted)
+
+    def changed(self, session_id: str) -> Optional[bool]:
+        with self._lock:
+            if self._unsaved.get(session_id):
+                # This process holds writes the store does not have yet; its copy
+                # is the most recent, and the flush tells whether anyone else wrote
+                return False
+            version = self._versions.get(session_id)
+            if version is None:
+                self._known.pop(session_id, None)
+                return None
+            return self._known.get(session_id) != version
+
+    def load(self, session_id: str, k: Optional[int] = None) -> List[Tuple[str, str]]:
+        with self._lock:
+            if session_id in self._deleted:
+                # Cleared here; the queued delete has not been written yet
+                self._known[session_id] = self._versions.get(session_id, 0)
+                return []
+        with self._read_lock:
+            if self._reader is None:
+                self._reader = self._open()
+            conn = self._reader
+            conn.execute("BEGIN")
+            try:
+                row = conn.execute(
+                    "SELECT version FROM sessions WHERE session_id = ?", (session_id,)
+                ).fetchone()
+                turns = conn.execute(
+                    "SELECT human, ai FROM session_turns WHERE session_id = ? "
+                    "ORDER BY seq DESC LIMIT ?",
+                    (session_id, k or self.k)
+                ).fetchall()
+                conn.execute("COMMIT")
+            except BaseException:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                raise
+        with self._lock:
+            # A session not stored yet starts at version 0 once first flushed
+            self._known[session_id] = row[0] if row is not None else 0
+            if row is not None:
+                self._see_version(session_id, row[0])
+        return [(human, ai) for human, ai in reversed(turns)]
+
+    def append(self, session_id: str, human: str, ai: str) -> None:
+        with self._lock:
+            self._pending.append((session_id, human, ai))
+            self._unsaved[session_id] = self._unsaved.get(session_id, 0) + 1
+            self._touched[session_id] = time.time()
+
+    def touch(self, session_id: str) -> None:
+        with self._lock:
+            self._touched[session_id] = time.time()
+
+    def forget(self, session_id: str) -> None:
+        with self._lock:
+            self._known.pop(session_id, None)
+
+    def delete(self, session_id: str) -> None:
+        with self._lock:
+            dropped = sum(1 for pending in self._pending if pending[0] == session_id)
+            self._pending = [pending for pending in self._pending if pending[0] != session_id]
+            if dropped:
+                self._release(session_id, dropped)
+            self._touched.pop(session_id, None)
+            self._known.pop(session_id, None)
+            self._deleted.add(session_id)
+
+    def _release(self, session_id: str, count: int) -> None:
+        """Count ``count`` appends of a session as no longer unsaved (caller holds the lock)."""
+        left = self._unsaved.get(session_id, 0) - count
+        if left > 0:
+            self._unsaved[session_id] = left
+        else:
+            self._unsaved.pop(session_id, None)
+
+    def expire(self, ttl: float) -> int:
+        self.flush()
+        cutoff = time.time() - ttl
+        with self._write_lock:
+            conn = self._write_conn()
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                conn.execute(
+                    "DELETE FROM session_turns WHERE session_id IN "
+                    "(SELECT session_id FROM sessions WHERE last_used < ?)",
+                    (cutoff,)
+                )
+                removed = conn.execute("DELETE FROM sessions WHERE last_used < ?", (cutoff,)).rowcount
+                conn.execute("COMMIT")
+            except BaseException:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                raise
+            # Removed rows leave no trace to read changes from, so re-read every version
+            rows = conn.execute("SELECT session_id, version, changed_seq FROM sessions").fetchall()
+        with self._lock:
+            self._versions = {session_id: version for session_id, version, _ in rows}
+            self._seen_seq = max((seq for _, _, seq in rows), default=self._seen_seq)
+        return removed
+
+    def flush(self) -> None:
+        # Batches are taken and written under the write lock so they commit in order
+        with self._write_lock:
+            with self._lock:
+                pending, self._pending = self._pending, []
+                touched, self._touched = self._touched, {}
+                deleted, self._deleted = self._deleted, set()
+            appended = {session_id for session_id, _, _ in pending}
+            prior: Dict[str, int] = {}
+            before: Dict[str, Optional[int]] = {}
+
+            conn = self._write_conn()
+            if pending or touched or deleted:
+                try:
+                    conn.execute("BEGIN IMMEDIATE")
+                    seq = conn.execute(
+                        "SELECT COALESCE(MAX(changed_seq), 0) + 1 FROM sessions"
+                    ).fetchone()[0]
+                    # Cleared sessions keep a row with a new version, so other
+                    # workers drop their cached copies
+                    for session_id in deleted:
+                        row = conn.execute(
+                            "SELECT version FROM sessions WHERE session_id = ?", (session_id,)
+                        ).fetchone()
+                        if row is None:
+                            continue
+                        prior[session_id] = row[0]
+                        conn.execute("DELETE FROM session_turns WHERE session_id = ?", (session_id,))
+                        conn.execute(
+                            "UPDATE sessions SET version = version + 1, changed_seq = ? "
+                            "WHERE session_id = ?",
+                            (seq, session_id)
+                        )
+                    for session_id in appended:
+                        row = conn.execute(
+                            "SELECT version FROM sessions WHERE session_id = ?", (session_id,)
+                        ).fetchone()
+                        before[session_id] = row[0] if row is not None else None
+                    conn.executemany(
+                        "INSERT INTO sessions (session_id, version, last_used, changed_seq) "
+                        "VALUES (?, 0, ?, ?) ON CONFLICT(session_id) "
+                        "DO UPDATE SET last_used = MAX(last_used, excluded.last_used)",
+                        [(session_id, last_used, seq) for session_id, last_used in touched.items()]
+                    )
+                    conn.executemany(
+                        "INSERT INTO session_turns (session_id, human, ai) VALUES (?, ?, ?)",
+                        pending
+                    )
+                    for session_id in appended:
+                        conn.execute(
+                            "UPDATE sessions SET version = version + 1, changed_seq = ? "
+                            "WHERE session_id = ?",
+                            (seq, session_id)
+                        )
+                        # Keep only the newest k interactions
+                        conn.execute(
+                            "DELETE FROM session_turns WHERE session_id = ? AND seq NOT IN "
+                            "(SELECT seq FROM session_turns WHERE session_id = ? ORDER BY seq DESC LIMIT ?)",
+                            (session_id, session_id, self.k)
+                        )
+                    conn.execute("COMMIT")
+                except BaseException:
+                    if conn.in_transaction:
+                        conn.execute("ROLLBACK")
+                    # Put the writes back so the next flush retries them
+                    with self._lock:
+                        self._pending = pending + self._pending
+                        for session_id, last_used in touched.items():
+                            self._touched.setdefault(session_id, last_used)
+                        self._deleted |= deleted
+                    raise
+                self.flushes += 1
+
+            # Pick up the versions every process changed since the last flush
+            changes = conn.execute(
+                "SELECT session_id, version, changed_seq FROM sessions WHERE changed_seq > ?",
+                (self._seen_seq,)
+            ).fetchall()
+
+            with self._lock:
+                for session_id, version, seq in changes:
+                    self._see_version(session_id, version)
+                    self._seen_seq = max(self._seen_seq, seq)
+                # Our own clears and appends keep this process in sync, unless
+                # somebody else wrote since we last looked
+                for session_id, version in prior.items():
+                    if self._known.get(session_id) == version:
+                        self._known[session_id] = version + 1
+                for session_id in appended:
+                    self._release(session_id, sum(1 for p in pending if p[0] == session_id))
+                    known = self._known.get(session_id)
+                    if before[session_id] is None or (known is not None and known == before[session_id]):
+                        self._known[session_id] = (before[session_id] or 0) + 1
+
+    def close(self) -> None:
+        self.flush()
+        with self._write_lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+        with self._read_lock:
+            if self._reader is not None:
+                self._reader.close()
+                self._reader = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "sqlite",
+            "stored_sessions": len(self._versions),
+            "pending_writes": len(self._pending),
+            "flushes": self.flushes
+        }
+
+def create_session_store(backend: str = SESSION_STORE) -> SessionStore:
+    """Create the configured session store backend.
+
+    Args:
+        backend: "memory" or "sqlite"
+
+    Returns:
+        SessionStore instance
+    """
+    if backend == "sqlite":
+        return SQLiteSessionStore()
+    if backend == "memory":
+        return InMemorySessionStore()
+    raise ValueError(f"Unknown session store backend: {backend}")
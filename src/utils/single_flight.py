@@ -0,0 +1,165 @@
+import asyncio
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Hashable, List, Optional
+
+class _Broadcast:
+    """Items produced by one shared run, replayed to every subscriber."""
+
+    def __init__(self):
+        self.items: List[Any] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.subscribers = 0
+        self.task: Optional[asyncio.Task] = None
+        self._changed = asyncio.Event()
+
+    def publish(self, item: Any) -> None:
+        """Append an item and wake waiting subscribers."""
+        self.items.append(item)
+        self._notify()
+
+    def close(self, error: Optional[BaseException] = None) -> None:
+        """Mark the run as finished, optionally with the error it failed with."""
+        self.done = True
+        self.error = error
+        self._notify()
+
+    def _notify(self) -> None:
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    async def follow(self) -> AsyncIterator[Any]:
+        """Yield every item from the first one, then raise the run's error if any."""
+        index = 0
+        while True:
+            if index < len(self.items):
+                yield self.items[index]
+                index += 1
+            elif self.done:
+                if self.error is not None:
+                    raise self.error
+                return
+            else:
+                await self._changed.wait()
+
+class SingleFlight:
+    """Coalesce concurrent identical requests onto one underlying run.
+
+    The first caller for a key starts the run; callers arriving while it is
+    still in flight attach to it instead of starting their own. Once the run
+    finishes the key is released, so later callers start afresh (and will
+    usually be answered by the answer cache instead).
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+        self._streams: Dict[Hashable, _Broadcast] = {}
+        self.runs = 0
+        self.shared = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Run ``fn`` once for all concurrent callers with the same key.
+
+        Args:
+            key: Request key; callers with equal keys share one run
+            fn: Coroutine function performing the run
+
+        Returns:
+            The run's result (its exception is raised to every caller)
+        """
+        task = self._calls.get(key)
+        if task is None:
+            self.runs += 1
+            task = asyncio.create_task(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda _: self._calls.pop(key, None))
+        else:
+            self.shared += 1
+        # A caller going away must not cancel the run the others are waiting on
+        return await asyncio.shield(task)
+
+    async def subscribe(
+        self,
+        key: Hashable,
+        producer: Callable[[], AsyncIterator[Any]]
+    ) -> AsyncIterator[Any]:
+        """Iterate over a stream shared by all concurrent callers with the same key.
+
+        Every subscriber receives the full sequence of items from the start,
+        however late it attached. The producer is cancelled if all subscribers
+        go away before it finishes.
+
+        Args:
+            key: Request key; callers with equal keys share one stream
+            producer: Function returning the async iterator to share
+
+        Yields:
+            Items produced by the shared iterator
+        """
+        broadcast = self._streams.get(key)
+        if broadcast is None:
+            self.runs += 1
+            broadcast = self._streams[key] = _Broadcast()
+            broadcast.task = asyncio.create_task(self._produce(key, broadcast, producer))
+            broadcast.task.add_done_callback(lambda _: self._release(key, broadcast))
+        else:
+            self.shared += 1
+
+        broadcast.subscribers += 1
+        try:
+            async for item in broadcast.follow():
+                yield item
+        finally:
+            broadcast.subscribers -= 1
+            if broadcast.subscribers == 0 and not broadcast.done:
+                broadcast.task.cancel()
+
+    async def _produce(
+        self,
+        key: Hashable,
+        broadcast: _Broadcast,
+        producer: Callable[[], AsyncIterator[Any]]
+    ) -> None:
+        """Drive a shared stream's producer and publish what it yields."""
+        error = None
+        try:
+            async for item in producer():
+                broadcast.publish(item)
+        except asyncio.CancelledError:
+            error = RuntimeError("Shared stream was cancelled")
+        except Exception as e:
+            error = e
+        finally:
+            if self._streams.get(key) is broadcast:
+                del self._streams[key]
+            broadcast.close(error)
+
+    def _release(self, key: Hashable, broadcast: _Broadcast) -> None:
+        """Close a shared stream whose producer task was cancelled before it started."""
+        if broadcast.done:
+            return
+        if self._streams.get(key) is broadcast:
+            del self._streams[key]
+        broadcast.close(RuntimeError("Shared stream was cancelled"))
+
+    def stats(self) -> Dict[str, int]:
+        """Get in-flight counts and how many requests were coalesced.
+
+        Returns:
+            Dict of single-flight statistics
+        """
+        return {
+            "in_flight": len(self._calls) + len(self._streams),
+            "runs": self.runs,
+            "shared": self.shared
+        }
+
+# Global single-flight instance
+_single_flight = SingleFlight()
+
+def get_single_flight() -> SingleFlight:
+    """Get the global single-flight coordinator.
+
+    Returns:
+        Global SingleFlight instance
+    """
+    return _single_flight
@@ -0,0 +1,91 @@
+import logging
+from typing import Any, Optional
+
+from src.config.settings import HISTORY_TOKENIZER
+
+logger = logging.getLogger(__name__)
+
+# Marker appended to text cut down to a token budget
+TRUNCATION_MARKER = " …[truncated]"
+
+_encoding: Optional[Any] = None
+_tokenizer = "estimate"
+_loaded = False
+
+def load_tokenizer() -> str:
+    """Load the configured tiktoken encoding, once.
+
+    Blocking (the encoding may be downloaded on first use), so the app runs it
+    at startup in a thread. If the encoding cannot be loaded, for example
+    offline without a populated TIKTOKEN_CACHE_DIR, token counts fall back to
+    the character estimate and a warning says so.
+
+    Returns:
+        Name of the tokenizer in use: the encoding name, or "estimate"
+    """
+    global _encoding, _tokenizer, _loaded
+    if not _loaded:
+        _loaded = True
+        if HISTORY_TOKENIZER and HISTORY_TOKENIZER != "estimate":
+            try:
+                import tiktoken
+                _encoding = tiktoken.get_encoding(HISTORY_TOKENIZER)
+                _tokenizer = HISTORY_TOKENIZER
+            except Exception as e:
+                logger.warning(
+                    "Tokenizer %s unavailable, estimating token counts: %s", HISTORY_TOKENIZER, e
+                )
+    return _tokenizer
+
+def tokenizer_name() -> str:
+    """Name of the tokenizer counts currently use: an encoding name, or "estimate"."""
+    return _tokenizer
+
+def _get_encoding() -> Optional[Any]:
+    """The loaded tiktoken encoding, or None to use the character estimate.
+
+    Never loads it, so no request blocks the event loop on a download; counts
+    are estimated until load_tokenizer() has run.
+    """
+    return _encoding
+
+def count_tokens(text: str) -> int:
+    """Count the tokens in a text.
+
+    Uses the configured tiktoken encoding once load_tokenizer() has loaded
+    it, otherwise estimates about four characters per token.
+
+    Args:
+        text: Text to measure
+
+    Returns:
+        Number of tokens
+    """
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return (len(text) + 3) // 4
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut a text down to at most ``max_tokens`` tokens, marking the cut.
+
+    Args:
+        text: Text to shorten
+        max_tokens: Token budget including the truncation marker
+
+    Returns:
+        The text unchanged if it fits, otherwise its beginning plus a marker
+    """
+    if max_tokens <= 0:
+        return ""
+    if count_tokens(text) <= max_tokens:
+        return text
+    keep = max(0, max_tokens - count_tokens(TRUNCATION_MARKER))
+    encoding = _get_encoding()
+    if encoding is not None:
+        head = encoding.decode(encoding.encode(text, disallowed_special=())[:keep])
+    else:
+        head = text[:keep * 4]
+    return head.rstrip() + TRUNCATION_MARKER
@@ -0,0 +1,130 @@
+import asyncio
+import hashlib
+import os
+import pathlib
+import tempfile
+from typing import Optional, Tuple
+
+from fastapi import UploadFile
+from fastapi.responses import JSONResponse
+
+from src.config.settings import INGEST_MAX_UPLOAD_BYTES, MULTIPART_OVERHEAD_BYTES, UPLOAD_CHUNK_SIZE
+
+class UploadTooLargeError(ValueError):
+    """Raised when an upload exceeds the configured maximum size."""
+
+class SpooledUpload:
+    """An upload written to a local file."""
+    
+    def __init__(self, path: str, sha256: str, size: int):
+        """Initialize the spooled upload.
+        
+        Args:
+            path: Path of the spooled file
+            sha256: Hex SHA-256 digest of the file contents
+            size: Size of the file in bytes
+        """
+        self.path = path
+        self.sha256 = sha256
+        self.size = size
+    
+    def remove(self) -> None:
+        """Delete the spooled file if it still exists."""
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+async def spool_upload(
+    file: UploadFile,
+    directory: Optional[str] = None,
+    max_bytes: int = INGEST_MAX_UPLOAD_BYTES,
+    chunk_size: int = UPLOAD_CHUNK_SIZE
+) -> SpooledUpload:
+    """Stream an upload to a temporary file without blocking the event loop.
+    
+    The file is copied in fixed-size chunks with disk writes off the event loop,
+    hashed during the copy, and rejected as soon as it grows past ``max_bytes``.
+    The original filename suffix is kept so the file type can still be detected.
+    
+    Args:
+        file: Uploaded file to spool
+        directory: Directory for the spooled file (defaults to the system temp dir)
+        max_bytes: Maximum accepted size in bytes (0 disables the limit)
+        chunk_size: Bytes read and written per chunk
+        
+    Returns:
+        SpooledUpload describing the written file
+        
+    Raises:
+        UploadTooLargeError: If the upload is larger than max_bytes
+    """
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    suffix = pathlib.Path(file.filename or "").suffix
+    fd, path = tempfile.mkstemp(dir=directory, suffix=suffix)
+    digest = hashlib.sha256()
+    size = 0
+    
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                chunk = await file.read(chunk_size)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if max_bytes and size > max_bytes:
+                    raise UploadTooLargeError(
+                        f"Upload {file.filename} exceeds the maximum size of {max_bytes} bytes"
+                    )
+                digest.update(chunk)
+                await asyncio.to_thread(out.write, chunk)
+    except BaseException:
+        os.unlink(path)
+        raise
+    
+    return SpooledUpload(path, digest.hexdigest(), size)
+
+class UploadSizeLimitMiddleware:
+    """Reject single-file uploads by their Content-Length before the body is read.
+    
+    FastAPI reads a whole multipart body before the endpoint runs, so the cap in
+    spool_upload() only applies once the upload has been received. This checks
+    the declared size up front and answers 413 without reading the body. Bodies
+    without a Content-Length (chunked) are still capped by spool_upload().
+    """
+    
+    def __init__(
+        self,
+        app,
+        paths: Tuple[str, ...],
+        max_bytes: int = INGEST_MAX_UPLOAD_BYTES,
+        overhead: int = MULTIPART_OVERHEAD_BYTES
+    ):
+        """Initialize the middleware.
+        
+        Args:
+            app: ASGI application to wrap
+            paths: Request paths that take a single uploaded file
+            max_bytes: Maximum accepted file size in bytes (0 disables the check)
+            overhead: Allowance for the multipart boundaries and part headers
+        """
+        self.app = app
+        self.paths = frozenset(paths)
+        self.max_bytes = max_bytes
+        self.overhead = overhead
+    
+    async def __call__(self, scope, receive, send):
+        if (
+            self.max_bytes
+            and scope["type"] == "http"
+            and scope["method"] == "POST"
+            and scope["path"] in self.paths
+        ):
+            length = dict(scope["headers"]).get(b"content-length")
+            if length is not None and length.isdigit() and int(length) > self.max_bytes + self.overhead:
+                response = JSONResponse(
+                    {"detail": f"Upload exceeds the maximum size of {self.max_bytes} bytes"},
+                    status_code=413
+                )
+                await response(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
@@ -0,0 +1,186 @@
+import asyncio
+import importlib
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+from src.config.settings import (
+    DEFAULT_MODEL,
+    DETAILED_SEARCH_FAN_OUT,
+    WARMUP_MODELS,
+    WARMUP_RETRY_INTERVAL
+)
+from src.utils.tokens import tokenizer_name
+
+logger = logging.getLogger(__name__)
+
+# Modules whose import cost would otherwise land on the first request using them
+_HEAVY_MODULES = (
+    "langchain_openai",
+    "langgraph.prebuilt",
+    "langchain_mcp_adapters.client",
+)
+
+class Warmup:
+    """Startup warmup that pays every first-request cost before taking traffic.
+
+    Imports the LangChain/LangGraph stack, loads the tokenizer, connects the
+    MCP pool (which discovers the tools), creates the shared chat models and
+    compiles the agents every search type uses. A failed run is retried in the
+    background until it succeeds. ``ready`` is True once warm and as long as
+    the MCP pool keeps at least one healthy connection.
+    """
+
+    def __init__(
+        self,
+        models: Optional[List[str]] = None,
+        retry_interval: float = WARMUP_RETRY_INTERVAL
+    ):
+        """Initialize the warmup.
+
+        Args:
+            models: Models to create chat clients and compile agents for
+                (defaults to WARMUP_MODELS, or DEFAULT_MODEL)
+            retry_interval: Seconds between attempts after a failed warmup
+        """
+        self.models = models or WARMUP_MODELS or [DEFAULT_MODEL]
+        self.retry_interval = retry_interval
+        self._warm = False
+        self.attempts = 0
+        self.error: Optional[str] = None
+        self.timings: Dict[str, float] = {}
+        self._pool: Optional[Any] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def ready(self) -> bool:
+        """Whether warmup finished and the MCP pool still has a healthy connection."""
+        return self._warm and self._pool is not None and self._pool.stats()["healthy"] > 0
+
+    async def _step(self, name: str, coro) -> None:
+        """Run one warmup step and record its latency."""
+        start = time.perf_counter()
+        try:
+            await coro
+        finally:
+            self.timings[name] = round((time.perf_counter() - start) * 1000, 1)
+
+    async def _import_modules(self) -> None:
+        """Import the heavy third-party modules the request path needs."""
+        # Imports take seconds of CPU; a thread keeps /healthz and /readyz answering
+        for module in _HEAVY_MODULES:
+            await asyncio.to_thread(importlib.import_module, module)
+
+    async def _load_tokenizer(self) -> None:
+        """Load the history tokenizer's encoding."""
+        from src.utils.tokens import load_tokenizer
+        await asyncio.to_thread(load_tokenizer)
+
+    async def _connect_mcp(self) -> None:
+        """Open the MCP connection pool and discover its tools."""
+        from src.utils.mcp_client import get_mcp_pool
+        self._pool = await get_mcp_pool()
+
+    async def _create_chat_models(self) -> None:
+        """Create the shared chat model clients used by direct answers."""
+        from src.utils.agent_cache import get_chat_model
+        for model in self.models:
+            for streaming in (False, True):
+                get_chat_model(model, streaming=streaming)
+
+    async def _compile_agents(self) -> None:
+        """Compile the retrieval agents per static prefix and the ingestion agent."""
+        from src.data_Ingestion.agent import DataIngestionAgent
+        from src.prompts.retrieval_prompts import RetrievalPrompts
+        from src.utils.agent_cache import get_compiled_agent
+        from src.utils.mcp_client import get_mcp_pool
+
+        # Search types answered by the ReAct agent, compiled per static prefix
+        kinds = ["focused", "timeline", "greeting"]
+        if not DETAILED_SEARCH_FAN_OUT:
+            kinds.append("detailed")
+        prompts = RetrievalPrompts()
+        tools = (await get_mcp_pool()).get_tools()
+        for model in self.models:
+            for kind in kinds:
+                for streaming in (False, True):
+                    await get_compiled_agent(
+                        model, tools, prompt=prompts.get_system_prefix(kind), streaming=streaming
+                    )
+            await DataIngestionAgent(model_name=model).setup()
+
+    async def run(self) -> None:
+        """Run every warmup step once.
+
+        Raises:
+            Exception: The first step that failed
+        """
+        self.attempts += 1
+        await self._step("imports", self._import_modules())
+        await self._step("tokenizer", self._load_tokenizer())
+        await self._step("mcp_pool", self._connect_mcp())
+        await self._step("chat_models", self._create_chat_models())
+        await self._step("agents", self._compile_agents())
+        self._warm = True
+        self.error = None
+
+    async def _run_until_ready(self) -> None:
+        """Retry the warmup until it succeeds."""
+        while True:
+            start = time.perf_counter()
+            try:
+                await self.run()
+                logger.info(
+                    "Warmup finished in %.0f ms: %s",
+                    (time.perf_counter() - start) * 1000, self.timings
+                )
+                return
+            except Exception as e:
+                self.error = str(e)
+                logger.warning(
+                    "Warmup attempt %d failed, retrying in %gs: %s",
+                    self.attempts, self.retry_interval, e
+                )
+            await asyncio.sleep(self.retry_interval)
+
+    def start(self) -> None:
+        """Start warming up in the background if it is not running or done."""
+        if self._task is None and not self._warm:
+            self._task = asyncio.create_task(self._run_until_ready())
+
+    async def stop(self) -> None:
+        """Stop a warmup still in progress."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the warmup state.
+
+        Returns:
+            Dict with readiness, attempts, the last error, the tokenizer in use
+            and per-step timings (ms)
+        """
+        return {
+            "ready": self.ready,
+            "warm": self._warm,
+            "attempts": self.attempts,
+            "error": self.error,
+            "tokenizer": tokenizer_name(),
+            "timings": dict(self.timings)
+        }
+
+# Global warmup instance
+_warmup = Warmup()
+
+def get_warmup() -> Warmup:
+    """Get the global warmup instance.
+
+    Returns:
+        Global Warmup instance
+    """
+    return _warmup
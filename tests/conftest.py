@@ -0,0 +1,123 @@
+import asyncio
+import os
+import re
+import tempfile
+from typing import ClassVar
+
+# Count tokens without downloading a tiktoken encoding, and keep the SQLite
+# databases out of the working tree
+os.environ.setdefault("HISTORY_TOKENIZER", "estimate")
+_state_dir = tempfile.mkdtemp(prefix="graphiti-tests-")
+for _name in ("INGEST_INDEX_DB", "INGEST_JOB_DB", "SESSION_DB"):
+    os.environ.setdefault(_name, os.path.join(_state_dir, _name.lower() + ".sqlite3"))
+
+import pytest
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.tools import StructuredTool
+
+def fake_answer(qid: str, words: int = 20) -> str:
+    """The answer FakeChat gives for a query tagged QID<qid>."""
+    body = " ".join(f"w-{qid}-{i}" for i in range(words))
+    return f"Answer: {body}\nSource: [Doc {qid} | 2024-01-01 | Sec]"
+
+class FakeChat(BaseChatModel):
+    """Chat model that calls one tool (search_nodes by default), then answers for the QID<...> in the query.
+
+    With streaming on, the answer is sent to the run's callbacks word by word,
+    yielding to the event loop between words so concurrent runs interleave.
+    """
+
+    model: str = "fake"
+    streaming: bool = False
+    api_key: object = None
+    first_tool: ClassVar[str] = "search_nodes"
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake"
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _reply(self, messages) -> AIMessage:
+        humans = [m for m in messages if isinstance(m, HumanMessage)]
+        match = re.search(r"QID<([^>]*)>", humans[-1].content if humans else "")
+        qid = match.group(1) if match else "none"
+        if not any(isinstance(m, ToolMessage) for m in messages):
+            return AIMessage(
+                content="",
+                tool_calls=[{
+                    "name": self.first_tool,
+                    "args": {"query": qid, "name": f"episode-{qid}"},
+                    "id": f"call-{qid}"
+                }]
+            )
+        return AIMessage(content=fake_answer(qid))
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        return ChatResult(generations=[ChatGeneration(message=self._reply(messages))])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        message = self._reply(messages)
+        if self.streaming and message.content and run_manager:
+            for piece in re.findall(r"\S+\s*|\s+", message.content):
+                await asyncio.sleep(0)
+                await run_manager.on_llm_new_token(piece)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+async def _search_nodes(query: str) -> str:
+    await asyncio.sleep(0)
+    return f'{{"nodes": [{{"uuid": "n-{query}", "name": "Node {query}"}}]}}'
+
+async def _search_facts(query: str) -> str:
+    await asyncio.sleep(0)
+    return f'{{"facts": [{{"uuid": "f-{query}", "fact": "fact about {query}"}}]}}'
+
+async def _add_episode(name: str, query: str = "") -> str:
+    await asyncio.sleep(0)
+    return f'{{"message": "Episode {name} added"}}'
+
+class FakePool:
+    """Stands in for the MCP connection pool with local search tools."""
+
+    started = True
+
+    def __init__(self):
+        self.tools = [
+            StructuredTool.from_function(coroutine=_search_nodes, name="search_nodes", description="nodes"),
+            StructuredTool.from_function(coroutine=_search_facts, name="search_facts", description="facts"),
+            StructuredTool.from_function(coroutine=_add_episode, name="add_episode", description="store"),
+        ]
+
+    def get_tools(self):
+        return list(self.tools)
+
+    def stats(self):
+        return {"size": 1, "healthy": 1, "in_use": 0}
+
+    async def close(self):
+        pass
+
+@pytest.fixture
+def fake_backends(monkeypatch):
+    """Replace the OpenAI chat model and the MCP pool with in-process fakes."""
+    import langchain_openai
+    import src.data_Ingestion.agent as ingestion_agent
+    import src.data_retrive.agent as retrieval_agent
+    import src.utils.agent_cache as agent_cache
+
+    pool = FakePool()
+
+    async def get_pool():
+        return pool
+
+    # agent_cache imports ChatOpenAI from the module when a model is first created
+    monkeypatch.setattr(langchain_openai, "ChatOpenAI", FakeChat)
+    monkeypatch.setattr(retrieval_agent, "get_mcp_pool", get_pool)
+    monkeypatch.setattr(ingestion_agent, "get_mcp_pool", get_pool)
+    monkeypatch.setattr(retrieval_agent, "ANSWER_CACHE_ENABLED", False)
+    agent_cache.get_agent_cache().clear()
+    yield pool
+    agent_cache.get_agent_cache().clear()
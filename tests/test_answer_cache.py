@@ -0,0 +1,72 @@
+import asyncio
+
+from src.utils.answer_cache import AnswerCache
+from src.utils.document_index import DocumentIndex
+
+KEY = AnswerCache.make_key("What is X?", None, "focused", False, "gpt-4")
+
+def test_generation_is_shared_through_the_document_index(tmp_path):
+    db_path = str(tmp_path / "index.sqlite3")
+    # Two caches with their own connections, as in two worker processes
+    server = AnswerCache(index=DocumentIndex(db_path), refresh_interval=0)
+    other = AnswerCache(index=DocumentIndex(db_path), refresh_interval=0)
+
+    async def run():
+        await server.refresh()
+        server.set(KEY, "Answer: X")
+        assert server.get(KEY) == "Answer: X"
+
+        assert await other.bump_generation() == 1
+        assert await server.refresh() == 1
+        assert server.get(KEY) is None
+        assert server.stats()["generation"] == 1
+
+    asyncio.run(run())
+
+def test_answer_computed_before_an_ingestion_is_not_stored(tmp_path):
+    db_path = str(tmp_path / "index.sqlite3")
+    server = AnswerCache(index=DocumentIndex(db_path), refresh_interval=0)
+
+    async def run():
+        before = await server.refresh()
+        DocumentIndex(db_path).bump_generation()
+        await server.refresh()
+        server.set(KEY, "Answer: stale", before)
+        assert server.get(KEY) is None
+
+    asyncio.run(run())
+
+def test_shared_generation_is_read_at_most_once_per_interval(tmp_path):
+    index = DocumentIndex(str(tmp_path / "index.sqlite3"))
+    reads = []
+    generation = index.generation
+
+    def counting_generation():
+        reads.append(1)
+        return generation()
+
+    index.generation = counting_generation
+    cache = AnswerCache(index=index, refresh_interval=60)
+
+    async def run():
+        for _ in range(5):
+            await cache.refresh()
+            cache.set(KEY, "Answer: X")
+            cache.get(KEY)
+            cache.stats()
+
+    asyncio.run(run())
+    assert len(reads) == 1
+
+def test_unreadable_generation_keeps_the_cached_one(tmp_path):
+    index = DocumentIndex(str(tmp_path / "index.sqlite3"))
+    cache = AnswerCache(index=index, refresh_interval=0)
+    cache.set(KEY, "Answer: X")
+
+    def locked():
+        raise RuntimeError("database is locked")
+
+    index.generation = locked
+
+    assert asyncio.run(cache.refresh()) == 0
+    assert cache.get(KEY) == "Answer: X"
@@ -0,0 +1,112 @@
+import random
+
+import pytest
+
+from src.utils.answer_parser import AnswerParser, parse_answer, parse_citation
+
+FOCUSED = (
+    "Answer: The warranty lasts two years.\n"
+    "Source: [Warranty Policy | 2024-03-01 | Coverage]"
+)
+
+MULTI_SOURCE = (
+    "Answer: Refunds take five days and need a receipt.\n"
+    "Source: [Refund Policy | 2024-01-10 | Timing]\n"
+    "Source: [Refund Policy | 2024-01-10 | Requirements]"
+)
+
+DETAILED = (
+    "Answer: Onboarding has three steps.\n"
+    "\n"
+    "First, accounts are created. Then training starts.\n"
+    "\n"
+    "Sources:\n"
+    "- [Onboarding Guide | 2023-11-02 | Accounts]\n"
+    "- [Training Plan | 2023-12-15 | Schedule]"
+)
+
+TIMELINE = (
+    "Answer:\n"
+    "2022: The project started.\n"
+    "2023: Version 2 shipped.\n"
+    "Source: [Project History | 2023-06-30 | Milestones] [Release Notes | 2023-05-01 | v2]"
+)
+
+UNBRACKETED = (
+    "Answer: Offices close at 6pm.\n"
+    "Source: Office Handbook | 2024-02-01 | Hours"
+)
+
+CASES = {
+    "focused": (
+        FOCUSED,
+        "The warranty lasts two years.",
+        [{"document": "Warranty Policy", "date": "2024-03-01", "section": "Coverage"}]
+    ),
+    "multi_source": (
+        MULTI_SOURCE,
+        "Refunds take five days and need a receipt.",
+        [
+            {"document": "Refund Policy", "date": "2024-01-10", "section": "Timing"},
+            {"document": "Refund Policy", "date": "2024-01-10", "section": "Requirements"}
+        ]
+    ),
+    "detailed": (
+        DETAILED,
+        "Onboarding has three steps.\n\nFirst, accounts are created. Then training starts.",
+        [
+            {"document": "Onboarding Guide", "date": "2023-11-02", "section": "Accounts"},
+            {"document": "Training Plan", "date": "2023-12-15", "section": "Schedule"}
+        ]
+    ),
+    "timeline": (
+        TIMELINE,
+        "2022: The project started.\n2023: Version 2 shipped.",
+        [
+            {"document": "Project History", "date": "2023-06-30", "section": "Milestones"},
+            {"document": "Release Notes", "date": "2023-05-01", "section": "v2"}
+        ]
+    ),
+    "unbracketed": (
+        UNBRACKETED,
+        "Offices close at 6pm.",
+        [{"document": "Office Handbook", "date": "2024-02-01", "section": "Hours"}]
+    )
+}
+
+@pytest.mark.parametrize("name", CASES)
+def test_parse_answer(name):
+    text, answer, citations = CASES[name]
+
+    assert parse_answer(text) == (answer, citations)
+
+def random_chunks(text, rng):
+    """Split text at random points, including inside markers and citations."""
+    chunks, start = [], 0
+    while start < len(text):
+        end = start + rng.randint(1, 6)
+        chunks.append(text[start:end])
+        start = end
+    return chunks
+
+@pytest.mark.parametrize("name", CASES)
+def test_chunked_parsing_matches_parse_answer(name):
+    text = CASES[name][0]
+    expected = parse_answer(text)
+    rng = random.Random(name)
+
+    for _ in range(200):
+        parser = AnswerParser()
+        events = []
+        for chunk in random_chunks(text, rng):
+            events += parser.feed(chunk)
+        events += parser.finish()
+
+        tokens = "".join(value for kind, value in events if kind == "token")
+        citations = [value for kind, value in events if kind == "citation"]
+        assert (tokens.strip(), citations) == expected
+        assert (parser.answer, parser.citations) == expected
+
+def test_parse_citation_fills_missing_parts_with_none():
+    assert parse_citation("[Handbook]") == {"document": "Handbook", "date": None, "section": None}
+    assert parse_citation(" [ ] ") is None
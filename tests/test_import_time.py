@@ -0,0 +1,36 @@
+import json
+import os
+import re
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Deferred until an agent is set up; importing a CLI must not pull them in
+HEAVY_MODULES = ("langchain_openai", "langgraph", "langchain_mcp_adapters")
+
+# Cumulative import time allowed for a CLI module. It is about 0.25 s today,
+# and was about 1.6 s while the LLM stack was imported eagerly.
+MAX_IMPORT_SECONDS = 0.8
+
+@pytest.mark.parametrize("module", ["src.examples.search_knowledge", "src.examples.ingest_document"])
+def test_cli_import_stays_light(module):
+    code = (
+        f"import sys, json; import {module}; "
+        f"print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+
+    assert json.loads(result.stdout) == []
+
+    # -X importtime lines: "import time: <self us> | <cumulative us> | <module>"
+    cumulative = re.search(
+        rf"^import time:\s+\d+ \|\s+(\d+) \| {re.escape(module)}$", result.stderr, re.MULTILINE
+    )
+    assert cumulative is not None, result.stderr[-2000:]
+    assert int(cumulative.group(1)) / 1e6 < MAX_IMPORT_SECONDS
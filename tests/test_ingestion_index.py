@@ -0,0 +1,40 @@
+import asyncio
+
+import src.data_Ingestion.agent as ingestion_agent
+from src.data_Ingestion.agent import DataIngestionAgent
+from src.utils.answer_cache import AnswerCache
+from src.utils.document_index import DocumentIndex, hash_file
+
+from tests.conftest import FakeChat
+
+def _setup(monkeypatch, tmp_path):
+    index = DocumentIndex(str(tmp_path / "index.sqlite3"))
+    cache = AnswerCache()
+    monkeypatch.setattr(ingestion_agent, "get_document_index", lambda: index)
+    monkeypatch.setattr(ingestion_agent, "get_answer_cache", lambda: cache)
+    document = tmp_path / "QID<doc>.md"
+    document.write_text("# Title\n\nSome text.\n")
+    return index, cache, str(document)
+
+def test_ingestion_that_stores_no_episode_is_not_indexed(fake_backends, monkeypatch, tmp_path):
+    index, cache, document = _setup(monkeypatch, tmp_path)
+
+    result = asyncio.run(DataIngestionAgent().process_document(document))
+
+    assert result["status"] == "error"
+    assert index.lookup(hash_file(document)) is None
+    assert cache.generation == 0
+
+def test_successful_ingestion_is_indexed_and_invalidates_answers(fake_backends, monkeypatch, tmp_path):
+    index, cache, document = _setup(monkeypatch, tmp_path)
+    monkeypatch.setattr(FakeChat, "first_tool", "add_episode")
+
+    result = asyncio.run(DataIngestionAgent().process_document(document))
+
+    assert result["status"] == "success"
+    assert result["episodes"]
+    assert index.lookup(hash_file(document))["episodes"] == result["episodes"]
+    assert cache.generation == 1
+
+    again = asyncio.run(DataIngestionAgent().process_document(document))
+    assert again["duplicate"] is True
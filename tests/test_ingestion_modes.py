@@ -0,0 +1,63 @@
+import asyncio
+import os
+import subprocess
+import sys
+
+import pytest
+
+import src.data_Ingestion.agent as ingestion_agent
+from src.data_Ingestion.agent import DataIngestionAgent
+from src.utils.answer_cache import AnswerCache
+from src.utils.document_index import DocumentIndex
+
+from tests.conftest import FakeChat
+
+PHASES = {
+    "sequential": ["processing", "metadata", "relationships"],
+    "pipeline": ["processing", "metadata+relationships"],
+    "single_pass": ["single_pass"]
+}
+
+TIMINGS = {
+    "sequential": {"processing", "metadata", "relationships", "total"},
+    "pipeline": {"processing", "metadata", "relationships", "total"},
+    "single_pass": {"single_pass", "total"}
+}
+
+@pytest.mark.parametrize("mode", list(PHASES))
+def test_ingestion_mode_runs_its_phases(mode, fake_backends, monkeypatch, tmp_path):
+    index = DocumentIndex(str(tmp_path / "index.sqlite3"))
+    monkeypatch.setattr(ingestion_agent, "get_document_index", lambda: index)
+    monkeypatch.setattr(ingestion_agent, "get_answer_cache", lambda: AnswerCache())
+    monkeypatch.setattr(FakeChat, "first_tool", "add_episode")
+    document = tmp_path / "QID<doc>.md"
+    document.write_text("# Title\n\nSome text.\n")
+    phases = []
+
+    result = asyncio.run(DataIngestionAgent().process_document(str(document), mode=mode, on_phase=phases.append))
+
+    assert result["status"] == "success"
+    assert result["mode"] == mode
+    assert phases == PHASES[mode]
+    assert set(result["timings"]) == TIMINGS[mode]
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def _load_settings(**env):
+    environ = {k: v for k, v in os.environ.items() if k != "INGEST_MODE"}
+    return subprocess.run(
+        [sys.executable, "-c", "from src.config.settings import INGEST_MODE; print(INGEST_MODE)"],
+        env={**environ, **env}, cwd=ROOT, capture_output=True, text=True
+    )
+
+def test_default_mode_is_sequential():
+    result = _load_settings()
+
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "sequential"
+
+def test_unknown_mode_is_rejected_at_load_time():
+    result = _load_settings(INGEST_MODE="parallel")
+
+    assert result.returncode != 0
+    assert "INGEST_MODE must be one of sequential, pipeline, single_pass" in result.stderr
@@ -0,0 +1,108 @@
+import asyncio
+import functools
+import hashlib
+import sqlite3
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import src.api.route.ingestion as ingestion_route
+from src.utils.document_index import DocumentIndex
+from src.utils.uploads import UploadSizeLimitMiddleware, spool_upload
+
+def make_app():
+    app = FastAPI()
+    app.include_router(ingestion_route.router)
+    return app
+
+@pytest.fixture
+def client():
+    with TestClient(make_app(), raise_server_exceptions=False) as client:
+        yield client
+
+class LockedQueue:
+    async def start(self):
+        pass
+
+    def enqueue(self, *args, **kwargs):
+        raise sqlite3.OperationalError("database is locked")
+
+def test_failed_enqueue_deletes_the_spooled_upload(client, monkeypatch, tmp_path):
+    spool_dir = tmp_path / "spool"
+    monkeypatch.setattr(ingestion_route, "get_job_queue", lambda: LockedQueue())
+    monkeypatch.setattr(ingestion_route, "INGEST_JOB_SPOOL_DIR", str(spool_dir))
+
+    response = client.post("/ingest/jobs", files={"file": ("doc.md", b"# Title\n")})
+
+    assert response.status_code == 500
+    assert list(spool_dir.iterdir()) == []
+
+class UnusedAgent:
+    def __init__(self, *args, **kwargs):
+        raise AssertionError("a duplicate upload must not build an ingestion agent")
+
+class ClosableAgent:
+    async def process_document(self, *args, **kwargs):
+        raise AssertionError("a duplicate upload must not be processed")
+
+    async def close(self):
+        pass
+
+def test_duplicate_upload_returns_while_ingestion_is_saturated(monkeypatch, tmp_path):
+    content = b"# Title\n\nAlready ingested.\n"
+    index = DocumentIndex(str(tmp_path / "index.sqlite3"))
+    index.record(hashlib.sha256(content).hexdigest(), "doc.md", "gpt-4", ["episode-1"], "cached summary")
+    monkeypatch.setattr(ingestion_route, "get_document_index", lambda: index)
+    monkeypatch.setattr(ingestion_route, "DataIngestionAgent", UnusedAgent)
+
+    async def run():
+        # Every ingestion slot is taken
+        monkeypatch.setattr(ingestion_route, "_ingest_semaphore", asyncio.Semaphore(0))
+        transport = httpx.ASGITransport(app=make_app())
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            single = await asyncio.wait_for(
+                client.post("/ingest/document", files={"file": ("doc.md", content)}), 5
+            )
+            # The batch builds its shared agent up front, so only check the slot here
+            monkeypatch.setattr(ingestion_route, "DataIngestionAgent", lambda **kwargs: ClosableAgent())
+            batch = await asyncio.wait_for(
+                client.post("/ingest/batch", files=[("files", ("doc.md", content))]), 5
+            )
+        return single, batch
+
+    single, batch = asyncio.run(run())
+
+    assert single.status_code == 200
+    assert single.json()["duplicate"] is True
+    assert single.json()["summary"] == "cached summary"
+    assert batch.status_code == 200
+    assert [r["duplicate"] for r in batch.json()] == [True]
+
+def test_upload_declaring_too_large_a_body_is_rejected_before_it_is_read(monkeypatch):
+    received = []
+    app = make_app()
+    app.add_middleware(
+        UploadSizeLimitMiddleware, paths=("/ingest/document", "/ingest/jobs"), max_bytes=1024, overhead=0
+    )
+    monkeypatch.setattr(ingestion_route, "spool_upload", lambda *args, **kwargs: received.append(1))
+
+    with TestClient(app) as client:
+        response = client.post("/ingest/jobs", files={"file": ("doc.md", b"x" * 4096)})
+
+    assert response.status_code == 413
+    assert "1024 bytes" in response.json()["detail"]
+    assert received == []
+
+def test_upload_larger_than_the_cap_is_rejected_while_spooling(monkeypatch, tmp_path):
+    # Without the middleware, the cap is enforced as the file is copied
+    monkeypatch.setattr(ingestion_route, "get_job_queue", lambda: LockedQueue())
+    monkeypatch.setattr(ingestion_route, "INGEST_JOB_SPOOL_DIR", str(tmp_path))
+    monkeypatch.setattr(ingestion_route, "spool_upload", functools.partial(spool_upload, max_bytes=1024))
+
+    with TestClient(make_app()) as client:
+        response = client.post("/ingest/jobs", files={"file": ("doc.md", b"x" * 4096)})
+
+    assert response.status_code == 413
+    assert list(tmp_path.iterdir()) == []
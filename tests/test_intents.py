@@ -0,0 +1,25 @@
+import pytest
+
+from src.utils.intents import get_intent_classifier
+
+def _intent(query):
+    intent = get_intent_classifier().classify(query)
+    return intent.name if intent else None
+
+@pytest.mark.parametrize("query", [
+    "thanks", "Thank you!", "thanks so much", "ok thanks", "Great, thank you.", "cheers", "thx bot"
+])
+def test_thanks_phrases(query):
+    assert _intent(query) == "thanks"
+
+@pytest.mark.parametrize("query", ["ok", "okay", "great", "cool", "perfect", "awesome", "ok great"])
+def test_acknowledgements_alone_go_to_the_agent(query):
+    assert _intent(query) is None
+
+@pytest.mark.parametrize("query", ["thanks, what about the 2023 report?", "this", "hi, who signed the contract?"])
+def test_questions_go_to_the_agent(query):
+    assert _intent(query) is None
+
+def test_greeting_and_empty():
+    assert _intent("Hello there!") == "greeting"
+    assert _intent("  ") == "empty"
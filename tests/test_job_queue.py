@@ -0,0 +1,112 @@
+import asyncio
+import sqlite3
+
+import pytest
+
+import src.utils.job_queue as job_queue_module
+from src.utils.job_queue import IngestionJobQueue
+
+def test_opens_database_created_before_content_hash_and_force(tmp_path):
+    db_path = str(tmp_path / "jobs.sqlite3")
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        "CREATE TABLE ingestion_jobs (id TEXT PRIMARY KEY, status TEXT NOT NULL, phase TEXT, "
+        "file_path TEXT NOT NULL, filename TEXT NOT NULL, model TEXT NOT NULL, mode TEXT NOT NULL, "
+        "created_at REAL NOT NULL, started_at REAL, finished_at REAL, timings TEXT, summary TEXT, "
+        "error TEXT, owner_pid INTEGER)"
+    )
+    conn.execute(
+        "INSERT INTO ingestion_jobs (id, status, file_path, filename, model, mode, created_at) "
+        "VALUES ('old', 'queued', 'a.md', 'a.md', 'gpt-4', 'pipeline', 1)"
+    )
+    conn.commit()
+    conn.close()
+
+    queue = IngestionJobQueue(db_path=db_path)
+    job_id = queue.enqueue("b.md", "b.md", content_hash="abc", force=True)
+
+    assert queue.get_job(job_id)["status"] == "queued"
+    old = queue._claim_next()
+    assert old["id"] == "old" and old["content_hash"] is None and old["force"] == 0
+    new = queue._claim_next()
+    assert new["id"] == job_id and new["content_hash"] == "abc" and new["force"] == 1
+
+class FakeIngestionAgent:
+    def __init__(self, model_name=None):
+        self.model_name = model_name
+
+    async def process_document(self, file_path, mode=None, on_phase=None, **kwargs):
+        on_phase("processing")
+        await asyncio.sleep(0)
+        return {"status": "success", "summary": f"ingested {file_path}"}
+
+async def wait_for_status(queue, job_id, status):
+    for _ in range(200):
+        job = await asyncio.to_thread(queue.get_job, job_id)
+        if job["status"] == status:
+            return job
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"job {job_id} never reached {status}")
+
+@pytest.fixture
+def job_queue(tmp_path, monkeypatch):
+    monkeypatch.setattr(job_queue_module, "DataIngestionAgent", FakeIngestionAgent)
+    monkeypatch.setattr(job_queue_module, "_RETRY_DELAY", 0.01)
+    return IngestionJobQueue(db_path=str(tmp_path / "jobs.sqlite3"), workers=1, poll_interval=0.05)
+
+def test_worker_survives_database_errors_and_retries_finish(job_queue, tmp_path, monkeypatch):
+    spooled = tmp_path / "doc.md"
+    spooled.write_text("hello")
+    claim, finish = job_queue._claim_next, job_queue._finish
+    failures = {"claim": 1, "finish": 2}
+
+    def flaky(name, method):
+        def call(*args):
+            if failures[name]:
+                failures[name] -= 1
+                raise sqlite3.OperationalError("database is locked")
+            return method(*args)
+        return call
+
+    monkeypatch.setattr(job_queue, "_claim_next", flaky("claim", claim))
+    monkeypatch.setattr(job_queue, "_finish", flaky("finish", finish))
+
+    async def run():
+        await job_queue.start()
+        try:
+            job_id = job_queue.enqueue(str(spooled), "doc.md")
+            return await wait_for_status(job_queue, job_id, "succeeded")
+        finally:
+            await job_queue.stop()
+
+    job = asyncio.run(run())
+    assert job["summary"] == f"ingested {spooled}"
+    assert failures == {"claim": 0, "finish": 0}
+    assert not spooled.exists()
+
+def test_unstored_outcome_keeps_the_spooled_file(job_queue, tmp_path, monkeypatch):
+    spooled = tmp_path / "doc.md"
+    spooled.write_text("hello")
+    attempts = []
+
+    def failing_finish(job_id, result):
+        attempts.append(job_id)
+        raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(job_queue, "_finish", failing_finish)
+
+    async def run():
+        await job_queue.start()
+        try:
+            job_id = job_queue.enqueue(str(spooled), "doc.md")
+            while len(attempts) < job_queue_module._FINISH_ATTEMPTS:
+                await asyncio.sleep(0.01)
+            await asyncio.sleep(0.05)
+            return await asyncio.to_thread(job_queue.get_job, job_id)
+        finally:
+            await job_queue.stop()
+
+    job = asyncio.run(run())
+    assert len(attempts) == job_queue_module._FINISH_ATTEMPTS
+    assert job["status"] == "running" and job["phase"] == "processing"
+    assert spooled.exists()
@@ -0,0 +1,71 @@
+import asyncio
+
+import anyio
+import pytest
+from langchain_core.tools import StructuredTool
+from mcp.shared.exceptions import McpError
+from mcp.types import CallToolResult, ErrorData, TextContent
+
+from src.utils.mcp_client import MCPConnectionPool
+
+class FakeSession:
+    def __init__(self, error=None):
+        self.error = error
+        self.calls = 0
+
+    async def call_tool(self, name, arguments):
+        self.calls += 1
+        if self.error is not None:
+            raise self.error
+        return CallToolResult(content=[TextContent(type="text", text="ok")], isError=False)
+
+class FakeClient:
+    def __init__(self, session):
+        self.sessions = {"graphiti": session}
+
+class FakeConnection:
+    def __init__(self, session):
+        self.client = FakeClient(session)
+        self.healthy = True
+        self.in_use = 0
+
+def make_tool(name, *sessions):
+    pool = MCPConnectionPool(health_check_interval=0)
+    pool._pool = [FakeConnection(session) for session in sessions]
+    pool._started = True
+
+    async def search_nodes(query: str) -> str:
+        """Search the graph."""
+
+    return pool, pool._make_tool("graphiti", StructuredTool.from_function(coroutine=search_nodes, name=name))
+
+def test_transport_error_retries_on_another_connection():
+    broken, working = FakeSession(anyio.ClosedResourceError()), FakeSession()
+    pool, tool = make_tool("search_nodes", broken, working)
+
+    result = asyncio.run(tool.ainvoke({"query": "x"}))
+
+    assert "ok" in str(result)
+    assert (broken.calls, working.calls) == (1, 1)
+    assert [conn.healthy for conn in pool._pool] == [False, True]
+
+def test_server_error_is_raised_without_retry():
+    error = McpError(ErrorData(code=-32602, message="invalid arguments"))
+    failing, other = FakeSession(error), FakeSession()
+    pool, tool = make_tool("search_nodes", failing, other)
+
+    with pytest.raises(McpError):
+        asyncio.run(tool.ainvoke({"query": "x"}))
+
+    assert (failing.calls, other.calls) == (1, 0)
+    assert all(conn.healthy for conn in pool._pool)
+
+def test_write_tool_is_not_retried_after_a_transport_error():
+    broken, working = FakeSession(ConnectionResetError()), FakeSession()
+    pool, tool = make_tool("add_episode", broken, working)
+
+    with pytest.raises(ConnectionResetError):
+        asyncio.run(tool.ainvoke({"query": "x"}))
+
+    assert working.calls == 0
+    assert not pool._pool[0].healthy
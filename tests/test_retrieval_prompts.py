@@ -0,0 +1,52 @@
+import asyncio
+
+import src.prompts.retrieval_prompts as retrieval_prompts
+from src.data_retrive.agent import DataRetrievalAgent
+from src.prompts.retrieval_prompts import RetrievalPrompts
+from src.utils.agent_cache import get_agent_cache
+from src.utils.prompt_stats import get_prompt_stats
+
+def test_doc_types_go_in_the_suffix_not_the_prefix():
+    plain = RetrievalPrompts.get_detailed_search_prompt("What is X?")
+    filtered = RetrievalPrompts.get_detailed_search_prompt("What is X?", doc_types=["policy", "memo"])
+    prefix = RetrievalPrompts.get_system_prefix("detailed")
+
+    assert plain.startswith(prefix) and filtered.startswith(prefix)
+    assert "policy, memo" not in prefix
+    assert "Only use information from these document types: policy, memo" in filtered
+
+def test_searches_with_different_doc_types_share_one_compiled_agent(fake_backends):
+    agent = DataRetrievalAgent()
+
+    async def run():
+        for doc_types in (None, ["policy"], ["memo", "report"]):
+            result = await agent.search_knowledge(
+                "What about QID<x>?", doc_types=doc_types, session_id="s", store_session=False
+            )
+            assert result["status"] == "success"
+
+    asyncio.run(run())
+
+    assert get_agent_cache().stats()["size"] == 1
+
+def test_prefix_tokens_are_counted_once_per_kind(fake_backends, monkeypatch):
+    counted = []
+
+    def counting(text):
+        counted.append(text)
+        return len(text)
+
+    monkeypatch.setattr(retrieval_prompts, "count_tokens", counting)
+    retrieval_prompts._prefix_tokens.cache_clear()
+    agent = DataRetrievalAgent()
+
+    async def run():
+        for i in range(3):
+            await agent.search_knowledge(f"What about QID<{i}>?", session_id="s", store_session=False)
+
+    asyncio.run(run())
+    retrieval_prompts._prefix_tokens.cache_clear()
+
+    prefix = RetrievalPrompts.get_system_prefix("focused")
+    assert counted == [prefix]
+    assert get_prompt_stats().stats()["focused"]["prefix_tokens"] >= 3 * len(prefix)
@@ -0,0 +1,71 @@
+import asyncio
+import time
+
+from src.utils.session_manager import SessionManager
+from src.utils.session_store import InMemorySessionStore
+
+def _manager(**kwargs):
+    kwargs.setdefault("sweep_interval", 0)
+    return SessionManager(store=InMemorySessionStore(), **kwargs)
+
+def test_idle_session_expires_after_ttl():
+    manager = _manager(ttl=0.1)
+    manager.get_memory("s").add_interaction("q", "a")
+    assert manager.get_memory("s").get_formatted_history() == "Human: q\nAssistant: a"
+
+    time.sleep(0.15)
+
+    assert manager.get_memory("s").get_formatted_history() == ""
+    assert manager.expirations == 1
+
+def test_sweep_drops_only_expired_sessions():
+    manager = _manager(ttl=0.1)
+    manager.get_memory("old")
+    time.sleep(0.15)
+    manager.get_memory("new")
+
+    assert manager.sweep() == 1
+    assert list(manager.sessions) == ["new"]
+
+def test_background_sweep_expires_sessions():
+    async def run():
+        manager = _manager(ttl=0.05, sweep_interval=0.02)
+        manager.start()
+        manager.get_memory("s")
+        await asyncio.sleep(0.2)
+        await manager.close()
+        return manager
+
+    manager = asyncio.run(run())
+
+    assert manager.sessions == {}
+    assert manager.expirations == 1
+
+def test_least_recently_used_session_is_evicted_beyond_max_sessions():
+    manager = _manager(max_sessions=2)
+    manager.get_memory("a").add_interaction("qa", "aa")
+    manager.get_memory("b")
+    # Using "a" again makes "b" the least recently used
+    manager.get_memory("a")
+    manager.get_memory("c")
+
+    assert list(manager.sessions) == ["a", "c"]
+    assert manager.evictions == 1
+    assert manager.get_memory("a").get_formatted_history() == "Human: qa\nAssistant: aa"
+
+def test_create_false_returns_a_transient_memory():
+    manager = _manager(max_sessions=1)
+    manager.get_memory("kept")
+
+    memory = manager.get_memory("unknown", create=False)
+    memory.add_interaction("q", "a")
+
+    assert list(manager.sessions) == ["kept"]
+    assert manager.evictions == 0
+    assert manager.get_memory("unknown", create=False).get_formatted_history() == ""
+
+def test_create_false_returns_an_existing_session():
+    manager = _manager()
+    memory = manager.get_memory("s")
+
+    assert manager.get_memory("s", create=False) is memory
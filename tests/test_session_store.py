@@ -0,0 +1,93 @@
+import asyncio
+import sqlite3
+import time
+
+import pytest
+
+from src.utils.session_manager import SessionManager
+from src.utils.session_store import SQLiteSessionStore
+
+def _manager(db_path, **kwargs):
+    return SessionManager(store=SQLiteSessionStore(db_path=db_path, **kwargs), sweep_interval=0)
+
+def test_workers_see_each_others_interactions_after_a_flush(tmp_path):
+    db_path = str(tmp_path / "sessions.sqlite3")
+    first, second = _manager(db_path), _manager(db_path)
+
+    first.get_memory("s").add_interaction("q1", "a1")
+    assert second.get_memory("s").get_formatted_history() == ""
+    first.store.flush()
+    # The second worker only learns about the change when it flushes
+    assert not second.store.changed("s")
+    second.store.flush()
+    assert second.get_memory("s").get_formatted_history() == "Human: q1\nAssistant: a1"
+
+    second.get_memory("s").add_interaction("q2", "a2")
+    second.store.flush()
+    first.store.flush()
+    assert first.get_memory("s").get_formatted_history().endswith("Human: q2\nAssistant: a2")
+    assert first.reloads == 1
+
+    first.clear_session("s")
+    first.store.flush()
+    second.store.flush()
+    assert second.get_memory("s").get_formatted_history() == ""
+    first.store.close()
+    second.store.close()
+
+def test_requests_do_not_wait_for_a_locked_database(tmp_path):
+    db_path = str(tmp_path / "sessions.sqlite3")
+    manager = _manager(db_path, batch_size=1, timeout=0.2)
+    manager.get_memory("s").add_interaction("q1", "a1")
+    manager.store.flush()
+
+    # Another process holds the write lock
+    blocker = sqlite3.connect(db_path, isolation_level=None)
+    blocker.execute("BEGIN EXCLUSIVE")
+    try:
+        start = time.perf_counter()
+        for i in range(50):
+            memory = manager.get_memory("s")
+            memory.add_interaction(f"q{i + 2}", "a")
+            manager.clear_session("other")
+        assert time.perf_counter() - start < 0.1
+        # The flush, which runs in a thread, gives up after the short timeout
+        with pytest.raises(sqlite3.OperationalError):
+            manager.store.flush()
+    finally:
+        blocker.execute("ROLLBACK")
+        blocker.close()
+
+    # Nothing buffered was lost
+    manager.store.flush()
+    other = _manager(db_path)
+    assert other.get_memory("s").get_formatted_history().endswith("Human: q51\nAssistant: a")
+    manager.store.close()
+    other.store.close()
+
+def test_flush_loop_writes_in_the_background(tmp_path):
+    db_path = str(tmp_path / "sessions.sqlite3")
+
+    async def run():
+        manager = SessionManager(
+            store=SQLiteSessionStore(db_path=db_path, batch_size=2),
+            sweep_interval=0,
+            flush_interval=60
+        )
+        manager.start()
+        memory = manager.get_memory("s")
+        memory.add_interaction("q1", "a1")
+        memory.add_interaction("q2", "a2")
+        # A full batch wakes the flusher long before the interval
+        for _ in range(100):
+            await asyncio.sleep(0.01)
+            if manager.store.flushes:
+                break
+        flushes = manager.store.flushes
+        await manager.close()
+        return flushes
+
+    assert asyncio.run(run()) >= 1
+    other = _manager(db_path)
+    assert "Human: q2" in other.get_memory("s").get_formatted_history()
+    other.store.close()
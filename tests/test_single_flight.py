@@ -0,0 +1,155 @@
+import asyncio
+
+import pytest
+
+from src.utils.single_flight import SingleFlight
+
+class Producer:
+    """Shared stream source that yields items as the test releases them."""
+
+    def __init__(self, items, error=None):
+        self.items = items
+        self.error = error
+        self.starts = 0
+        self.cancelled = False
+        self.release = asyncio.Event()
+
+    async def __call__(self):
+        self.starts += 1
+        try:
+            for item in self.items:
+                await self.release.wait()
+                yield item
+            if self.error is not None:
+                raise self.error
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+
+async def collect(stream):
+    return [item async for item in stream]
+
+def test_concurrent_subscribers_share_one_run():
+    async def run():
+        flight = SingleFlight()
+        producer = Producer(["a", "b", "c"])
+        first = asyncio.create_task(collect(flight.subscribe("key", producer)))
+        await asyncio.sleep(0)
+        second = asyncio.create_task(collect(flight.subscribe("key", producer)))
+        await asyncio.sleep(0)
+        producer.release.set()
+        return producer, flight, await first, await second
+
+    producer, flight, first, second = asyncio.run(run())
+
+    assert first == second == ["a", "b", "c"]
+    assert producer.starts == 1
+    assert flight.stats() == {"in_flight": 0, "runs": 1, "shared": 1}
+
+def test_late_subscriber_replays_from_the_start():
+    async def run():
+        flight = SingleFlight()
+        producer = Producer(["a", "b"])
+        producer.release.set()
+        first = flight.subscribe("key", producer)
+        assert await first.__anext__() == "a"
+        second = asyncio.create_task(collect(flight.subscribe("key", producer)))
+        return ["a"] + await collect(first), await second
+
+    first, second = asyncio.run(run())
+
+    assert first == second == ["a", "b"]
+
+def test_producer_is_cancelled_when_the_last_subscriber_leaves():
+    async def run():
+        flight = SingleFlight()
+        producer = Producer(["a", "b"])
+        streams = [flight.subscribe("key", producer) for _ in range(2)]
+        waiting = [asyncio.create_task(stream.__anext__()) for stream in streams]
+        await asyncio.sleep(0)
+
+        waiting[0].cancel()
+        await asyncio.gather(waiting[0], return_exceptions=True)
+        await asyncio.sleep(0)
+        still_running = not producer.cancelled
+
+        waiting[1].cancel()
+        await asyncio.gather(waiting[1], return_exceptions=True)
+        for _ in range(3):
+            await asyncio.sleep(0)
+        return producer, flight, still_running
+
+    producer, flight, still_running = asyncio.run(run())
+
+    assert still_running
+    assert producer.cancelled
+    assert flight.stats()["in_flight"] == 0
+
+def test_producer_error_reaches_every_subscriber():
+    async def run():
+        flight = SingleFlight()
+        producer = Producer(["a"], error=ValueError("boom"))
+        producer.release.set()
+        return await asyncio.gather(
+            collect(flight.subscribe("key", producer)),
+            collect(flight.subscribe("key", producer)),
+            return_exceptions=True
+        )
+
+    results = asyncio.run(run())
+
+    assert all(isinstance(result, ValueError) for result in results)
+
+@pytest.mark.parametrize("started", [True, False])
+def test_cancelled_producer_fails_remaining_subscribers_with_runtime_error(started):
+    async def run():
+        flight = SingleFlight()
+        producer = Producer(["a", "b"])
+        subscribers = [
+            asyncio.create_task(collect(flight.subscribe("key", producer))) for _ in range(2)
+        ]
+        await asyncio.sleep(0)
+        if started:
+            await asyncio.sleep(0)
+            assert producer.starts == 1
+        # The shared run is cancelled from outside, e.g. at shutdown
+        flight._streams["key"].task.cancel()
+        return await asyncio.gather(*subscribers, return_exceptions=True), flight
+
+    results, flight = asyncio.run(run())
+
+    for result in results:
+        assert isinstance(result, RuntimeError)
+        assert "cancelled" in str(result)
+    assert flight.stats()["in_flight"] == 0
+
+def test_do_coalesces_calls_and_shares_errors():
+    async def run():
+        flight = SingleFlight()
+        calls = 0
+
+        async def fn():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            raise ValueError("boom")
+
+        results = await asyncio.gather(
+            flight.do("key", fn), flight.do("key", fn), return_exceptions=True
+        )
+        return calls, results
+
+    calls, results = asyncio.run(run())
+
+    assert calls == 1
+    assert all(isinstance(result, ValueError) for result in results)
+
+def test_different_keys_run_separately():
+    async def run():
+        flight = SingleFlight()
+        producer = Producer(["x"])
+        producer.release.set()
+        await asyncio.gather(*(collect(flight.subscribe(key, producer)) for key in ("a", "b")))
+        return producer.starts
+
+    assert asyncio.run(run()) == 2
@@ -0,0 +1,39 @@
+import asyncio
+
+from src.data_retrive.agent import StreamingHandler
+
+async def collect(handler, tokens, gap, **coalesce):
+    """Feed tokens with a pause after each one, so the queue is often empty."""
+    async def produce():
+        for token in tokens:
+            await handler.on_llm_new_token(token)
+            await asyncio.sleep(gap)
+        handler.finish()
+
+    producer = asyncio.create_task(produce())
+    frames = [frame async for frame in handler.aiter(**coalesce)]
+    await producer
+    return frames
+
+def test_byte_threshold_holds_the_buffer_while_the_queue_is_empty():
+    tokens = ["abcd"] * 10
+
+    frames = asyncio.run(collect(StreamingHandler(), tokens, 0.001, max_bytes=16))
+
+    assert frames == ["abcd" * 4, "abcd" * 4, "abcd" * 2]
+
+def test_window_flushes_on_its_deadline():
+    tokens = ["ab"] * 6
+
+    # The window closes after 2-3 tokens, long before 1000 bytes are buffered
+    frames = asyncio.run(collect(StreamingHandler(), tokens, 0.02, max_bytes=1000, window_ms=50))
+
+    assert "".join(frames) == "ab" * 6
+    assert 2 <= len(frames) < len(tokens)
+
+def test_no_coalescing_yields_every_token():
+    tokens = ["a", "b", "c"]
+
+    frames = asyncio.run(collect(StreamingHandler(), tokens, 0))
+
+    assert frames == tokens
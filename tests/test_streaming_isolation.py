@@ -0,0 +1,52 @@
+import asyncio
+
+from src.data_retrive.agent import DataRetrievalAgent
+from src.utils.session_manager import get_session_manager
+
+from tests.conftest import fake_answer
+
+STREAMS = 100
+
+async def _collect(agent: DataRetrievalAgent, qid: str):
+    frames = []
+    async for frame in agent.stream_search_knowledge(
+        query=f"What about QID<{qid}>?",
+        session_id=f"session-{qid}",
+        coalesce_bytes=0,
+        coalesce_ms=0
+    ):
+        frames.append(frame)
+    return frames
+
+def test_concurrent_streams_do_not_share_tokens(fake_backends):
+    """100 concurrent streams on one agent each get exactly their own tokens and citation."""
+    agent = DataRetrievalAgent()
+    qids = [f"q{i}" for i in range(STREAMS)]
+
+    async def run():
+        return await asyncio.gather(*(_collect(agent, qid) for qid in qids))
+
+    results = asyncio.run(run())
+
+    for qid, frames in zip(qids, results):
+        types = [frame.type for frame in frames]
+        assert "error" not in types, [f.chunk for f in frames if f.type == "error"]
+        assert types[-1] == "end"
+        assert frames[-1].metadata["session_id"] == f"session-{qid}"
+
+        tokens = [frame.chunk for frame in frames if frame.type == "token"]
+        # Many token frames, and every one belongs to this stream's answer
+        assert len(tokens) > 10
+        for token in tokens:
+            assert token.strip().startswith(f"w-{qid}-"), (qid, token)
+        expected = fake_answer(qid).split("\n", 1)[0][len("Answer: "):]
+        assert "".join(tokens).strip() == expected
+
+        citations = [frame.metadata for frame in frames if frame.type == "citation"]
+        assert citations == [{"document": f"Doc {qid}", "date": "2024-01-01", "section": "Sec"}]
+
+        # Each session remembers only its own interaction
+        history = get_session_manager().get_memory(f"session-{qid}", create=False).get_formatted_history()
+        assert f"QID<{qid}>" in history
+        assert history.count("Human:") == 1
+        get_session_manager().clear_session(f"session-{qid}")
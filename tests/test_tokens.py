@@ -0,0 +1,14 @@
+import src.utils.tokens as tokens
+
+def test_counts_are_estimated_until_the_tokenizer_is_loaded(monkeypatch):
+    monkeypatch.setattr(tokens, "_encoding", None)
+    monkeypatch.setattr(tokens, "_tokenizer", "estimate")
+    monkeypatch.setattr(tokens, "_loaded", False)
+    monkeypatch.setattr(tokens, "HISTORY_TOKENIZER", "no-such-encoding")
+
+    assert tokens.count_tokens("abcdefgh") == 2
+    # A failed load falls back to the estimate explicitly, once
+    assert tokens.load_tokenizer() == "estimate"
+    assert tokens.tokenizer_name() == "estimate"
+    assert tokens.count_tokens("abcdefgh") == 2
+    assert tokens.truncate_to_tokens("a" * 100, 5).endswith(tokens.TRUNCATION_MARKER)
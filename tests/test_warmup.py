@@ -0,0 +1,37 @@
+import asyncio
+import time
+
+import src.utils.tokens as tokens
+import src.utils.warmup as warmup
+
+def test_blocking_warmup_steps_leave_the_event_loop_free(monkeypatch):
+    def slow_import(module):
+        time.sleep(0.05)
+
+    def slow_tokenizer():
+        time.sleep(0.2)
+        return "estimate"
+
+    monkeypatch.setattr(warmup.importlib, "import_module", slow_import)
+    monkeypatch.setattr(tokens, "load_tokenizer", slow_tokenizer)
+
+    async def run():
+        ticks = 0
+        done = False
+
+        async def ticker():
+            nonlocal ticks
+            while not done:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+        steps = warmup.Warmup()
+        await steps._import_modules()
+        await steps._load_tokenizer()
+        done = True
+        await task
+        return ticks
+
+    # About 0.4 s of blocking work; the loop kept ticking throughout
+    assert asyncio.run(run()) >= 20